@@ -0,0 +1,175 @@
+"""
+ASGI serving mode for the satellite node.
+
+Serves the same Flask app (routes, Bobb header hooks) from an asyncio event
+loop. The event loop only does socket I/O: each request is run on a thread
+pool, and streamed response bodies (image reads, encryption) are pulled from
+the pool in batches, so a slow file or crypto step never blocks other
+connections.
+
+Handlers are not async: every Flask view still runs synchronously on an
+executor thread, so concurrency is bounded by DEFAULT_EXECUTOR_WORKERS, not by
+the event loop. What this mode adds is that idle and slow connections, and the
+sending of response bodies, do not hold a thread.
+
+Run with any ASGI server, for example:
+    uvicorn asgi:app --port 30001
+or
+    python asgi.py
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from main import app as flask_app
+
+# Threads available to run request handlers and produce response bodies
+DEFAULT_EXECUTOR_WORKERS = 32
+
+# Bytes of a streamed body gathered per executor round trip
+BODY_BATCH_SIZE = 256 * 1024
+
+
+class AsgiAdapter:
+    """Runs a WSGI app under ASGI, offloading all blocking work to an executor."""
+
+    def __init__(self, wsgi_app, executor=None):
+        self.wsgi_app = wsgi_app
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=DEFAULT_EXECUTOR_WORKERS,
+            thread_name_prefix="asgi-handler"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, bytes(body))
+        status, headers, app_iter = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+
+        await send({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+        })
+        try:
+            iterator = iter(app_iter)
+            while True:
+                chunks = await loop.run_in_executor(self.executor, _next_batch, iterator)
+                if not chunks:
+                    break
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+        finally:
+            if hasattr(app_iter, "close"):
+                await loop.run_in_executor(self.executor, app_iter.close)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _call_wsgi(self, environ):
+        response = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = headers
+            return written.append
+
+        app_iter = self.wsgi_app(environ, start_response)
+        if written:
+            # Body parts sent through the legacy write() callable come first
+            app_iter = _Prepended(written, app_iter)
+        return response["status"], response["headers"], app_iter
+
+
+class _Prepended:
+    def __init__(self, head, app_iter):
+        self.head = head
+        self.app_iter = app_iter
+
+    def __iter__(self):
+        yield from self.head
+        yield from self.app_iter
+
+    def close(self):
+        if hasattr(self.app_iter, "close"):
+            self.app_iter.close()
+
+
+def _next_batch(iterator):
+    """Pulls body chunks until BODY_BATCH_SIZE bytes are gathered or the body ends."""
+    chunks = []
+    size = 0
+    for chunk in iterator:
+        if chunk:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= BODY_BATCH_SIZE:
+                break
+    return chunks
+
+
+def build_environ(scope, body):
+    """Builds a PEP 3333 environ from an ASGI http scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            key = name
+        else:
+            key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+app = AsgiAdapter(flask_app)
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The ASGI serving mode needs an ASGI server, e.g. `pip install uvicorn`")
+    uvicorn.run(app, port=30001)
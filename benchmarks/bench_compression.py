@@ -0,0 +1,84 @@
+"""
+Bytes saved against CPU spent by the compression stage of the chunk
+pipeline, for a JPEG, JSON telemetry and random data, per available codec.
+
+CPU time is measured for the whole encrypt_file_to_array call on one worker,
+so "extra CPU" is what compression adds on top of encryption. For the JPEG
+it is the cost of the probes that skip every chunk.
+
+Run from the repository root:
+    python -m benchmarks.bench_compression --size 16M
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_encryption import parse_size
+from config.constants import IMAGE_FILE_PATH
+from utils.crypto_utils import available_codecs, encrypt_file_to_array
+
+
+def write_payloads(scratch_dir, size):
+    payloads = {}
+
+    path = payloads["jpeg"] = os.path.join(scratch_dir, "image.jpg")
+    with open(IMAGE_FILE_PATH, "rb") as image_file:
+        image = image_file.read()
+    with open(path, "wb") as payload_file:
+        for _ in range(max(size // len(image), 1)):
+            payload_file.write(image)
+
+    path = payloads["telemetry"] = os.path.join(scratch_dir, "telemetry.log")
+    with open(path, "wb") as payload_file:
+        written = sample = 0
+        while written < size:
+            line = json.dumps({
+                "t": 1729250000 + sample, "satellite": "bobb-13", "temperature": 20 + sample % 7,
+                "battery": round(0.5 + (sample % 100) / 200, 3), "lat": 53.34, "lon": -6.26, "status": "ok"
+            }).encode() + b"\n"
+            written += payload_file.write(line)
+            sample += 1
+
+    path = payloads["random"] = os.path.join(scratch_dir, "random.bin")
+    with open(path, "wb") as payload_file:
+        payload_file.write(os.urandom(size))
+    return payloads
+
+
+def run(path, key, chunk_size, compression):
+    started = time.process_time()
+    chunks = encrypt_file_to_array(path, key, chunk_size, workers=1, compression=compression)
+    return time.process_time() - started, sum(len(chunk["data"]) for chunk in chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="16M", help="Size of each payload")
+    parser.add_argument("--chunk-size", default="1M", help="Chunk size")
+    args = parser.parse_args()
+
+    size, chunk_size = parse_size(args.size), parse_size(args.chunk_size)
+    key = os.urandom(32)
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        for payload, path in write_payloads(scratch_dir, size).items():
+            file_size = os.path.getsize(path)
+            run(path, key, chunk_size, None)  # warms the page cache and the cipher session
+            base_cpu, _ = run(path, key, chunk_size, None)
+            print(f"{payload}: {file_size / 1024 ** 2:.1f} MB, encryption alone {base_cpu * 1000:.1f} ms CPU")
+            for codec in available_codecs():
+                cpu, sent = run(path, key, chunk_size, codec)
+                saved = file_size - sent + (file_size + chunk_size - 1) // chunk_size * 16  # tags are sent either way
+                print(
+                    f"  {codec:<5} saved {saved / 1024 ** 2:>7.2f} MB ({saved / file_size:>6.1%})  "
+                    f"extra CPU {(cpu - base_cpu) * 1000:>8.1f} ms"
+                )
+    finally:
+        shutil.rmtree(scratch_dir)
+
+
+if __name__ == "__main__":
+    main()
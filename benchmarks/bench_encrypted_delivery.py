@@ -0,0 +1,63 @@
+"""
+Time to first byte and peak memory of encrypted image delivery as the image
+grows: the streamed records against encrypting the whole image at once.
+
+Run from the repository root:
+    python -m benchmarks.bench_encrypted_delivery --sizes 1M,16M,64M
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_encryption import parse_size, write_test_file
+from controllers.encrypted_image import iter_encrypted_image
+from utils.crypto_utils import encrypt_data
+
+
+def buffered(path, key):
+    # Whole image read and encrypted before anything can be sent
+    with open(path, "rb") as image_file:
+        yield encrypt_data(image_file.read(), key)
+
+
+def run(body):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    sent = 0
+    for chunk in body:
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        sent += len(chunk)
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_byte, total, peak, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1M,16M,64M", help="Comma separated image sizes")
+    args = parser.parse_args()
+
+    key = os.urandom(32)
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        for size in [parse_size(size) for size in args.sizes.split(",")]:
+            path = os.path.join(scratch_dir, "image.jpg")
+            write_test_file(path, size)
+            for label, body in (("streamed", iter_encrypted_image(path, key)), ("buffered", buffered(path, key))):
+                first_byte, total, peak, sent = run(body)
+                print(
+                    f"{size / 1024 ** 2:>7.0f} MB  {label:<9} first byte {first_byte * 1000:>8.2f} ms  "
+                    f"total {total * 1000:>8.1f} ms  peak memory {peak / 1024 ** 2:>7.1f} MB"
+                )
+    finally:
+        shutil.rmtree(scratch_dir)
+
+
+if __name__ == "__main__":
+    main()
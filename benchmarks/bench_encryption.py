@@ -0,0 +1,91 @@
+"""
+Throughput of encrypt_large_file: the old serial path against the
+parallel pipeline at several worker counts.
+
+Run from the repository root:
+    python -m benchmarks.bench_encryption --sizes 100M,1G,10G --workers 1,2,4,8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from utils.crypto_utils.data_encryption import DEFAULT_CHUNK_SIZE, encrypt_large_file, split_file
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(size):
+    size = size.strip().upper()
+    if size[-1] in UNITS:
+        return int(float(size[:-1]) * UNITS[size[-1]])
+    return int(size)
+
+
+def write_test_file(path, size):
+    # Repeat one random block so creating multi-GB inputs stays fast
+    block = os.urandom(DEFAULT_CHUNK_SIZE)
+    with open(path, "wb") as test_file:
+        remaining = size
+        while remaining > 0:
+            test_file.write(block[:remaining])
+            remaining -= len(block)
+
+
+def legacy_encrypt_large_file(file_path, key, output_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Serial path the module used before the pipeline: new AESGCM per chunk
+    os.makedirs(output_dir, exist_ok=True)
+    for chunk_id, chunk_data in split_file(file_path, chunk_size):
+        iv = os.urandom(12)
+        encrypted_chunk = AESGCM(key).encrypt(iv, chunk_data, None)
+        with open(os.path.join(output_dir, f"chunk_{chunk_id}.enc"), "wb") as chunk_file:
+            chunk_file.write(iv + encrypted_chunk)
+
+
+def run(label, func, size):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return {"name": label, "size": size, "seconds": elapsed, "mb_per_second": size / (1024 ** 2) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100M", help="Comma separated input sizes, e.g. 100M,1G,10G")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts")
+    parser.add_argument("--chunk-size", default=str(DEFAULT_CHUNK_SIZE))
+    parser.add_argument("--dir", default=None, help="Scratch directory (defaults to the system temp dir)")
+    args = parser.parse_args()
+
+    key = os.urandom(32)
+    chunk_size = parse_size(args.chunk_size)
+    scratch = tempfile.mkdtemp(dir=args.dir)
+    try:
+        for size in map(parse_size, args.sizes.split(",")):
+            input_file = os.path.join(scratch, "input.bin")
+            write_test_file(input_file, size)
+            output_dir = os.path.join(scratch, "chunks")
+
+            results = [run("serial (legacy)", lambda: legacy_encrypt_large_file(input_file, key, output_dir, chunk_size), size)]
+            shutil.rmtree(output_dir)
+            for workers in map(int, args.workers.split(",")):
+                results.append(run(
+                    f"pipeline workers={workers}",
+                    lambda: encrypt_large_file(input_file, key, output_dir, chunk_size, workers=workers),
+                    size
+                ))
+                shutil.rmtree(output_dir)
+
+            print(f"--- {size / (1024 ** 2):,.0f} MB, {chunk_size // 1024} KB chunks")
+            for result in results:
+                print(f"{result['name']:<22} {result['seconds']:>8.2f} s  {result['mb_per_second']:>8.1f} MB/s")
+            os.remove(input_file)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per request cost of Bobb header handling.
+
+Run from the repository root:
+    python -m benchmarks.bench_headers
+"""
+import itertools
+import socket
+import struct
+
+from flask import g, request
+
+from benchmarks.harness import measure, print_results
+from config.constants import X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from main import app
+from middleware.header import process_bobb_headers
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+BOBB_HEADER = BobbHeaders(version_major=1, message_type=1, sequence_number=1).build_header().hex()
+OPTIONAL_HEADER = BobbOptionalHeaders(hop_count=10, priority=1).build_optional_header().hex()
+REQUEST_HEADERS = {X_BOBB_HEADER: BOBB_HEADER, X_BOBB_OPTIONAL_HEADER: OPTIONAL_HEADER}
+
+
+def legacy_parse_header(raw_data):
+    # Slice-and-unpack parser the node used before the precompiled codec
+    version_major, version_minor, message_type = struct.unpack("!BBB", raw_data[:3])
+    return {
+        "version_major": version_major,
+        "version_minor": version_minor,
+        "message_type": message_type,
+        "dest_ipv6": socket.inet_ntop(socket.AF_INET6, raw_data[3:19]),
+        "dest_port": struct.unpack("!H", raw_data[19:21])[0],
+        "source_ipv6": socket.inet_ntop(socket.AF_INET6, raw_data[21:37]),
+        "source_port": struct.unpack("!H", raw_data[37:39])[0],
+        "sequence_number": struct.unpack("!I", raw_data[39:43])[0],
+        "timestamp": struct.unpack("!I", raw_data[43:47])[0],
+    }
+
+
+def legacy_parse_optional_header(raw_data):
+    return {
+        "timestamp": struct.unpack("!I", raw_data[:4])[0],
+        "hop_count": struct.unpack("!B", raw_data[4:5])[0],
+        "priority": struct.unpack("!B", raw_data[5:6])[0],
+        "encryption_algo": raw_data[6:22].decode('utf-8').rstrip('\0'),
+    }
+
+
+def legacy_request():
+    # The app hook and check_headers each looked up and parsed both headers
+    for _ in range(2):
+        g.bobb_header = legacy_parse_header(bytes.fromhex(request.headers.get(X_BOBB_HEADER)))
+        g.bobb_optional_header = legacy_parse_optional_header(bytes.fromhex(request.headers.get(X_BOBB_OPTIONAL_HEADER)))
+
+
+def main():
+    with app.test_request_context("/v1/satellites", headers=REQUEST_HEADERS):
+        results = [measure("headers: legacy (parsed twice)", legacy_request)]
+        results.append(measure("headers: process_bobb_headers (parsed once)", process_bobb_headers))
+
+    client = app.test_client()
+    sequence_numbers = itertools.count(2)
+
+    def fresh_request():
+        header = BobbHeaders(version_major=1, message_type=1, sequence_number=next(sequence_numbers))
+        client.get("/v1/satellites", headers={X_BOBB_HEADER: header.build_header().hex(), X_BOBB_OPTIONAL_HEADER: OPTIONAL_HEADER})
+
+    results.append(measure("route: GET /v1/satellites", fresh_request, number=1000))
+    # Same sequence number every time, answered by the replay cache
+    results.append(measure(
+        "route: GET /v1/satellites (retransmit)",
+        lambda: client.get("/v1/satellites", headers=REQUEST_HEADERS),
+        number=1000
+    ))
+
+    # 1000 header pairs, one request each or all in one batch
+    specs = [{
+        "necessary_header": {
+            "version_major": 1, "version_minor": 0, "message_type": 1,
+            "dest_ipv6": "2001:0:130f::9c0:876a:130b", "dest_port": 12345,
+            "source_ipv6": "::1", "source_port": 40000,
+            "sequence_number": sequence_number, "timestamp": 1700000000
+        },
+        "optional_header": {"hop_count": 10, "priority": 1, "encryption_algo": "AES256"}
+    } for sequence_number in range(1000)]
+
+    def single_requests():
+        for spec in specs:
+            client.post("/v1/create-header", json=spec)
+
+    results.append(measure("create-header: 1000 single requests", single_requests, number=1, repeat=3))
+    results.append(measure(
+        "create-header: one batch of 1000",
+        lambda: client.post("/v1/create-header/batch", json=specs).get_data(),
+        number=5, repeat=3
+    ))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Overhead of the request instrumentation.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics
+"""
+from benchmarks.harness import measure, print_results
+from helpers.metrics import metrics
+from main import app
+
+
+def main():
+    results = [
+        measure("observe one stage", lambda: metrics.observe_stage("bench", 0.001, "/bench"), number=100000),
+        measure("render /metrics", metrics.render, number=200),
+    ]
+
+    client = app.test_client()
+
+    def get_closed():
+        client.get("/v1/satellites").close()
+
+    results.append(measure("route: instrumented", get_closed, number=2000))
+    # The same request without the WSGI middleware (the Flask hooks still time their stages)
+    instrumented = app.wsgi_app
+    app.wsgi_app = instrumented.wsgi_app
+    try:
+        results.append(measure("route: without middleware", get_closed, number=2000))
+    finally:
+        app.wsgi_app = instrumented
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
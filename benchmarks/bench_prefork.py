@@ -0,0 +1,107 @@
+"""
+Throughput of the production server as workers are added, on the
+/v1/satellites and /v1/create-header routes.
+
+Starts server.py once per worker count and loads it from several client
+processes, so the load generator is not the bottleneck.
+
+Run from the repository root:
+    python -m benchmarks.bench_prefork --workers 1,2,4,8 --clients 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.load_test import run
+
+CREATE_HEADER_BODY = json.dumps({
+    "necessary_header": {
+        "version_major": 1, "version_minor": 0, "message_type": 1,
+        "dest_ipv6": "2001:0:130f::9c0:876a:130b", "dest_port": 30001,
+        "source_ipv6": "2001:0:130f::9c0:876a:1314", "source_port": 30002,
+        "sequence_number": 1, "timestamp": 1700000000
+    },
+    "optional_header": {"hop_count": 10, "priority": 1, "encryption_algo": "AES256"}
+})
+
+ROUTES = (
+    ("GET /v1/satellites", "/v1/satellites", "GET", ""),
+    ("POST /v1/create-header", "/v1/create-header", "POST", CREATE_HEADER_BODY),
+)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def client(url, method, body, concurrency, requests, source_port):
+    return asyncio.run(run(url, method, body.encode(), concurrency, requests, source_port))
+
+
+def load(port, path, method, body, clients, concurrency, requests, first_source_port=1):
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    with ProcessPoolExecutor(clients) as pool:
+        results = list(pool.map(
+            client, [url] * clients, [method] * clients, [body] * clients,
+            [concurrency] * clients, [requests // clients] * clients, range(first_source_port, first_source_port + clients)
+        ))
+    elapsed = time.perf_counter() - started
+    statuses = {}
+    for result in results:
+        for status, count in result["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    total = sum(result["requests"] for result in results)
+    return total / elapsed, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma separated worker counts")
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 1, help="Load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Connections per load generator process")
+    parser.add_argument("--requests", type=int, default=4000, help="Requests per route and worker count")
+    parser.add_argument("--port", type=int, default=31100)
+    args = parser.parse_args()
+
+    baseline = {}
+    for workers in [int(count) for count in args.workers.split(",")]:
+        port = args.port + workers
+        server = subprocess.Popen(
+            [sys.executable, "server.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            for route_index, (name, path, method, body) in enumerate(ROUTES):
+                # Each route and client its own source, so no request looks like a retransmit
+                requests_per_second, statuses = load(
+                    port, path, method, body, args.clients, args.concurrency, args.requests,
+                    route_index * args.clients + 1
+                )
+                baseline.setdefault(name, requests_per_second)
+                print(
+                    f"{workers:>3} workers  {name:<24} {requests_per_second:>10,.0f} req/s  "
+                    f"x{requests_per_second / baseline[name]:.2f}  statuses {statuses}"
+                )
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
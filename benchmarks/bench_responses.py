@@ -0,0 +1,61 @@
+"""
+Cost of building JSON responses, old and new, plus the routes that use them.
+
+Run from the repository root:
+    python -m benchmarks.bench_responses
+"""
+import itertools
+
+from flask import jsonify
+
+from benchmarks.harness import measure, print_results
+from config.constants import ERROR_INVALID_BOBB_HEADER, X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from helpers.response_helper import create_response, error_response, orjson
+from main import app
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+OPTIONAL_HEADER = BobbOptionalHeaders(hop_count=10, priority=1).build_optional_header().hex()
+LARGE_LIST = [{"id": i, "location": "Valencia", "ip": "2001:0:130f::9c0:876a:130b"} for i in range(10000)]
+
+
+def legacy_create_response(data, status_code):
+    # What create_response did before: a new envelope through jsonify every time
+    return jsonify({
+        "status": "success" if 200 <= status_code < 400 else "error",
+        "data": data,
+        "status_code": status_code
+    }), status_code
+
+
+def main():
+    print(f"JSON backend: {'orjson' if orjson is not None else 'json'}")
+    error = {"error": ERROR_INVALID_BOBB_HEADER}
+    with app.app_context():
+        results = [
+            measure("error body: jsonify", lambda: legacy_create_response(error, 400)[0].get_data()),
+            measure("error body: create_response", lambda: create_response(error, 400)[0].get_data()),
+            measure("error body: error_response (cached)", lambda: error_response(ERROR_INVALID_BOBB_HEADER, 400)[0].get_data()),
+            measure("10k list: jsonify", lambda: legacy_create_response(LARGE_LIST, 200)[0].get_data(), number=20),
+            measure("10k list: create_response", lambda: create_response(LARGE_LIST, 200)[0].get_data(), number=20),
+        ]
+
+    client = app.test_client()
+    sequence_numbers = itertools.count()
+
+    def headers():
+        header = BobbHeaders(version_major=1, message_type=1, sequence_number=next(sequence_numbers))
+        return {X_BOBB_HEADER: header.build_header().hex(), X_BOBB_OPTIONAL_HEADER: OPTIONAL_HEADER}
+
+    results.append(measure("route: GET /v1/satellites", lambda: client.get("/v1/satellites", headers=headers()), number=1000))
+    results.append(measure("route: GET /v1/satellites, no headers (400)", lambda: client.get("/v1/satellites"), number=1000))
+    results.append(measure(
+        "route: GET /v1/satellites, bad header (400)",
+        lambda: client.get("/v1/satellites", headers={X_BOBB_HEADER: "zz" * 47}),
+        number=1000
+    ))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Latency per priority class with the request scheduler under overload.
+
+Client threads keep max_concurrency handlers busy several times over with a
+mix of low and high priority requests, each holding its slot for a fixed
+service time. The same load runs once through a single FIFO class and once
+through the weighted priority classes, so the p99 of the high priority
+requests can be compared.
+
+    python -m benchmarks.bench_scheduler --clients 64 --concurrency 8 --seconds 3
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.load_test import percentile
+from config.constants import SCHEDULER_WEIGHTS
+from middleware.scheduler import PriorityScheduler
+
+HIGH_PRIORITY = len(SCHEDULER_WEIGHTS) - 1
+
+
+def run(scheduler, clients, seconds, service_time, high_share):
+    latencies = {0: [], HIGH_PRIORITY: []}
+    shed = {0: 0, HIGH_PRIORITY: 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            priority = HIGH_PRIORITY if rng.random() < high_share else 0
+            start = time.perf_counter()
+            admitted = scheduler.acquire(priority)
+            if admitted:
+                time.sleep(service_time)
+                scheduler.release()
+            else:
+                # A shed client backs off before retrying, as it would after a 503
+                time.sleep(service_time * 10)
+            with lock:
+                if admitted:
+                    latencies[priority].append(time.perf_counter() - start)
+                else:
+                    shed[priority] += 1
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = {}
+    for priority, values in latencies.items():
+        values.sort()
+        results[priority] = {
+            "served_per_second": len(values) / seconds,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "shed": shed[priority],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--service-ms", type=float, default=5.0)
+    parser.add_argument("--high-share", type=float, default=0.1, help="fraction of high priority requests")
+    args = parser.parse_args()
+
+    capacity = args.concurrency / (args.service_ms / 1000)
+    print(f"capacity {capacity:,.0f} req/s, {args.clients} clients, {args.high_share:.0%} high priority")
+    for name, weights in (("fifo", (1,)), ("priority", SCHEDULER_WEIGHTS)):
+        scheduler = PriorityScheduler(max_concurrency=args.concurrency, max_queue=args.max_queue, weights=weights)
+        results = run(scheduler, args.clients, args.seconds, args.service_ms / 1000, args.high_share)
+        for priority, result in results.items():
+            label = "high" if priority == HIGH_PRIORITY else "low"
+            print(f"  {name:<8} {label:<4} {result['served_per_second']:>8,.0f} req/s  "
+                  f"p50 {result['p50_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  shed {result['shed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Bytes on the wire to download an image over a link that drops: retrying the
+whole encrypted stream against resuming a transfer with the missing ranges.
+
+Each connection breaks after an exponentially distributed number of bytes
+with the given mean, the way a pass ends or a burst of noise hits.
+
+Run from the repository root:
+    python -m benchmarks.bench_transfers --size 16M --mean-link 4M
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import tempfile
+
+from benchmarks.bench_encryption import parse_size, write_test_file
+from controllers.encrypted_image import iter_encrypted_image
+from utils.crypto_utils import TransferReceiver, build_manifest, iter_transfer_records, parse_ranges, format_ranges
+
+
+def link_budget(rng, mean):
+    return int(rng.expovariate(1 / mean))
+
+
+def full_retries(path, key, rng, mean):
+    sent = attempts = 0
+    while True:
+        attempts += 1
+        budget = link_budget(rng, mean)
+        for chunk in iter_encrypted_image(path, key):
+            if budget < len(chunk):
+                sent += budget
+                break
+            budget -= len(chunk)
+            sent += len(chunk)
+        else:
+            return sent, attempts
+
+
+def resumed(path, key, rng, mean, chunk_size, state_dir):
+    manifest = build_manifest(path, chunk_size)
+    sent = attempts = 0
+    with TransferReceiver(manifest, key, state_dir) as receiver:
+        while not receiver.complete:
+            attempts += 1
+            chunk_ids = parse_ranges(format_ranges(receiver.missing_ranges()), manifest.chunk_count)
+            stream = b"".join(b"".join(record) for record in iter_transfer_records(path, key, manifest, chunk_ids))
+            received = stream[:link_budget(rng, mean)]
+            sent += len(received)
+            receiver.receive(io.BytesIO(received).read)
+        receiver.finish(os.path.join(state_dir, "image.jpg"))
+    return sent, attempts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="16M", help="Image size")
+    parser.add_argument("--mean-link", default="4M", help="Mean bytes a connection carries before it drops")
+    parser.add_argument("--chunk-size", default="64K", help="Transfer chunk size")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    size, mean, chunk_size = parse_size(args.size), parse_size(args.mean_link), parse_size(args.chunk_size)
+    key = os.urandom(32)
+    rng = random.Random(args.seed)
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(scratch_dir, "source.jpg")
+        write_test_file(path, size)
+        for label, download in (
+            ("full retries", lambda: full_retries(path, key, rng, mean)),
+            ("resumed", lambda: resumed(path, key, rng, mean, chunk_size, os.path.join(scratch_dir, "transfers"))),
+        ):
+            results = [download() for _ in range(args.runs)]
+            sent = sum(result[0] for result in results) / len(results)
+            attempts = sum(result[1] for result in results) / len(results)
+            print(
+                f"{label:<13} {sent / 1024 ** 2:>9.1f} MB on the wire  "
+                f"({sent / size:>5.2f}x the image)  {attempts:>6.1f} connections"
+            )
+    finally:
+        shutil.rmtree(scratch_dir)
+
+
+if __name__ == "__main__":
+    main()
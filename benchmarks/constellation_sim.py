@@ -0,0 +1,137 @@
+"""
+Local constellation simulator for the frame relay.
+
+Starts one frame server process per satellite from the registry, all on
+127.0.0.1, wired in a line: every node forwards frames for satellites after
+it to its right neighbour and frames for satellites before it to its left
+neighbour. Load is sent into the first node and addressed to nodes further
+down the line, so each pass measures throughput and p50/p99 latency for a
+given number of relay hops.
+
+    python -m benchmarks.constellation_sim --nodes 4 --concurrency 16 --requests 2000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+from benchmarks.load_test import percentile
+from config.constants import MESSAGE_TYPE_CAPTURE_IMAGE
+from controllers.relay import Relay, RoutingTable
+from frame_server import serve_frames
+from helpers.satellite_registry import get_registry
+from utils.frames import encode_frame, read_frame
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+
+def node_routes(ips, position, base_port):
+    """Next hop overrides for the node at position in the line."""
+    routes = {}
+    for other, ip in enumerate(ips):
+        if other > position:
+            routes[ip] = f"127.0.0.1:{base_port + position + 1}"
+        elif other < position:
+            routes[ip] = f"127.0.0.1:{base_port + position - 1}"
+    return routes
+
+
+def run_node(ips, position, base_port):
+    relay = Relay(ips[position], RoutingTable(satellites=[], routes=node_routes(ips, position, base_port)))
+    try:
+        asyncio.run(serve_frames("127.0.0.1", base_port + position, relay))
+    except KeyboardInterrupt:
+        pass
+
+
+async def wait_for_port(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def worker(port, frame, remaining, latencies, reply_types):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            writer.write(frame)
+            await writer.drain()
+            reply = await read_frame(reader)
+            latencies.append(time.perf_counter() - start)
+            message_type = reply.header.message_type
+            reply_types[message_type] = reply_types.get(message_type, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_pass(base_port, dest_ip, hops, message_type, concurrency, requests):
+    header = BobbHeaders(version_major=1, message_type=message_type, dest_ipv6=dest_ip)
+    frame = encode_frame(header, BobbOptionalHeaders(hop_count=hops + 1))
+    remaining = [requests]
+    latencies = []
+    reply_types = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(base_port, frame, remaining, latencies, reply_types) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "hops": hops,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "reply_types": reply_types,
+    }
+
+
+async def run(ips, base_port, message_type, concurrency, requests):
+    for position in range(len(ips)):
+        await wait_for_port(base_port + position)
+    return [
+        await run_pass(base_port, ips[hops], hops, message_type, concurrency, requests)
+        for hops in range(len(ips))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=4, help="satellites in the simulated line")
+    parser.add_argument("--base-port", type=int, default=31000)
+    parser.add_argument("--message-type", type=int, default=MESSAGE_TYPE_CAPTURE_IMAGE,
+                        help="1 fetches the image at the destination; 2 gets a small error frame back")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    ips = [satellite["ip"] for satellite in get_registry()][:args.nodes]
+    nodes = [
+        multiprocessing.Process(target=run_node, args=(ips, position, args.base_port), daemon=True)
+        for position in range(len(ips))
+    ]
+    for node in nodes:
+        node.start()
+    try:
+        results = asyncio.run(run(ips, args.base_port, args.message_type, args.concurrency, args.requests))
+    finally:
+        for node in nodes:
+            node.terminate()
+            node.join()
+
+    print(f"{len(ips)} nodes, concurrency {args.concurrency}, message type {args.message_type}")
+    for result in results:
+        print(f"  {result['hops']} hop(s): {result['requests_per_second']:,.0f} frames/s  "
+              f"p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  replies {result['reply_types']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+
+def measure(name, func, number=10000, repeat=5, bytes_per_call=None):
+    """
+    Runs func number times, repeat times over, and keeps the best run. With
+    bytes_per_call the throughput is reported as well.
+    """
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    per_call = min(timings) / number
+    result = {
+        "name": name,
+        "per_call_us": per_call * 1e6,
+        "calls_per_second": 1 / per_call if per_call else float("inf"),
+        "number": number,
+        "repeat": repeat,
+    }
+    if bytes_per_call is not None:
+        result["bytes_per_call"] = bytes_per_call
+        result["mb_per_second"] = bytes_per_call / (1024 ** 2) / per_call if per_call else float("inf")
+    return result
+
+
+def print_results(results):
+    width = max(len(result["name"]) for result in results)
+    for result in results:
+        line = f"{result['name']:<{width}}  {result['per_call_us']:>10.2f} us/call  {result['calls_per_second']:>12,.0f} calls/s"
+        if "mb_per_second" in result:
+            line += f"  {result['mb_per_second']:>10,.1f} MB/s"
+        print(line)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, results):
+    """Writes results as JSON along with what they were measured on."""
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(document, results_file, indent=2)
+        results_file.write("\n")
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as results_file:
+        return json.load(results_file)["results"]
+
+
+def compare_results(baseline, results, threshold=0.2):
+    """
+    Returns (name, baseline us, current us, change) for every benchmark that
+    got more than threshold (a fraction) slower than in baseline.
+    """
+    baseline_by_name = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_name.get(result["name"])
+        if previous is None or not previous["per_call_us"]:
+            continue
+        change = result["per_call_us"] / previous["per_call_us"] - 1
+        if change > threshold:
+            regressions.append((result["name"], previous["per_call_us"], result["per_call_us"], change))
+    return regressions
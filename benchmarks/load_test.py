@@ -0,0 +1,139 @@
+"""
+HTTP load test for the satellite node. Reports requests per second and
+p50/p99 latency so the Flask and ASGI serving modes can be compared.
+
+Start the node in each mode, then point the load test at it:
+    python main.py                          # Flask mode, port 30001
+    uvicorn asgi:app --port 30002           # ASGI mode
+    python server.py --workers 4 --port 30003   # production mode, one process per worker
+
+    python -m benchmarks.load_test --url http://127.0.0.1:30001/v1/satellites \\
+        --url http://127.0.0.1:30002/v1/satellites --concurrency 64 --requests 5000
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from urllib.parse import urlsplit
+
+from config.constants import X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+
+def build_request(url, method, body, sequence_number=0, source_port=0):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    headers = [
+        f"{method} {path} HTTP/1.1",
+        f"Host: {parts.netloc}",
+        f"{X_BOBB_HEADER}: {BobbHeaders(version_major=1, message_type=1, source_port=source_port, sequence_number=sequence_number).build_header().hex()}",
+        f"{X_BOBB_OPTIONAL_HEADER}: {BobbOptionalHeaders().build_optional_header().hex()}",
+        f"Content-Length: {len(body)}",
+    ]
+    if body:
+        headers.append("Content-Type: application/json")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body, parts.hostname, parts.port or 80
+
+
+async def read_response(reader):
+    """Reads one response and returns (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed")
+    version, status = status_line.split(b" ", 2)[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return int(status), False
+
+    keep_alive = headers.get("connection", "").lower() != "close" and version == b"HTTP/1.1"
+    return int(status), keep_alive
+
+
+async def worker(url, method, body, sequence_numbers, remaining, latencies, statuses, source_port=0):
+    reader = writer = None
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        # Every request gets its own sequence number so the node's replay cache does not answer it
+        request, host, port = build_request(url, method, body, next(sequence_numbers), source_port)
+        if writer is None:
+            reader, writer = await asyncio.open_connection(host, port)
+        start = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        try:
+            status, keep_alive = await read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status, keep_alive = 0, False
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run(url, method, body, concurrency, requests, source_port=0):
+    """Pass each concurrent load generator its own source_port so their sequence numbers do not collide."""
+    sequence_numbers = itertools.count()
+    remaining = [requests]
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(url, method, body, sequence_numbers, remaining, latencies, statuses, source_port) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "url": url,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", required=True, help="URL to load; repeat to compare servers")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default="", help="Request body, e.g. a JSON document")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    for url in args.url:
+        result = asyncio.run(run(url, args.method, args.body.encode(), args.concurrency, args.requests))
+        print(f"{result['url']}")
+        print(f"  {result['requests']} requests in {result['seconds']:.2f} s, {result['requests_per_second']:,.0f} req/s")
+        print(f"  p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  statuses {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
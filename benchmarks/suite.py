@@ -0,0 +1,218 @@
+"""
+Benchmark suite covering the hot paths of a node: header build/parse, data
+encryption, large file encryption and reassembly, key derivation and every
+earth_router route through the Flask test client.
+
+Run from the repository root:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare results.json --threshold 0.2
+
+With --compare the run exits with status 1 if any benchmark got slower than the
+baseline by more than the threshold, so it can gate a release.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from cryptography.hazmat.primitives.asymmetric import x25519
+
+from benchmarks.harness import compare_results, load_results, measure, print_results, save_results
+from config.constants import FRAME_CONTENT_TYPE, X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from utils.crypto_utils import generate_keys
+from utils.crypto_utils.data_encryption import (
+    create_shared_key,
+    decrypt_data,
+    derive_shared_key,
+    encrypt_data,
+    encrypt_large_file,
+    reassemble_file_from_chunks
+)
+from utils.frames import encode_frame
+from utils.headers import BobbHeaders, build_many
+from utils.optional_headers import BobbOptionalHeaders
+
+PAYLOAD_SIZES = (64, 1024, 64 * 1024, 1024 * 1024)
+LARGE_FILE_SIZE = 16 * 1024 * 1024
+SATELLITE_IP = "2001:0:130f::9c0:876a:130b"
+
+HEADER = BobbHeaders(
+    version_major=1, message_type=1, dest_ipv6=SATELLITE_IP, dest_port=30001,
+    source_ipv6="2001:0:130f::9c0:876a:1314", source_port=30002, sequence_number=7
+)
+OPTIONAL_HEADER = BobbOptionalHeaders(hop_count=10, priority=1, encryption_algo="AES256")
+HEADER_SPEC = {
+    "necessary_header": {
+        "version_major": 1, "version_minor": 0, "message_type": 1,
+        "dest_ipv6": SATELLITE_IP, "dest_port": 30001,
+        "source_ipv6": "2001:0:130f::9c0:876a:1314", "source_port": 30002,
+        "sequence_number": 7, "timestamp": 1700000000
+    },
+    "optional_header": {"hop_count": 10, "priority": 1, "encryption_algo": "AES256"}
+}
+
+
+def header_benchmarks(scale):
+    raw_header = HEADER.build_header()
+    raw_optional_header = OPTIONAL_HEADER.build_optional_header()
+    records = [HEADER.to_record()] * 1024
+    return [
+        measure("headers: BobbHeaders.build_header", HEADER.build_header, number=100000 // scale),
+        measure("headers: BobbHeaders.parse_header", lambda: HEADER.parse_header(raw_header), number=100000 // scale),
+        measure("headers: BobbOptionalHeaders.build_optional_header",
+                OPTIONAL_HEADER.build_optional_header, number=100000 // scale),
+        measure("headers: BobbOptionalHeaders.parse_optional_header",
+                lambda: OPTIONAL_HEADER.parse_optional_header(raw_optional_header), number=100000 // scale),
+        measure("headers: build_many x1024", lambda: build_many(records), number=1000 // scale),
+    ]
+
+
+def crypto_benchmarks(scale, scratch_dir):
+    key_dir = os.path.join(scratch_dir, "keys")
+    generate_keys("BenchA", key_dir)
+    generate_keys("BenchB", key_dir)
+    private_key_file = os.path.join(key_dir, "BenchA_private_key.pem")
+    public_key_file = os.path.join(key_dir, "BenchB_public_key.pem")
+    private_key = x25519.X25519PrivateKey.generate()
+    peer_public_key = x25519.X25519PrivateKey.generate().public_key()
+    key = derive_shared_key(private_key_file, public_key_file)
+
+    results = [
+        measure("crypto: create_shared_key (X25519 + HKDF)",
+                lambda: create_shared_key(private_key, peer_public_key), number=2000 // scale),
+        measure("crypto: derive_shared_key (cached key files)",
+                lambda: derive_shared_key(private_key_file, public_key_file), number=20000 // scale),
+    ]
+    for size in PAYLOAD_SIZES:
+        data = os.urandom(size)
+        number = max(10, 10 * 1024 * 1024 // size // scale // 10)
+        encrypted = encrypt_data(data, key)
+        results.append(measure(f"crypto: encrypt_data {size} B", lambda: encrypt_data(data, key),
+                               number=number, bytes_per_call=size))
+        results.append(measure(f"crypto: decrypt_data {size} B", lambda: decrypt_data(encrypted, key),
+                               number=number, bytes_per_call=size))
+
+    large_file = os.path.join(scratch_dir, "large_file.bin")
+    chunk_dir = os.path.join(scratch_dir, "chunks")
+    reassembled_file = os.path.join(scratch_dir, "reassembled.bin")
+    size = LARGE_FILE_SIZE // scale
+    with open(large_file, "wb") as output:
+        output.write(os.urandom(size))
+
+    def encrypt_file():
+        with contextlib.redirect_stdout(io.StringIO()):
+            encrypt_large_file(large_file, key, chunk_dir)
+
+    def reassemble_file():
+        with contextlib.redirect_stdout(io.StringIO()):
+            reassemble_file_from_chunks(reassembled_file, chunk_dir, key)
+
+    results.append(measure(f"crypto: encrypt_large_file {size // 1024 ** 2} MB", encrypt_file,
+                           number=1, repeat=3, bytes_per_call=size))
+    results.append(measure(f"crypto: reassemble_file_from_chunks {size // 1024 ** 2} MB", reassemble_file,
+                           number=1, repeat=3, bytes_per_call=size))
+    return results
+
+
+def route_benchmarks(scale):
+    from main import app
+
+    client = app.test_client()
+    sequence_numbers = itertools.count(1)
+    optional_header = OPTIONAL_HEADER.build_optional_header().hex()
+
+    def headers():
+        # A fresh sequence number each time, or the replay cache answers instead
+        header = BobbHeaders(version_major=1, message_type=1, sequence_number=next(sequence_numbers))
+        return {X_BOBB_HEADER: header.build_header().hex(), X_BOBB_OPTIONAL_HEADER: optional_header}
+
+    def request(method, path, **kwargs):
+        def call():
+            response = client.open(path, method=method, headers=headers(), **kwargs)
+            response.get_data()
+            response.close()
+        return call
+
+    def frame():
+        header = BobbHeaders(message_type=1, dest_ipv6=SATELLITE_IP, sequence_number=next(sequence_numbers))
+        return bytes(encode_frame(header, OPTIONAL_HEADER))
+
+    batch = json.dumps([HEADER_SPEC] * 100)
+    image_path = f"/v1/satellites/{SATELLITE_IP}/images"
+    results = [
+        measure("route: POST /v1/create-header", request("POST", "/v1/create-header", json=HEADER_SPEC),
+                number=2000 // scale),
+        measure("route: POST /v1/create-header/batch x100",
+                request("POST", "/v1/create-header/batch", data=batch, content_type="application/json"),
+                number=200 // scale),
+        measure("route: GET /v1/satellites", request("GET", "/v1/satellites"), number=2000 // scale),
+        measure(f"route: POST {image_path}", request("POST", image_path), number=100 // scale),
+        measure(f"route: GET {image_path}", request("GET", image_path), number=200 // scale),
+        measure("route: GET /v1/scheduler", request("GET", "/v1/scheduler"), number=2000 // scale),
+        measure("route: GET /metrics", request("GET", "/metrics"), number=500 // scale),
+        measure("route: GET /metrics/profiler", request("GET", "/metrics/profiler"), number=2000 // scale),
+        measure("route: PUT /metrics/profiler", request("PUT", "/metrics/profiler", json={"sample_rate": 0}),
+                number=2000 // scale),
+    ]
+
+    def frame_request():
+        response = client.post("/v1/frames", data=frame(), content_type=FRAME_CONTENT_TYPE)
+        response.get_data()
+        response.close()
+
+    results.append(measure("route: POST /v1/frames", frame_request, number=200 // scale))
+    return results
+
+
+GROUPS = ("headers", "crypto", "routes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", default=",".join(GROUPS), help="Comma separated subset of " + ",".join(GROUPS))
+    parser.add_argument("--quick", action="store_true", help="Run a tenth of the iterations")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file written by an earlier --output run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Slowdown (fraction) against the baseline counted as a regression")
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown groups: {', '.join(sorted(unknown))}")
+    scale = 10 if args.quick else 1
+
+    results = []
+    scratch_dir = tempfile.mkdtemp(prefix="bobb-bench-")
+    try:
+        if "headers" in groups:
+            results += header_benchmarks(scale)
+        if "crypto" in groups:
+            results += crypto_benchmarks(scale, scratch_dir)
+        if "routes" in groups:
+            results += route_benchmarks(scale)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    print_results(results)
+
+    if args.output:
+        save_results(args.output, results)
+        print(f"Results saved to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare), results, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.2f} -> {after:.2f} us/call (+{change:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
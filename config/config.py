@@ -1,12 +1,37 @@
 import json
 import os
+import threading
 
 from config.constants import BASESTATION, SATELLITE_FUNCTION_DISASTER_IMAGING
 from helpers.name_generator import generate_name
 
 CONFIG_FILE_PATH = "config/config.json"
 
+_config = None
+_config_lock = threading.Lock()
+
+def get_config():
+    """
+    Returns the node config, read from CONFIG_FILE_PATH (or created there) on
+    the first call and shared by the whole process afterwards.
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = _read_config()
+    return _config
+
+def reload_config():
+    """Forgets the cached config so the next get_config reads the file again."""
+    global _config
+    with _config_lock:
+        _config = None
+
 def load_from_config_file():
+    return get_config()
+
+def _read_config():
     # check if config file exists
     if os.path.exists(CONFIG_FILE_PATH):
         with open(CONFIG_FILE_PATH, "r") as config_file:
@@ -20,7 +45,10 @@ def create_config():
         "function": SATELLITE_FUNCTION_DISASTER_IMAGING
     }
 
-    with open(CONFIG_FILE_PATH, "w") as config_file:
+    # Write to a temporary file first so a crash never leaves half a config behind
+    temporary_path = f"{CONFIG_FILE_PATH}.tmp"
+    with open(temporary_path, "w") as config_file:
         json.dump(config, config_file)
+    os.replace(temporary_path, CONFIG_FILE_PATH)
 
-    return config
\ No newline at end of file
+    return config
@@ -1,22 +1,52 @@
 # Header Names
 X_BOBB_HEADER = "X-Bobb-Header"
 X_BOBB_OPTIONAL_HEADER = "X-Bobb-Optional-Header"
+X_BOBB_PUBLIC_KEY = "X-Bobb-Public-Key"
+X_BOBB_IMAGE_SIZE = "X-Bobb-Image-Size"
+X_BOBB_CHUNK_SIZE = "X-Bobb-Chunk-Size"
 
 # Error Messages
 ERROR_INVALID_BOBB_HEADER = "Invalid Bobb header"
 ERROR_INVALID_OPTIONAL_HEADER = "Invalid Bobb optional header"
+ERROR_INVALID_FRAME = "Invalid frame"
+ERROR_SERVER_OVERLOADED = "Server overloaded, retry later"
+ERROR_DUPLICATE_REQUEST = "Duplicate request"
+ERROR_INVALID_HEADER_BATCH = "Invalid header batch"
+ERROR_FORBIDDEN = "Forbidden"
+ERROR_INVALID_PUBLIC_KEY = "Invalid public key"
+ERROR_NODE_KEY_UNAVAILABLE = "Node key not available"
+ERROR_UNKNOWN_TRANSFER = "Unknown transfer"
+ERROR_TRANSFER_EXPIRED = "Transfer expired, the file has changed"
+ERROR_INVALID_CHUNK_RANGES = "Invalid chunk ranges"
 
 # Default Values
 DEFAULT_HOP_COUNT = 255
 DEFAULT_PRIORITY = 0
 DEFAULT_ENCRYPTION_ALGO = "None"
 
+# Message Types
+MESSAGE_TYPE_CAPTURE_IMAGE = 1
+MESSAGE_TYPE_RESPONSE = 2
+MESSAGE_TYPE_ERROR = 3
+
 # HTTP Status Codes
 STATUS_SUCCESS = 200
 STATUS_BAD_REQUEST = 400
 STATUS_UNAUTHORIZED = 401
+STATUS_FORBIDDEN = 403
 STATUS_NOT_FOUND = 404
+STATUS_CONFLICT = 409
+STATUS_GONE = 410
 STATUS_INTERNAL_SERVER_ERROR = 500
+STATUS_SERVICE_UNAVAILABLE = 503
+
+# Production Server
+SERVER_PORT = 30001
+SERVER_LISTEN_BACKLOG = 1024
+SERVER_DRAIN_TIMEOUT = 30  # seconds a stopping worker may spend finishing requests
+
+# Header Creation
+MAX_HEADER_BATCH = 100000  # header specs per batch request
 
 # Basestation
 BASESTATION = "basestation"
@@ -25,3 +55,32 @@ BASESTATION = "basestation"
 SATELLITE_FUNCTION_DISASTER_IMAGING = "disaster-imaging"
 SATELLITE_FUNCTION_WHALE_TRACKING = "whale-tracking"
 SATELLITE_FUNCTION_WINDFARM_MONITORING = "windfarm-monitoring"
+
+# Images
+IMAGE_FILE_PATH = "development/mar-menor.jpg"
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # raw and base64 encoded images kept in memory
+ENCRYPTED_IMAGE_CONTENT_TYPE = "application/vnd.bobb.encrypted-chunks"
+ENCRYPTED_CHUNK_SIZE = 256 * 1024  # plaintext bytes per encrypted record
+
+# Binary Frame Transport
+FRAME_CONTENT_TYPE = "application/vnd.bobb.frame"
+FRAME_SERVER_PORT = 30002
+
+# Resumable Transfers
+TRANSFER_CHUNK_SIZE = 64 * 1024  # plaintext bytes per chunk; a lost chunk costs this much to resend
+TRANSFER_CONTENT_TYPE = "application/vnd.bobb.transfer-chunks"
+MAX_TRANSFERS = 64  # file versions whose manifests are kept
+
+# Request Scheduler
+SCHEDULER_MAX_CONCURRENCY = 16
+SCHEDULER_MAX_QUEUE = 256
+SCHEDULER_QUEUE_TIMEOUT = 10  # seconds
+SCHEDULER_WEIGHTS = (1, 2, 4, 8)  # per priority class, lowest priority first
+SCHEDULER_EXEMPT_PATHS = frozenset(("/metrics", "/metrics/profiler", "/v1/scheduler"))  # monitoring stays up under overload
+
+# Replay Suppression
+REPLAY_WINDOW_SIZE = 1024  # sequence numbers tracked per source
+REPLAY_MAX_SOURCES = 8192
+REPLAY_EXPIRY = 300  # seconds a quiet source or a cached response is kept
+REPLAY_CACHED_RESPONSES = 1024
+REPLAY_MAX_CACHED_BODY = 64 * 1024  # bytes
@@ -1,9 +1,111 @@
-from flask import request
-from utils.headers import BobbHeaders
-from utils.optional_headers import BobbOptionalHeaders
+import base64
+import itertools
+import mimetypes
+import os
+import time
 
-def capture_image():
-    body_data = request.get_json()
+from flask import Response, send_file
 
-    # Check if this satellite is the satellite that can take images and should take the image
+from config.constants import IMAGE_FILE_PATH, SATELLITE_FUNCTION_DISASTER_IMAGING
+from controllers.encrypted_image import encrypted_image_response, wants_encrypted_image
+from helpers.image_cache import image_cache, iter_buffer
+from helpers.metrics import current_route, metrics
+from helpers.satellite_registry import get_registry
 
+# A multiple of 3 so each chunk base64 encodes without padding and the
+# encoded chunks can simply be concatenated
+BASE64_READ_SIZE = 3 * 64 * 1024
+
+# The JSON body around the base64 encoded image
+IMAGE_JSON_PREFIX = b'{"image":"'
+IMAGE_JSON_SUFFIX = b'","status":"success","status_code":200}\n'
+
+
+def find_imaging_satellite(ip):
+    """
+    Looks up the satellite and checks it can take images.
+    Returns (satellite, None) on success, otherwise (None, error response).
+    """
+    satellite = get_registry().get(ip)
+    if satellite is None:
+        return None, ({"error": "Satellite not found"}, 404)
+
+    if satellite["function"] != SATELLITE_FUNCTION_DISASTER_IMAGING:
+        return None, ({"error": "Satellite can not take images", "status": "failure", "status_code": 400}, 400)
+
+    return satellite, None
+
+
+def iter_base64_json(image_file, read_size=BASE64_READ_SIZE, route=None):
+    """
+    Streams {"image": <base64>, "status": "success", "status_code": 200} while
+    reading the image, so only one chunk is held in memory at a time. With a
+    route, the time spent encoding is recorded as its "base64" stage.
+    """
+    encoding_time = 0.0
+    yield IMAGE_JSON_PREFIX
+    while True:
+        chunk = image_file.read(read_size)
+        if not chunk:
+            break
+        started = time.perf_counter()
+        encoded_chunk = base64.b64encode(chunk)
+        encoding_time += time.perf_counter() - started
+        yield encoded_chunk
+    yield IMAGE_JSON_SUFFIX
+    if route is not None:
+        metrics.observe_stage("base64", encoding_time, route)
+
+
+def cached_image_response(image):
+    """The JSON body around an image from the image cache, sent without re-encoding it."""
+    encoded = image.encoded
+    if isinstance(encoded, bytes):
+        # The cached bytes object itself is written to the socket, nothing is copied
+        body = (IMAGE_JSON_PREFIX, encoded, IMAGE_JSON_SUFFIX)
+    else:
+        body = itertools.chain((IMAGE_JSON_PREFIX,), iter_buffer(encoded), (IMAGE_JSON_SUFFIX,))
+    response = Response(body, mimetype="application/json")
+    response.content_length = len(IMAGE_JSON_PREFIX) + len(encoded) + len(IMAGE_JSON_SUFFIX)
+    return response
+
+
+def capture_image(ip):
+    """
+    Returns the image base64 encoded in JSON. The encoding is cached until the
+    file changes; an image too large for the cache is streamed in bounded chunks.
+    With an X-Bobb-Public-Key header the image is streamed encrypted instead.
+    """
+    satellite, error_response = find_imaging_satellite(ip)
+    if error_response is not None:
+        return error_response
+
+    if wants_encrypted_image():
+        return encrypted_image_response(IMAGE_FILE_PATH)
+
+    image = image_cache.get(IMAGE_FILE_PATH)
+    if image is not None:
+        return cached_image_response(image)
+
+    image_file = open(IMAGE_FILE_PATH, "rb")
+    # The body is produced after the request context is gone, so pass the route along
+    response = Response(iter_base64_json(image_file, route=current_route()), mimetype="application/json")
+    response.call_on_close(image_file.close)
+    return response
+
+
+def download_image(ip):
+    """
+    Returns the raw image bytes. Supports Range requests and lets the WSGI
+    server use sendfile through wsgi.file_wrapper when it provides one. With an
+    X-Bobb-Public-Key header the image is streamed encrypted instead.
+    """
+    satellite, error_response = find_imaging_satellite(ip)
+    if error_response is not None:
+        return error_response
+
+    if wants_encrypted_image():
+        return encrypted_image_response(IMAGE_FILE_PATH)
+
+    mimetype = mimetypes.guess_type(IMAGE_FILE_PATH)[0] or "application/octet-stream"
+    return send_file(os.path.abspath(IMAGE_FILE_PATH), mimetype=mimetype, conditional=True)
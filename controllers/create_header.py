@@ -1,55 +1,84 @@
-from flask import jsonify, request
-from utils.headers import BobbHeaders
-from utils.optional_headers import BobbOptionalHeaders
+import json
+import struct
+
+from flask import Response, jsonify, request
+
+from config.constants import ERROR_INVALID_BOBB_HEADER, ERROR_INVALID_HEADER_BATCH, MAX_HEADER_BATCH
+from helpers.response_helper import dumps, error_response
+from utils.headers import BobbHeaders, HEADER_SIZE, build_many
+from utils.optional_headers import BobbOptionalHeaders, OPTIONAL_HEADER_SIZE, build_many_optional
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Header specs validated and packed together per pass of the batch endpoint
+HEADER_BATCH_CHUNK = 1024
+
+# Stands in for an NDJSON line that is not valid JSON
+_INVALID_JSON = object()
+
+
+def headers_from_spec(body_data):
+    """
+    Builds (BobbHeaders, BobbOptionalHeaders) from a header spec with
+    "necessary_header" and "optional_header" objects. Raises KeyError for a
+    missing field.
+    """
+    # Extract necessary header fields
+    necessary_header = body_data["necessary_header"]
+    version_major = necessary_header["version_major"]
+    version_minor = necessary_header["version_minor"]
+    message_type = necessary_header["message_type"]
+    dest_ipv6 = necessary_header["dest_ipv6"]
+    dest_port = necessary_header["dest_port"]
+    source_ipv6 = necessary_header["source_ipv6"]
+    source_port = necessary_header["source_port"]
+    sequence_number = necessary_header["sequence_number"]
+    timestamp = necessary_header["timestamp"]
+
+    bobb_header = BobbHeaders(
+        version_major=version_major,
+        version_minor=version_minor,
+        message_type=message_type,
+        dest_ipv6=dest_ipv6,
+        dest_port=dest_port,
+        source_ipv6=source_ipv6,
+        source_port=source_port,
+        sequence_number=sequence_number,
+        timestamp=timestamp
+    )
+
+    optional_header = body_data["optional_header"]
+    hop_count = optional_header["hop_count"]
+    priority = optional_header["priority"]
+    encryption_algo = optional_header["encryption_algo"]
+
+    optional_header_obj = BobbOptionalHeaders(
+        timestamp=timestamp,
+        hop_count=hop_count,
+        priority=priority,
+        encryption_algo=encryption_algo
+    )
+    return bobb_header, optional_header_obj
 
 
 def create_header():
     body_data = request.get_json()
 
     try:
-        # Extract necessary header fields
-        necessary_header = body_data["necessary_header"]
-        version_major = necessary_header["version_major"]
-        version_minor = necessary_header["version_minor"]
-        message_type = necessary_header["message_type"]
-        dest_ipv6 = necessary_header["dest_ipv6"]
-        dest_port = necessary_header["dest_port"]
-        source_ipv6 = necessary_header["source_ipv6"]
-        source_port = necessary_header["source_port"]
-        sequence_number = necessary_header["sequence_number"]
-        timestamp = necessary_header["timestamp"]
-
-        bobb_header = BobbHeaders(
-            version_major=version_major,
-            version_minor=version_minor,
-            message_type=message_type,
-            dest_ipv6=dest_ipv6,
-            dest_port=dest_port,
-            source_ipv6=source_ipv6,
-            source_port=source_port,
-            sequence_number=sequence_number,
-            timestamp=timestamp
-        )
-        x_bobb_header = bobb_header.build_header().hex()
-
-        optional_header = body_data["optional_header"]
-        hop_count = optional_header["hop_count"]
-        priority = optional_header["priority"]
-        encryption_algo = optional_header["encryption_algo"]
-
-        optional_header_obj = BobbOptionalHeaders(
-            timestamp=timestamp,
-            hop_count=hop_count,
-            priority=priority,
-            encryption_algo=encryption_algo
-        )
-        x_bobb_optional_header = optional_header_obj.build_optional_header().hex()
+        bobb_header, optional_header_obj = headers_from_spec(body_data)
+        packed, error = _pack_one((bobb_header.to_record(), optional_header_obj.to_record()))
 
     except KeyError as e:
         return jsonify({
             "status": "error",
             "message": f"Missing required field: {e.args[0]}"
         }), 400
+    except (TypeError, ValueError, AttributeError) as e:
+        packed, error = None, _spec_error(e)
+
+    if error is not None:
+        return error_response(ERROR_INVALID_BOBB_HEADER, 400, error)
+    x_bobb_header, x_bobb_optional_header = packed
 
     return jsonify({
         "status": "success",
@@ -58,4 +87,110 @@ def create_header():
             "X-Bobb-Optional-Header": x_bobb_optional_header
         },
         "status_code": 200
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+def _spec_error(error):
+    if isinstance(error, KeyError):
+        return f"Missing required field: {error.args[0]}"
+    if isinstance(error, struct.error):
+        return f"Field out of range: {error}"
+    return str(error)
+
+
+def _pack_one(records):
+    """Returns ((header hex, optional header hex), None), or (None, error message) if a value does not fit its field."""
+    try:
+        return (build_many([records[0]]).hex(), build_many_optional([records[1]]).hex()), None
+    except struct.error as e:
+        return None, _spec_error(e)
+
+
+def _validate(spec):
+    """Returns (records, None) for a valid spec and (None, error message) otherwise."""
+    if spec is _INVALID_JSON:
+        return None, "Invalid JSON"
+    if not isinstance(spec, dict):
+        return None, "Header spec must be an object"
+    try:
+        bobb_header, optional_header = headers_from_spec(spec)
+        return (bobb_header.to_record(), optional_header.to_record()), None
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return None, _spec_error(e)
+
+
+def _pack_chunk(specs, first_index):
+    """Yields one NDJSON result line per spec, packing every valid spec in one pass."""
+    results = [_validate(spec) for spec in specs]
+    valid = [records for records, error in results if error is None]
+    try:
+        header_hex = build_many(records[0] for records in valid).hex()
+        optional_hex = build_many_optional(records[1] for records in valid).hex()
+    except struct.error:
+        # Some value does not fit its field; pack one by one to tell which
+        header_hex = optional_hex = None
+
+    position = 0
+    for index, (records, error) in enumerate(results, first_index):
+        if error is None:
+            if header_hex is not None:
+                x_bobb_header = header_hex[position * HEADER_SIZE * 2:(position + 1) * HEADER_SIZE * 2]
+                x_bobb_optional_header = optional_hex[position * OPTIONAL_HEADER_SIZE * 2:(position + 1) * OPTIONAL_HEADER_SIZE * 2]
+                position += 1
+            else:
+                packed, error = _pack_one(records)
+                if error is None:
+                    x_bobb_header, x_bobb_optional_header = packed
+        if error is None:
+            line = {"index": index, "X-Bobb-Header": x_bobb_header, "X-Bobb-Optional-Header": x_bobb_optional_header}
+        else:
+            line = {"index": index, "error": error}
+        yield dumps(line) + b"\n"
+
+
+def _iter_ndjson_specs(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Reported against this item's index like any other invalid spec
+            yield _INVALID_JSON
+
+
+def _iter_results(specs):
+    chunk = []
+    index = 0
+    for spec in specs:
+        if index + len(chunk) >= MAX_HEADER_BATCH:
+            yield from _pack_chunk(chunk, index)
+            yield dumps({"index": MAX_HEADER_BATCH, "error": f"Batch is limited to {MAX_HEADER_BATCH} headers"}) + b"\n"
+            return
+        chunk.append(spec)
+        if len(chunk) == HEADER_BATCH_CHUNK:
+            yield from _pack_chunk(chunk, index)
+            index += len(chunk)
+            chunk = []
+    if chunk:
+        yield from _pack_chunk(chunk, index)
+
+
+def create_headers_batch():
+    """
+    Builds many header pairs in one request. The body is either a JSON array of
+    header specs (the same objects /v1/create-header takes) or NDJSON with one
+    spec per line. The response is NDJSON with one line per spec, in order:
+    {"index", "X-Bobb-Header", "X-Bobb-Optional-Header"} or {"index", "error"}.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        specs = _iter_ndjson_specs(request.stream)
+    else:
+        specs = request.get_json(silent=True)
+        if not isinstance(specs, list):
+            return error_response(ERROR_INVALID_HEADER_BATCH, 400, "Expected a JSON array or NDJSON header specs")
+        if len(specs) > MAX_HEADER_BATCH:
+            return error_response(ERROR_INVALID_HEADER_BATCH, 400, f"Batch is limited to {MAX_HEADER_BATCH} headers")
+
+    return Response(_iter_results(specs), mimetype=NDJSON_MIMETYPE)
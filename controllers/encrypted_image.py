@@ -0,0 +1,137 @@
+"""
+Encrypted delivery of satellite images.
+
+The requester sends its X25519 public key in X-Bobb-Public-Key. The image is
+encrypted with the key shared between that key and the node's own key pair
+and streamed as length-prefixed records (see iter_encrypted_records). Chunks
+are read and encrypted on a small thread pool while earlier ones are being
+sent, so the first bytes leave before the whole image has been processed and
+memory does not grow with the image size.
+
+The response carries what the requester needs to decrypt the stream: the
+node's public key in X-Bobb-Public-Key, the image size in X-Bobb-Image-Size
+and the chunk size in X-Bobb-Chunk-Size.
+"""
+import os
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import x25519
+from flask import Response, request
+
+from config.config import get_config
+from config.constants import (
+    ENCRYPTED_CHUNK_SIZE,
+    ENCRYPTED_IMAGE_CONTENT_TYPE,
+    ERROR_INVALID_PUBLIC_KEY,
+    ERROR_NODE_KEY_UNAVAILABLE,
+    STATUS_INTERNAL_SERVER_ERROR,
+    X_BOBB_CHUNK_SIZE,
+    X_BOBB_IMAGE_SIZE,
+    X_BOBB_PUBLIC_KEY
+)
+from helpers.metrics import current_route, metrics
+from helpers.response_helper import error_response
+from utils.crypto_utils import encrypted_stream_size, iter_encrypted_records, read_private_key, shared_key_cache
+
+NODE_KEY_DIR = "keys"
+
+# Raw X25519 public keys are 32 bytes, sent hex encoded
+PUBLIC_KEY_HEX_LENGTH = 64
+
+# (path, file signature, private key, public key hex) of the node key last read
+_node_key = None
+
+
+def node_private_key_path():
+    return os.path.join(NODE_KEY_DIR, f"{get_config()['name']}_private_key.pem")
+
+
+def node_key():
+    """The node's private key and its raw public key in hex, read again only when the key file changes."""
+    global _node_key
+    path = node_private_key_path()
+    stat = os.stat(path)
+    signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    cached = _node_key
+    if cached is None or cached[0] != path or cached[1] != signature:
+        private_key = read_private_key(path)
+        public_key_hex = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        ).hex()
+        cached = _node_key = (path, signature, private_key, public_key_hex)
+    return cached[2], cached[3]
+
+
+def parse_public_key(value) -> x25519.X25519PublicKey:
+    """Parses a hex encoded raw X25519 public key. Raises ValueError for anything else."""
+    if len(value) != PUBLIC_KEY_HEX_LENGTH:
+        raise ValueError(f"Expected {PUBLIC_KEY_HEX_LENGTH} hex characters, got {len(value)}")
+    return x25519.X25519PublicKey.from_public_bytes(bytes.fromhex(value))
+
+
+def wants_encrypted_image():
+    return X_BOBB_PUBLIC_KEY in request.headers
+
+
+def iter_encrypted_image(image_path, key, route=None):
+    """
+    Yields the encrypted record stream of an image. With a route, the time the
+    sender spent waiting for encrypted chunks is recorded as its "encrypt" stage.
+    """
+    waiting = 0.0
+    records = iter_encrypted_records(image_path, key, ENCRYPTED_CHUNK_SIZE)
+    try:
+        while True:
+            started = time.perf_counter()
+            record = next(records, None)
+            waiting += time.perf_counter() - started
+            if record is None:
+                break
+            yield from record
+    finally:
+        # Stops the encryption pool if the client goes away mid-stream
+        records.close()
+    if route is not None:
+        metrics.observe_stage("encrypt", waiting, route)
+
+
+def requester_key():
+    """
+    Derives the key shared with the requester from the X-Bobb-Public-Key header.
+    Returns ((key, node public key hex), None) on success, otherwise (None, error response).
+    """
+    try:
+        peer_public_key = parse_public_key(request.headers.get(X_BOBB_PUBLIC_KEY, ""))
+    except ValueError as e:
+        return None, error_response(ERROR_INVALID_PUBLIC_KEY, 400, str(e))
+
+    with metrics.stage("key_derivation"):
+        try:
+            private_key, public_key_hex = node_key()
+        except (OSError, ValueError):
+            return None, error_response(ERROR_NODE_KEY_UNAVAILABLE, STATUS_INTERNAL_SERVER_ERROR)
+        try:
+            key = shared_key_cache.get(private_key, peer_public_key)
+        except ValueError as e:
+            # Low-order points give an all-zero shared secret, which the exchange refuses
+            return None, error_response(ERROR_INVALID_PUBLIC_KEY, 400, str(e))
+        return (key, public_key_hex), None
+
+
+def encrypted_image_response(image_path):
+    """Streams the image encrypted for the public key in the X-Bobb-Public-Key request header."""
+    keys, key_error = requester_key()
+    if key_error is not None:
+        return key_error
+    key, public_key_hex = keys
+
+    image_size = os.path.getsize(image_path)
+    # The body is produced after the request context is gone, so pass the route along
+    response = Response(iter_encrypted_image(image_path, key, current_route()), mimetype=ENCRYPTED_IMAGE_CONTENT_TYPE)
+    response.content_length = encrypted_stream_size(image_size, ENCRYPTED_CHUNK_SIZE)
+    response.headers[X_BOBB_PUBLIC_KEY] = public_key_hex
+    response.headers[X_BOBB_IMAGE_SIZE] = str(image_size)
+    response.headers[X_BOBB_CHUNK_SIZE] = str(ENCRYPTED_CHUNK_SIZE)
+    return response
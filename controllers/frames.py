@@ -0,0 +1,117 @@
+import json
+import os
+import time
+from typing import BinaryIO, NamedTuple, Optional
+
+from flask import Response, request
+
+from config.constants import (
+    DEFAULT_ENCRYPTION_ALGO,
+    DEFAULT_HOP_COUNT,
+    ERROR_INVALID_FRAME,
+    FRAME_CONTENT_TYPE,
+    IMAGE_FILE_PATH,
+    MESSAGE_TYPE_CAPTURE_IMAGE,
+    MESSAGE_TYPE_ERROR,
+    MESSAGE_TYPE_RESPONSE
+)
+from controllers.capture_image import find_imaging_satellite
+from helpers.image_cache import Buffer, image_cache, iter_buffer
+from helpers.response_helper import error_response
+from utils.frames import Frame, decode_frame, encode_frame_prefix
+from utils.headers import BobbHeaderRecord
+from utils.optional_headers import BobbOptionalHeaderRecord
+
+# Bytes read from the image per chunk when a reply is streamed
+REPLY_READ_SIZE = 256 * 1024
+
+
+class FrameReply(NamedTuple):
+    """A reply frame: prefix and in-memory payload, then optionally file_size bytes of file."""
+    prefix: bytearray
+    payload: Buffer
+    file: Optional[BinaryIO]
+    file_size: int
+
+    def __len__(self):
+        return len(self.prefix) + len(self.payload) + self.file_size
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def _reply_prefix(frame: Frame, message_type: int, payload_length: int) -> bytearray:
+    # Replies go back to the sender and echo its sequence number
+    request = frame.header
+    header = BobbHeaderRecord(
+        1, 0, message_type,
+        request.source_ip, request.source_port,
+        request.dest_ip, request.dest_port,
+        request.sequence_number, int(time.time())
+    )
+    optional_header = BobbOptionalHeaderRecord(
+        int(time.time()), DEFAULT_HOP_COUNT, frame.optional_header.priority,
+        DEFAULT_ENCRYPTION_ALGO.encode()
+    )
+    return encode_frame_prefix(header, optional_header, payload_length)
+
+
+def error_reply(frame: Frame, error: dict) -> FrameReply:
+    payload = json.dumps(error).encode()
+    return FrameReply(_reply_prefix(frame, MESSAGE_TYPE_ERROR, len(payload)), payload, None, 0)
+
+
+def handle_frame(frame: Frame, from_cache=False) -> FrameReply:
+    """
+    Answers a request frame. MESSAGE_TYPE_CAPTURE_IMAGE asks the satellite in
+    dest_ipv6 for its image, which comes back as the raw payload of a
+    MESSAGE_TYPE_RESPONSE frame. Failures come back as MESSAGE_TYPE_ERROR frames
+    with a JSON payload. With from_cache the image comes from the image cache
+    rather than as a file, for transports that cannot sendfile.
+    """
+    if frame.header.message_type != MESSAGE_TYPE_CAPTURE_IMAGE:
+        return error_reply(frame, {"error": f"Unsupported message type {frame.header.message_type}"})
+
+    satellite, error_response = find_imaging_satellite(frame.header.dest_ipv6)
+    if error_response is not None:
+        return error_reply(frame, error_response[0])
+
+    try:
+        if from_cache:
+            image = image_cache.get(IMAGE_FILE_PATH)
+            if image is not None:
+                return FrameReply(_reply_prefix(frame, MESSAGE_TYPE_RESPONSE, len(image.raw)), image.raw, None, 0)
+        image_file = open(IMAGE_FILE_PATH, "rb")
+    except OSError:
+        return error_reply(frame, {"error": "Image not available"})
+    file_size = os.fstat(image_file.fileno()).st_size
+    return FrameReply(_reply_prefix(frame, MESSAGE_TYPE_RESPONSE, file_size), b"", image_file, file_size)
+
+
+def iter_reply(reply: FrameReply, read_size=REPLY_READ_SIZE):
+    """Yields a reply frame piece by piece, reading the file part in bounded chunks."""
+    yield bytes(reply.prefix)
+    if reply.payload:
+        yield from iter_buffer(reply.payload)
+    remaining = reply.file_size
+    while remaining > 0:
+        chunk = reply.file.read(min(read_size, remaining))
+        if not chunk:
+            raise IOError("File shrank while it was being sent")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def frame_request():
+    """HTTP transport for frames: the request body is one frame and so is the response body."""
+    try:
+        frame = decode_frame(request.get_data())
+    except ValueError as e:
+        return error_response(ERROR_INVALID_FRAME, 400, str(e))
+
+    reply = handle_frame(frame, from_cache=True)
+    response = Response(iter_reply(reply), mimetype=FRAME_CONTENT_TYPE)
+    response.content_length = len(reply)
+    response.call_on_close(reply.close)
+    return response
@@ -0,0 +1,41 @@
+from flask import Response, request
+
+from config.constants import ERROR_FORBIDDEN, STATUS_FORBIDDEN
+from helpers.metrics import PROMETHEUS_CONTENT_TYPE, metrics, profiler
+from helpers.response_helper import create_response, error_response
+
+# Only the node itself may change the profiler settings
+PROFILER_ALLOWED_ADDRESSES = frozenset(("127.0.0.1", "::1"))
+
+
+def metrics_endpoint():
+    """All metrics in the Prometheus text exposition format."""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def profiler_report():
+    """Aggregated cProfile output of the sampled requests, most expensive first."""
+    limit = request.args.get("limit", default=30, type=int)
+    sort = request.args.get("sort", default="cumulative")
+    if sort not in ("cumulative", "tottime", "calls"):
+        return error_response("Invalid sort", 400)
+    return Response(profiler.report(limit, sort), mimetype="text/plain")
+
+
+def configure_profiler():
+    """
+    Sets the fraction of requests that are profiled from {"sample_rate": 0.01}.
+    0 turns the profiler off; {"reset": true} drops the collected profile.
+    """
+    if request.remote_addr not in PROFILER_ALLOWED_ADDRESSES:
+        return error_response(ERROR_FORBIDDEN, STATUS_FORBIDDEN)
+
+    body = request.get_json(silent=True) or {}
+    if "sample_rate" in body:
+        sample_rate = body["sample_rate"]
+        if not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+            return error_response("sample_rate must be between 0 and 1", 400)
+        profiler.sample_rate = float(sample_rate)
+    if body.get("reset"):
+        profiler.reset()
+    return create_response({"sample_rate": profiler.sample_rate, "sampled": profiler.sampled}, 200)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
+
+from config.constants import FRAME_SERVER_PORT
+from controllers.frames import error_reply
+from helpers.satellite_registry import get_registry, normalize_ip
+from utils.frames import LENGTH_SIZE, LENGTH_STRUCT, encode_frame_prefix
+
+# Idle connections kept open per next hop
+MAX_IDLE_CONNECTIONS = 8
+
+# Bytes copied at a time when a reply is passed back to the client
+RELAY_COPY_SIZE = 256 * 1024
+
+Address = Tuple[str, int]
+
+
+def parse_address(address: str) -> Address:
+    """Parses "host:port" or "[ipv6]:port"."""
+    host, _, port = address.rpartition(":")
+    return host.strip("[]"), int(port)
+
+
+class RoutingTable:
+    """
+    Maps a destination IPv6 address to the (host, port) of the next hop.
+
+    Every satellite in the registry is reachable directly on its own address by
+    default. routes overrides single destinations ("ip" -> "host:port") and
+    default_route catches everything else, which is how multi-hop paths and
+    local simulations are described.
+    """
+
+    def __init__(self, satellites=None, routes: Optional[Dict[str, str]] = None,
+                 default_route: Optional[str] = None, port: int = FRAME_SERVER_PORT):
+        self._routes: Dict[bytes, Address] = {}
+        for satellite in satellites if satellites is not None else get_registry():
+            self._routes[normalize_ip(satellite["ip"])] = (satellite["ip"], port)
+        for destination, address in (routes or {}).items():
+            packed_ip = normalize_ip(destination)
+            if packed_ip is None:
+                raise ValueError(f"Invalid route destination: {destination}")
+            self._routes[packed_ip] = parse_address(address)
+        self._default_route = parse_address(default_route) if default_route else None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "RoutingTable":
+        """Loads {"routes": {ip: "host:port"}, "default": "host:port"} from JSON."""
+        with open(path, "r") as routes_file:
+            config = json.load(routes_file)
+        return cls(routes=config.get("routes"), default_route=config.get("default"), **kwargs)
+
+    def next_hop(self, dest_ip: bytes) -> Optional[Address]:
+        return self._routes.get(dest_ip, self._default_route)
+
+
+class ConnectionPool:
+    """Persistent connections to next hops, reused across relayed frames."""
+
+    def __init__(self, max_idle=MAX_IDLE_CONNECTIONS):
+        self._idle = defaultdict(deque)
+        self._max_idle = max_idle
+
+    async def acquire(self, address: Address):
+        """Returns (reader, writer, reused)."""
+        idle = self._idle[address]
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(*address)
+        return reader, writer, False
+
+    def release(self, address: Address, reader, writer):
+        idle = self._idle[address]
+        if len(idle) < self._max_idle and not writer.is_closing():
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def idle_count(self, address: Optional[Address] = None) -> int:
+        """Idle connections kept for one next hop, or for all of them."""
+        if address is not None:
+            return len(self._idle.get(address, ()))
+        return sum(len(idle) for idle in self._idle.values())
+
+    def close(self):
+        for idle in self._idle.values():
+            while idle:
+                idle.pop()[1].close()
+
+
+class Relay:
+    """
+    Forwards frames that are not addressed to this node.
+
+    A forwarded frame has its hop_count decremented. A frame whose hop_count
+    would reach zero is dropped and the sender gets an error frame, so the
+    request/reply order on its connection is kept. The reply from the next
+    hop is streamed back to the sender without being buffered whole.
+    """
+
+    def __init__(self, local_ipv6: str, routing_table: RoutingTable, pool: Optional[ConnectionPool] = None):
+        self.local_ip = normalize_ip(local_ipv6)
+        if self.local_ip is None:
+            raise ValueError(f"Invalid local IPv6 address: {local_ipv6}")
+        self.routing_table = routing_table
+        self.pool = pool or ConnectionPool()
+        self.stats = {"forwarded": 0, "dropped": 0, "unroutable": 0, "failed": 0}
+
+    def is_local(self, frame) -> bool:
+        return frame.header.dest_ip == self.local_ip
+
+    async def forward(self, frame, client_writer):
+        """Relays frame to its next hop and writes the reply to client_writer."""
+        if frame.optional_header.hop_count <= 1:
+            self.stats["dropped"] += 1
+            await self._reply_error(frame, client_writer, "Hop limit exceeded")
+            return
+
+        next_hop = self.routing_table.next_hop(frame.header.dest_ip)
+        if next_hop is None:
+            self.stats["unroutable"] += 1
+            await self._reply_error(frame, client_writer, "No route to destination")
+            return
+
+        optional_header = frame.optional_header._replace(hop_count=frame.optional_header.hop_count - 1)
+        prefix = encode_frame_prefix(frame.header, optional_header, len(frame.payload))
+
+        # A pooled connection may have been closed by the peer, so retry once on a fresh one
+        for attempt in range(2):
+            writer, reused = None, False
+            try:
+                # A refused connection or a failed name lookup raises OSError here
+                reader, writer, reused = await self.pool.acquire(next_hop)
+                writer.write(prefix)
+                writer.write(frame.payload)
+                await writer.drain()
+                length_prefix = await reader.readexactly(LENGTH_SIZE)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                if writer is not None:
+                    writer.close()
+                if reused and attempt == 0:
+                    continue
+                self.stats["failed"] += 1
+                await self._reply_error(frame, client_writer, "Next hop unreachable")
+                return
+            break
+
+        try:
+            client_writer.write(length_prefix)
+            (remaining,) = LENGTH_STRUCT.unpack(length_prefix)
+            while remaining > 0:
+                chunk = await reader.read(min(RELAY_COPY_SIZE, remaining))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(chunk)
+                client_writer.write(chunk)
+                await client_writer.drain()
+        except BaseException:
+            # The reply was cut short; neither connection can be reused
+            writer.close()
+            raise
+        self.pool.release(next_hop, reader, writer)
+        self.stats["forwarded"] += 1
+
+    async def _reply_error(self, frame, client_writer, message):
+        reply = error_reply(frame, {"error": message})
+        client_writer.write(reply.prefix)
+        client_writer.write(reply.payload)
+        await client_writer.drain()
@@ -0,0 +1,144 @@
+"""
+Resumable image transfers.
+
+POST /v1/satellites/<ip>/transfers returns the manifest of the satellite's
+image: transfer id, size, chunk size and a digest per chunk. GET
+/v1/transfers/<id>/chunks?ranges=0-9,15 streams the requested chunks (all of
+them without ranges) encrypted for the requester's X-Bobb-Public-Key, in the
+record format of utils/crypto_utils/transfer.py. A receiver whose connection
+dropped asks again for the ranges it is still missing.
+
+Transfer ids are derived from the file contents, so an id this process has
+not seen yet (after a restart, or on another prefork worker) is matched by
+building the manifests of the offered files again.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+from config.constants import (
+    ERROR_INVALID_CHUNK_RANGES,
+    ERROR_TRANSFER_EXPIRED,
+    ERROR_UNKNOWN_TRANSFER,
+    IMAGE_FILE_PATH,
+    MAX_TRANSFERS,
+    STATUS_GONE,
+    STATUS_NOT_FOUND,
+    TRANSFER_CHUNK_SIZE,
+    TRANSFER_CONTENT_TYPE,
+    X_BOBB_PUBLIC_KEY
+)
+from controllers.capture_image import find_imaging_satellite
+from controllers.encrypted_image import requester_key
+from helpers.response_helper import create_response, error_response
+from utils.crypto_utils.transfer import build_manifest, iter_transfer_records, parse_ranges, transfer_records_size
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class TransferRegistry:
+    """Manifests of the files offered for transfer, built once per file version."""
+
+    def __init__(self, offered_paths=(IMAGE_FILE_PATH,), max_transfers=MAX_TRANSFERS, chunk_size=TRANSFER_CHUNK_SIZE):
+        self.offered_paths = tuple(offered_paths)
+        self.max_transfers = max_transfers
+        self.chunk_size = chunk_size
+        self._by_file = OrderedDict()  # (path, mtime_ns, size) -> manifest
+        self._by_id = {}  # transfer id -> (path, mtime_ns, size)
+        self._lock = threading.Lock()
+
+    def manifest_for(self, path):
+        file_key = _file_key(path)
+        with self._lock:
+            manifest = self._by_file.get(file_key)
+            if manifest is not None:
+                self._by_file.move_to_end(file_key)
+                return manifest
+
+        manifest = build_manifest(path, self.chunk_size)
+        with self._lock:
+            self._by_file[file_key] = manifest
+            self._by_id[manifest.transfer_id] = file_key
+            while len(self._by_file) > self.max_transfers:
+                _, evicted = self._by_file.popitem(last=False)
+                if self._by_id.get(evicted.transfer_id) not in self._by_file:
+                    self._by_id.pop(evicted.transfer_id, None)
+        return manifest
+
+    def _known(self, transfer_id):
+        with self._lock:
+            file_key = self._by_id.get(transfer_id)
+            if file_key is None:
+                return None
+            return file_key, self._by_file[file_key]
+
+    def lookup(self, transfer_id):
+        """
+        Returns ((path, mtime_ns, size), manifest) for a transfer of one of the
+        offered files, otherwise None.
+        """
+        known = self._known(transfer_id)
+        if known is not None:
+            return known
+        for path in self.offered_paths:
+            try:
+                # Only reads the file if this version has no manifest yet
+                self.manifest_for(path)
+            except OSError:
+                continue
+        return self._known(transfer_id)
+
+
+transfers = TransferRegistry()
+
+
+def create_transfer(ip):
+    """Returns the manifest of the satellite's image."""
+    satellite, error = find_imaging_satellite(ip)
+    if error is not None:
+        return error
+    return create_response(transfers.manifest_for(IMAGE_FILE_PATH).to_dict(), 200)
+
+
+def transfer_chunks(transfer_id):
+    """Streams the chunks in the ranges query parameter, encrypted for the requester."""
+    known = transfers.lookup(transfer_id)
+    if known is None:
+        return error_response(ERROR_UNKNOWN_TRANSFER, STATUS_NOT_FOUND)
+    file_key, manifest = known
+    try:
+        if _file_key(file_key[0]) != file_key:
+            return error_response(ERROR_TRANSFER_EXPIRED, STATUS_GONE)
+    except OSError:
+        return error_response(ERROR_TRANSFER_EXPIRED, STATUS_GONE)
+
+    ranges = request.args.get("ranges")
+    try:
+        chunk_ids = parse_ranges(ranges, manifest.chunk_count) if ranges else list(range(manifest.chunk_count))
+    except ValueError as e:
+        return error_response(ERROR_INVALID_CHUNK_RANGES, 400, str(e))
+
+    keys, key_error = requester_key()
+    if key_error is not None:
+        return key_error
+    key, public_key_hex = keys
+
+    response = Response(iter_records(file_key[0], key, manifest, chunk_ids), mimetype=TRANSFER_CONTENT_TYPE)
+    response.content_length = transfer_records_size(manifest, chunk_ids)
+    response.headers[X_BOBB_PUBLIC_KEY] = public_key_hex
+    return response
+
+
+def iter_records(path, key, manifest, chunk_ids):
+    records = iter_transfer_records(path, key, manifest, chunk_ids)
+    try:
+        for record in records:
+            yield from record
+    finally:
+        # Stops the encryption pool if the receiver goes away mid-stream
+        records.close()
@@ -0,0 +1,84 @@
+"""
+Raw TCP transport for binary Bobb frames.
+
+Each frame is [length][47-byte BobbHeaders][22-byte BobbOptionalHeaders][payload],
+the same layout POST /v1/frames accepts over HTTP. A connection carries any
+number of request frames, each answered by one reply frame in order. Image
+payloads are sent with loop.sendfile, which uses os.sendfile where available.
+
+With --local-ipv6 the node also relays: frames whose dest_ipv6 is another
+satellite are forwarded to the next hop from the routing table (see
+controllers/relay.py) and the reply is passed back on the same connection.
+
+    python frame_server.py --port 30002
+    python frame_server.py --local-ipv6 2001:0:130f::9c0:876a:130b --routes routes.json
+"""
+import argparse
+import asyncio
+from functools import partial
+
+from config.constants import FRAME_SERVER_PORT
+from controllers.frames import handle_frame
+from controllers.relay import Relay, RoutingTable
+from utils.frames import read_frame
+
+
+async def handle_connection(reader, writer, relay=None):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                frame = await read_frame(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                # The stream cannot be resynchronised after a bad frame
+                break
+            if frame is None:
+                break
+
+            if relay is not None and not relay.is_local(frame):
+                await relay.forward(frame, writer)
+                continue
+
+            # Opening the image is blocking file work
+            reply = await loop.run_in_executor(None, handle_frame, frame)
+            try:
+                writer.write(reply.prefix)
+                if reply.payload:
+                    writer.write(reply.payload)
+                if reply.file is not None:
+                    await loop.sendfile(writer.transport, reply.file, 0, reply.file_size)
+                await writer.drain()
+            finally:
+                reply.close()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        # The client went away, or a relayed reply was cut short by the next hop
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_frames(host="::", port=FRAME_SERVER_PORT, relay=None, ready=None):
+    server = await asyncio.start_server(partial(handle_connection, relay=relay), host, port)
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if relay is not None:
+            relay.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Bobb frames over TCP")
+    parser.add_argument("--host", default="::")
+    parser.add_argument("--port", type=int, default=FRAME_SERVER_PORT)
+    parser.add_argument("--local-ipv6", help="address of this satellite; enables relaying frames for other destinations")
+    parser.add_argument("--routes", help="JSON file with next hop overrides: {\"routes\": {ip: \"host:port\"}, \"default\": \"host:port\"}")
+    args = parser.parse_args()
+
+    relay = None
+    if args.local_ipv6:
+        routing_table = RoutingTable.from_file(args.routes) if args.routes else RoutingTable()
+        relay = Relay(args.local_ipv6, routing_table)
+    asyncio.run(serve_frames(args.host, args.port, relay))
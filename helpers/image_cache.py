@@ -0,0 +1,219 @@
+"""
+Cache of images read from disk, keyed by file identity (path, mtime, size) so
+a changed file is picked up by the next request. Each entry holds the raw
+bytes and their base64 encoding. Once the entries take more than max_bytes,
+the least recently used ones are evicted.
+
+With a spill directory, each entry is written there once and memory-mapped.
+Its bytes then live in the page cache instead of the heap, and every worker
+of server.py maps the same file instead of encoding the image itself.
+"""
+import base64
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Union
+
+from config.constants import IMAGE_CACHE_MAX_BYTES
+from helpers.metrics import metrics
+
+# Spill file layout: raw length, encoded length, raw bytes, encoded bytes
+SPILL_HEADER = struct.Struct("!QQ")
+SPILL_SUFFIX = ".bobbimg"
+
+# WSGI servers only take bytes, so mapped entries are sent in chunks of this size
+MAPPED_SEND_SIZE = 256 * 1024
+
+Buffer = Union[bytes, memoryview]
+
+
+class CachedImage(NamedTuple):
+    """Raw and base64 encoded image. bytes when held in memory, memoryviews when mapped."""
+    raw: Buffer
+    encoded: Buffer
+
+    @property
+    def size(self):
+        return len(self.raw) + len(self.encoded)
+
+
+def encoded_size(size):
+    return (size + 2) // 3 * 4
+
+
+def iter_buffer(buffer, chunk_size=MAPPED_SEND_SIZE):
+    """Yields bytes for a cached buffer: the object itself when it is bytes, copies of chunks when mapped."""
+    if isinstance(buffer, bytes):
+        yield buffer
+        return
+    for start in range(0, len(buffer), chunk_size):
+        yield bytes(buffer[start:start + chunk_size])
+
+
+class ImageCache:
+    def __init__(self, max_bytes=IMAGE_CACHE_MAX_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()  # (path, mtime_ns, size) -> CachedImage
+        self._keys_by_path = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spill_loads = 0
+
+    def get(self, path) -> Optional[CachedImage]:
+        """
+        Returns the cached image for the current version of the file at path,
+        loading it on a miss. Returns None if the image does not fit the budget
+        or changed while it was read. Raises OSError if it cannot be read.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        if stat.st_size + encoded_size(stat.st_size) > self.max_bytes:
+            return None
+        image = self._load(key)
+        if image is not None:
+            self._store(key, image)
+        return image
+
+    def _load(self, key):
+        path, _, size = key
+        if self.spill_dir is not None:
+            image = self._map(self._spill_path(key))
+            if image is not None:
+                with self._lock:
+                    self.spill_loads += 1
+                return image
+
+        with open(path, "rb") as image_file:
+            raw = image_file.read()
+        if len(raw) != size:
+            # Replaced while it was read; the caller reads the file directly
+            return None
+        started = time.perf_counter()
+        encoded = base64.b64encode(raw)
+        metrics.observe_stage("base64", time.perf_counter() - started)
+
+        if self.spill_dir is not None:
+            image = self._spill(key, raw, encoded)
+            if image is not None:
+                return image
+        return CachedImage(raw, encoded)
+
+    def _spill_path(self, key):
+        path, mtime_ns, size = key
+        path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.spill_dir, f"{path_hash}-{mtime_ns}-{size}{SPILL_SUFFIX}")
+
+    def _spill(self, key, raw, encoded):
+        """Writes the entry to the spill directory and maps it, dropping older versions of the file."""
+        spill_path = self._spill_path(key)
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as spill_file:
+                    spill_file.write(SPILL_HEADER.pack(len(raw), len(encoded)))
+                    spill_file.write(raw)
+                    spill_file.write(encoded)
+                # Other workers only ever see complete files
+                os.replace(tmp_path, spill_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            return None
+
+        prefix = os.path.basename(spill_path).split("-", 1)[0] + "-"
+        for name in os.listdir(self.spill_dir):
+            if name.startswith(prefix) and name.endswith(SPILL_SUFFIX) and name != os.path.basename(spill_path):
+                try:
+                    os.unlink(os.path.join(self.spill_dir, name))
+                except OSError:
+                    pass
+        return self._map(spill_path)
+
+    def _map(self, spill_path):
+        try:
+            with open(spill_path, "rb") as spill_file:
+                file_size = os.fstat(spill_file.fileno()).st_size
+                if file_size < SPILL_HEADER.size:
+                    return None
+                # The mapping stays valid after the file is closed, and is unmapped
+                # once the last view of an evicted entry is gone
+                view = memoryview(mmap.mmap(spill_file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError):
+            return None
+        raw_length, encoded_length = SPILL_HEADER.unpack_from(view)
+        if SPILL_HEADER.size + raw_length + encoded_length != file_size:
+            return None
+        raw_end = SPILL_HEADER.size + raw_length
+        return CachedImage(view[SPILL_HEADER.size:raw_end], view[raw_end:])
+
+    def _store(self, key, image):
+        with self._lock:
+            if key in self._entries:
+                return
+            # An older version of the same file is stale now
+            stale_key = self._keys_by_path.get(key[0])
+            if stale_key is not None:
+                self._bytes -= self._entries.pop(stale_key).size
+            self._entries[key] = image
+            self._keys_by_path[key[0]] = key
+            self._bytes += image.size
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                del self._keys_by_path[evicted_key[0]]
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "spill_loads": self.spill_loads,
+            }
+
+    def prometheus_samples(self):
+        """Image cache metrics in the collector format of helpers.metrics."""
+        stats = self.stats()
+        return [
+            ("bobb_image_cache_entries", "gauge", "Images held in the cache.", [({}, stats["entries"])]),
+            ("bobb_image_cache_bytes", "gauge", "Bytes of raw and encoded images held.", [({}, stats["bytes"])]),
+            ("bobb_image_cache_hits_total", "counter", "Lookups answered from the cache.", [({}, stats["hits"])]),
+            ("bobb_image_cache_misses_total", "counter", "Lookups that had to load the image.", [({}, stats["misses"])]),
+            ("bobb_image_cache_hit_ratio", "gauge", "Fraction of lookups answered from the cache.", [({}, stats["hit_rate"])]),
+            ("bobb_image_cache_evictions_total", "counter", "Images evicted to stay within the budget.", [({}, stats["evictions"])]),
+            ("bobb_image_cache_spill_loads_total", "counter", "Misses answered by mapping a spill file.", [({}, stats["spill_loads"])]),
+        ]
+
+
+image_cache = ImageCache()
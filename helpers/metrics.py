@@ -0,0 +1,284 @@
+"""
+Request instrumentation exposed in Prometheus text format on /metrics.
+
+Two histograms are kept:
+    bobb_request_duration_seconds{method, route, status}
+        whole request, from the WSGI call until the body has been sent
+    bobb_stage_duration_seconds{route, stage}
+        parts of a request: header parsing, replay check, scheduler wait,
+        handler, response header stamping, base64 encoding, ...
+
+Recording a value is a bisect and a few additions under a per-histogram lock,
+cheap enough to leave on. A cProfile based sampler can additionally profile a
+fraction of requests; it is off until a sample rate is set at runtime.
+"""
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from werkzeug.wsgi import ClosingIterator
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# environ key the Flask hooks use to hand the matched route to the WSGI middleware
+ROUTE_ENVIRON_KEY = "bobb.route"
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    if extra:
+        labels = f"{labels},{extra}" if labels else extra
+    return "{" + labels + "}" if labels else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class HistogramFamily:
+    """Histograms of one metric, one per combination of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        histogram = self._histograms.get(values)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(values, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, value, *label_values):
+        self.labels(*label_values).observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for values, histogram in histograms:
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.request_duration = HistogramFamily(
+            "bobb_request_duration_seconds", "Time from receiving a request until its body was sent.",
+            ("method", "route", "status")
+        )
+        self.stage_duration = HistogramFamily(
+            "bobb_stage_duration_seconds", "Time spent in each stage of a request.",
+            ("route", "stage")
+        )
+        self._collectors = []
+
+    def add_collector(self, collect):
+        """
+        Registers a function returning [(name, type, help, [(labels dict, value)])]
+        for values other components keep themselves, rendered on every scrape.
+        """
+        self._collectors.append(collect)
+
+    def observe_stage(self, stage, seconds, route=None):
+        if route is None:
+            route = current_route()
+        self.stage_duration.observe(seconds, route, stage)
+
+    @contextmanager
+    def stage(self, stage, route=None):
+        """Times the body of a with block as a stage of the current request."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started, route)
+
+    def render(self) -> str:
+        lines = self.request_duration.render() + self.stage_duration.render()
+        for collect in self._collectors:
+            for name, metric_type, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def current_route():
+    """The URL rule of the current request, e.g. /v1/satellites/<string:ip>/images."""
+    if not has_request_context():
+        return UNMATCHED_ROUTE
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+class SamplingProfiler:
+    """
+    Profiles a random fraction of requests with cProfile and aggregates the
+    results. Only one request is profiled at a time; others are not sampled
+    while it runs.
+    """
+
+    def __init__(self, sample_rate=0.0):
+        self.sample_rate = sample_rate
+        self.sampled = 0
+        self._busy = threading.Lock()
+        self._stats = None
+        self._stats_lock = threading.Lock()
+
+    def should_sample(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profile(self, func, *args):
+        """Runs func(*args), profiling it if nothing else is being profiled."""
+        if not self._busy.acquire(blocking=False):
+            return func(*args)
+        profile = cProfile.Profile()
+        try:
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) is active
+                return func(*args)
+            try:
+                return func(*args)
+            finally:
+                profile.disable()
+                with self._stats_lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+                    self.sampled += 1
+        finally:
+            self._busy.release()
+
+    def report(self, limit=30, sort="cumulative") -> str:
+        with self._stats_lock:
+            if self._stats is None:
+                return "No requests profiled yet\n"
+            output = io.StringIO()
+            self._stats.stream = output
+            self._stats.sort_stats(sort).print_stats(limit)
+        return f"{self.sampled} requests profiled\n" + output.getvalue()
+
+    def reset(self):
+        with self._stats_lock:
+            self._stats = None
+            self.sampled = 0
+
+
+class MetricsMiddleware:
+    """
+    WSGI middleware recording bobb_request_duration_seconds once the response
+    body has been sent (or, for wsgi.file_wrapper bodies the server sends
+    itself, once the app returns), and running the sampling profiler.
+    """
+
+    def __init__(self, wsgi_app, registry, profiler):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        status = []
+
+        def metrics_start_response(status_line, headers, exc_info=None):
+            status.append(status_line[:3])
+            return start_response(status_line, headers, exc_info)
+
+        def record():
+            self.registry.request_duration.observe(
+                time.perf_counter() - started,
+                environ.get("REQUEST_METHOD", ""),
+                environ.get(ROUTE_ENVIRON_KEY, UNMATCHED_ROUTE),
+                status[0] if status else "500"
+            )
+
+        try:
+            if self.profiler.should_sample():
+                app_iter = self.profiler.profile(self.wsgi_app, environ, metrics_start_response)
+            else:
+                app_iter = self.wsgi_app(environ, metrics_start_response)
+        except BaseException:
+            record()
+            raise
+
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None and isinstance(file_wrapper, type) and isinstance(app_iter, file_wrapper):
+            # Keep the server's sendfile path intact
+            record()
+            return app_iter
+        return ClosingIterator(app_iter, record)
+
+
+metrics = MetricsRegistry()
+profiler = SamplingProfiler()
+
+
+def start_request_timing():
+    """before_request hook: hands the route to the middleware and starts the stage clock."""
+    request.environ[ROUTE_ENVIRON_KEY] = current_route()
+    g.metrics_stage_started = time.perf_counter()
+
+
+def end_stage(stage):
+    """Observes the time since the previous stage ended as stage, then restarts the clock."""
+    now = time.perf_counter()
+    started = g.get("metrics_stage_started")
+    if started is not None:
+        metrics.observe_stage(stage, now - started)
+    g.metrics_stage_started = now
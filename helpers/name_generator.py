@@ -1,373 +1,410 @@
 import socket
-from random import random
-from typing import Optional, Tuple
+import struct
+from random import choice
+from typing import Optional
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
 
-def get_ip_addresses() -> Tuple[Optional[str], Optional[str]]:
+# ioctl request that returns an interface's IPv4 address (Linux)
+SIOCGIFADDR = 0x8915
+
+LOOPBACK_IPV4 = "127.0.0.1"
+
+# Built once at import instead of on every generate_name call
+LEFT_SIDE = (
+    "admiring",
+    "adoring",
+    "affectionate",
+    "agitated",
+    "amazing",
+    "angry",
+    "awesome",
+    "beautiful",
+    "blissful",
+    "bold",
+    "boring",
+    "brave",
+    "busy",
+    "charming",
+    "clever",
+    "compassionate",
+    "competent",
+    "condescending",
+    "confident",
+    "cool",
+    "cranky",
+    "crazy",
+    "dazzling",
+    "determined",
+    "distracted",
+    "dreamy",
+    "eager",
+    "ecstatic",
+    "elastic",
+    "elated",
+    "elegant",
+    "eloquent",
+    "epic",
+    "exciting",
+    "fervent",
+    "festive",
+    "flamboyant",
+    "focused",
+    "friendly",
+    "frosty",
+    "funny",
+    "gallant",
+    "gifted",
+    "goofy",
+    "gracious",
+    "great",
+    "happy",
+    "hardcore",
+    "heuristic",
+    "hopeful",
+    "hungry",
+    "infallible",
+    "inspiring",
+    "intelligent",
+    "interesting",
+    "jolly",
+    "jovial",
+    "keen",
+    "kind",
+    "laughing",
+    "loving",
+    "lucid",
+    "magical",
+    "modest",
+    "musing",
+    "mystifying",
+    "naughty",
+    "nervous",
+    "nice",
+    "nifty",
+    "nostalgic",
+    "objective",
+    "optimistic",
+    "peaceful",
+    "pedantic",
+    "pensive",
+    "practical",
+    "priceless",
+    "quirky",
+    "quizzical",
+    "recursing",
+    "relaxed",
+    "reverent",
+    "romantic",
+    "sad",
+    "serene",
+    "sharp",
+    "silly",
+    "sleepy",
+    "stoic",
+    "strange",
+    "stupefied",
+    "suspicious",
+    "sweet",
+    "tender",
+    "thirsty",
+    "trusting",
+    "unruffled",
+    "upbeat",
+    "vibrant",
+    "vigilant",
+    "vigorous",
+    "wizardly",
+    "wonderful",
+    "xenodochial",
+    "youthful",
+    "zealous",
+    "zen",
+)
+
+RIGHT_SIDE = (
+    "agnesi",
+    "albattani",
+    "allen",
+    "almeida",
+    "antonelli",
+    "archimedes",
+    "ardinghelli",
+    "aryabhata",
+    "austin",
+    "babbage",
+    "banach",
+    "banzai",
+    "bardeen",
+    "bartik",
+    "bassi",
+    "beaver",
+    "bell",
+    "benz",
+    "bhabha",
+    "bhaskara",
+    "black",
+    "blackburn",
+    "blackwell",
+    "bohr",
+    "booth",
+    "borg",
+    "bose",
+    "bouman",
+    "boyd",
+    "brahmagupta",
+    "brattain",
+    "brown",
+    "buck",
+    "burnell",
+    "cannon",
+    "carson",
+    "cartwright",
+    "carver",
+    "cerf",
+    "chandrasekhar",
+    "chaplygin",
+    "chatelet",
+    "chatterjee",
+    "chaum",
+    "chebyshev",
+    "clarke",
+    "cohen",
+    "colden",
+    "cori",
+    "cray",
+    "curie",
+    "curran",
+    "darwin",
+    "davinci",
+    "dewdney",
+    "dhawan",
+    "diffie",
+    "dijkstra",
+    "dirac",
+    "driscoll",
+    "dubinsky",
+    "easley",
+    "edison",
+    "einstein",
+    "elbakyan",
+    "elgamal",
+    "elion",
+    "ellis",
+    "engelbart",
+    "euclid",
+    "euler",
+    "faraday",
+    "feistel",
+    "fermat",
+    "fermi",
+    "feynman",
+    "franklin",
+    "gagarin",
+    "galileo",
+    "galois",
+    "ganguly",
+    "gates",
+    "gauss",
+    "germain",
+    "goldberg",
+    "goldstine",
+    "goldwasser",
+    "golick",
+    "goodall",
+    "gould",
+    "greider",
+    "grothendieck",
+    "haibt",
+    "hamilton",
+    "haslett",
+    "hawking",
+    "heisenberg",
+    "hellman",
+    "hermann",
+    "herschel",
+    "hertz",
+    "heyrovsky",
+    "hodgkin",
+    "hofstadter",
+    "hoover",
+    "hopper",
+    "hugle",
+    "hypatia",
+    "ishizaka",
+    "jackson",
+    "jang",
+    "jemison",
+    "jennings",
+    "jepsen",
+    "johnson",
+    "joliot",
+    "jones",
+    "kalam",
+    "kapitsa",
+    "kare",
+    "keldysh",
+    "keller",
+    "kepler",
+    "khayyam",
+    "khorana",
+    "kilby",
+    "kirch",
+    "knuth",
+    "kowalevski",
+    "lalande",
+    "lamarr",
+    "lamport",
+    "leakey",
+    "leavitt",
+    "lederberg",
+    "lehmann",
+    "lewin",
+    "lichterman",
+    "liskov",
+    "lovelace",
+    "lumiere",
+    "mahavira",
+    "margulis",
+    "matsumoto",
+    "maxwell",
+    "mayer",
+    "mccarthy",
+    "mcclintock",
+    "mclaren",
+    "mclean",
+    "mcnulty",
+    "meitner",
+    "mendel",
+    "mendeleev",
+    "meninsky",
+    "merkle",
+    "mestorf",
+    "mirzakhani",
+    "montalcini",
+    "moore",
+    "morse",
+    "moser",
+    "murdock",
+    "napier",
+    "nash",
+    "neumann",
+    "newton",
+    "nightingale",
+    "nobel",
+    "noether",
+    "northcutt",
+    "noyce",
+    "panini",
+    "pare",
+    "pascal",
+    "pasteur",
+    "payne",
+    "perlman",
+    "pike",
+    "poincare",
+    "poitras",
+    "proskuriakova",
+    "ptolemy",
+    "raman",
+    "ramanujan",
+    "rhodes",
+    "ride",
+    "ritchie",
+    "robinson",
+    "roentgen",
+    "rosalind",
+    "rubin",
+    "saha",
+    "sammet",
+    "sanderson",
+    "satoshi",
+    "shamir",
+    "shannon",
+    "shaw",
+    "shirley",
+    "shockley",
+    "shtern",
+    "sinoussi",
+    "snyder",
+    "solomon",
+    "spence",
+    "stonebraker",
+    "sutherland",
+    "swanson",
+    "swartz",
+    "swirles",
+    "taussig",
+    "tesla",
+    "tharp",
+    "thompson",
+    "torvalds",
+    "tu",
+    "turing",
+    "varahamihira",
+    "vaughan",
+    "villani",
+    "visvesvaraya",
+    "volhard",
+    "wescoff",
+    "wilbur",
+    "wiles",
+    "williams",
+    "williamson",
+    "wilson",
+    "wing",
+    "wozniak",
+    "wright",
+    "wu",
+    "yalow",
+    "yonath",
+    "zhukovsky",
+)
+
+
+def _route_probe_address() -> Optional[str]:
+    # Connecting a UDP socket only picks a route, no packet is sent. Offline
+    # nodes have no route to 8.8.8.8 and fail here straight away.
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(0)
+            sock.connect(("8.8.8.8", 80))  # Google's IPv4 DNS
+            return sock.getsockname()[0]
+    except OSError:
+        return None
+
+
+def _interface_address() -> Optional[str]:
+    # First IPv4 address of a non-loopback interface
+    if fcntl is None:
+        return None
+    try:
+        interfaces = socket.if_nameindex()
+    except OSError:
+        return None
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for _, name in interfaces:
+            try:
+                request = struct.pack("256s", name.encode()[:15])
+                address = socket.inet_ntoa(fcntl.ioctl(sock.fileno(), SIOCGIFADDR, request)[20:24])
+            except OSError:
+                continue
+            if not address.startswith("127."):
+                return address
+    return None
+
+
+def get_ip_addresses() -> str:
     """
     Get the machine's IPv4 address.
-    Returns a ipv4_address.
+    Tries the default route first, then the network interfaces, and falls back
+    to loopback, so it never needs the network to be up.
     """
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.connect(("8.8.8.8", 80))  # Google's IPv4 DNS
-    ipv4_address = sock.getsockname()[0]
-    sock.close()
-
-    return ipv4_address
+    return _route_probe_address() or _interface_address() or LOOPBACK_IPV4
 
 def generate_name():
-    left_side = [
-        "admiring",
-        "adoring",
-        "affectionate",
-        "agitated",
-        "amazing",
-        "angry",
-        "awesome",
-        "beautiful",
-        "blissful",
-        "bold",
-        "boring",
-        "brave",
-        "busy",
-        "charming",
-        "clever",
-        "compassionate",
-        "competent",
-        "condescending",
-        "confident",
-        "cool",
-        "cranky",
-        "crazy",
-        "dazzling",
-        "determined",
-        "distracted",
-        "dreamy",
-        "eager",
-        "ecstatic",
-        "elastic",
-        "elated",
-        "elegant",
-        "eloquent",
-        "epic",
-        "exciting",
-        "fervent",
-        "festive",
-        "flamboyant",
-        "focused",
-        "friendly",
-        "frosty",
-        "funny",
-        "gallant",
-        "gifted",
-        "goofy",
-        "gracious",
-        "great",
-        "happy",
-        "hardcore",
-        "heuristic",
-        "hopeful",
-        "hungry",
-        "infallible",
-        "inspiring",
-        "intelligent",
-        "interesting",
-        "jolly",
-        "jovial",
-        "keen",
-        "kind",
-        "laughing",
-        "loving",
-        "lucid",
-        "magical",
-        "modest",
-        "musing",
-        "mystifying",
-        "naughty",
-        "nervous",
-        "nice",
-        "nifty",
-        "nostalgic",
-        "objective",
-        "optimistic",
-        "peaceful",
-        "pedantic",
-        "pensive",
-        "practical",
-        "priceless",
-        "quirky",
-        "quizzical",
-        "recursing",
-        "relaxed",
-        "reverent",
-        "romantic",
-        "sad",
-        "serene",
-        "sharp",
-        "silly",
-        "sleepy",
-        "stoic",
-        "strange",
-        "stupefied",
-        "suspicious",
-        "sweet",
-        "tender",
-        "thirsty",
-        "trusting",
-        "unruffled",
-        "upbeat",
-        "vibrant",
-        "vigilant",
-        "vigorous",
-        "wizardly",
-        "wonderful",
-        "xenodochial",
-        "youthful",
-        "zealous",
-        "zen",
-    ]
-
-    right_side = [
-        "agnesi",
-        "albattani",
-        "allen",
-        "almeida",
-        "antonelli",
-        "archimedes",
-        "ardinghelli",
-        "aryabhata",
-        "austin",
-        "babbage",
-        "banach",
-        "banzai",
-        "bardeen",
-        "bartik",
-        "bassi",
-        "beaver",
-        "bell",
-        "benz",
-        "bhabha",
-        "bhaskara",
-        "black",
-        "blackburn",
-        "blackwell",
-        "bohr",
-        "booth",
-        "borg",
-        "bose",
-        "bouman",
-        "boyd",
-        "brahmagupta",
-        "brattain",
-        "brown",
-        "buck",
-        "burnell",
-        "cannon",
-        "carson",
-        "cartwright",
-        "carver",
-        "cerf",
-        "chandrasekhar",
-        "chaplygin",
-        "chatelet",
-        "chatterjee",
-        "chaum",
-        "chebyshev",
-        "clarke",
-        "cohen",
-        "colden",
-        "cori",
-        "cray",
-        "curie",
-        "curran",
-        "darwin",
-        "davinci",
-        "dewdney",
-        "dhawan",
-        "diffie",
-        "dijkstra",
-        "dirac",
-        "driscoll",
-        "dubinsky",
-        "easley",
-        "edison",
-        "einstein",
-        "elbakyan",
-        "elgamal",
-        "elion",
-        "ellis",
-        "engelbart",
-        "euclid",
-        "euler",
-        "faraday",
-        "feistel",
-        "fermat",
-        "fermi",
-        "feynman",
-        "franklin",
-        "gagarin",
-        "galileo",
-        "galois",
-        "ganguly",
-        "gates",
-        "gauss",
-        "germain",
-        "goldberg",
-        "goldstine",
-        "goldwasser",
-        "golick",
-        "goodall",
-        "gould",
-        "greider",
-        "grothendieck",
-        "haibt",
-        "hamilton",
-        "haslett",
-        "hawking",
-        "heisenberg",
-        "hellman",
-        "hermann",
-        "herschel",
-        "hertz",
-        "heyrovsky",
-        "hodgkin",
-        "hofstadter",
-        "hoover",
-        "hopper",
-        "hugle",
-        "hypatia",
-        "ishizaka",
-        "jackson",
-        "jang",
-        "jemison",
-        "jennings",
-        "jepsen",
-        "johnson",
-        "joliot",
-        "jones",
-        "kalam",
-        "kapitsa",
-        "kare",
-        "keldysh",
-        "keller",
-        "kepler",
-        "khayyam",
-        "khorana",
-        "kilby",
-        "kirch",
-        "knuth",
-        "kowalevski",
-        "lalande",
-        "lamarr",
-        "lamport",
-        "leakey",
-        "leavitt",
-        "lederberg",
-        "lehmann",
-        "lewin",
-        "lichterman",
-        "liskov",
-        "lovelace",
-        "lumiere",
-        "mahavira",
-        "margulis",
-        "matsumoto",
-        "maxwell",
-        "mayer",
-        "mccarthy",
-        "mcclintock",
-        "mclaren",
-        "mclean",
-        "mcnulty",
-        "meitner",
-        "mendel",
-        "mendeleev",
-        "meninsky",
-        "merkle",
-        "mestorf",
-        "mirzakhani",
-        "montalcini",
-        "moore",
-        "morse",
-        "moser",
-        "murdock",
-        "napier",
-        "nash",
-        "neumann",
-        "newton",
-        "nightingale",
-        "nobel",
-        "noether",
-        "northcutt",
-        "noyce",
-        "panini",
-        "pare",
-        "pascal",
-        "pasteur",
-        "payne",
-        "perlman",
-        "pike",
-        "poincare",
-        "poitras",
-        "proskuriakova",
-        "ptolemy",
-        "raman",
-        "ramanujan",
-        "rhodes",
-        "ride",
-        "ritchie",
-        "robinson",
-        "roentgen",
-        "rosalind",
-        "rubin",
-        "saha",
-        "sammet",
-        "sanderson",
-        "satoshi",
-        "shamir",
-        "shannon",
-        "shaw",
-        "shirley",
-        "shockley",
-        "shtern",
-        "sinoussi",
-        "snyder",
-        "solomon",
-        "spence",
-        "stonebraker",
-        "sutherland",
-        "swanson",
-        "swartz",
-        "swirles",
-        "taussig",
-        "tesla",
-        "tharp",
-        "thompson",
-        "torvalds",
-        "tu",
-        "turing",
-        "varahamihira",
-        "vaughan",
-        "villani",
-        "visvesvaraya",
-        "volhard",
-        "wescoff",
-        "wilbur",
-        "wiles",
-        "williams",
-        "williamson",
-        "wilson",
-        "wing",
-        "wozniak",
-        "wright",
-        "wu",
-        "yalow",
-        "yonath",
-        "zhukovsky",
-    ]
-
     ipv4 = get_ip_addresses()
-
-    num_left = int(random() * len(left_side))
-    num_right = int(random() * len(right_side))
-    return f"{left_side[num_left]}-{right_side[num_right]}-{ipv4}"
\ No newline at end of file
+    return f"{choice(LEFT_SIDE)}-{choice(RIGHT_SIDE)}-{ipv4}"
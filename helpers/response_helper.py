@@ -1,6 +1,42 @@
-from flask import jsonify
+import json
+from functools import lru_cache
 from typing import Any, Dict, Union
 
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_MIMETYPE = "application/json"
+
+# Distinct error bodies kept serialized by error_response
+ERROR_RESPONSE_CACHE_SIZE = 256
+
+if orjson is not None:
+    def dumps(data) -> bytes:
+        """
+        Serializes data to compact JSON with sorted keys, as jsonify does.
+        orjson writes non-ASCII characters as UTF-8 instead of \\u escapes.
+        """
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+else:
+    _encoder = json.JSONEncoder(separators=(",", ":"), sort_keys=True)
+
+    def dumps(data) -> bytes:
+        """Serializes data to compact JSON with sorted keys, as jsonify does."""
+        return _encoder.encode(data).encode()
+
+
+def _envelope(data, status_code):
+    return {
+        "status": "success" if 200 <= status_code < 400 else "error",
+        "data": data,
+        "status_code": status_code
+    }
+
+
 def create_response(data: Union[str, Dict[str, Any], list, tuple], status_code: int) -> tuple:
     """
     Creates a standardized JSON response.
@@ -12,10 +48,37 @@ def create_response(data: Union[str, Dict[str, Any], list, tuple], status_code:
     Returns:
         tuple: A Flask JSON response and the associated status code.
     """
-    response_body = {
-        "status": "success" if 200 <= status_code < 400 else "error",
-        "data": data,
-        "status_code": status_code
-    }
-    json_data = jsonify(response_body), status_code
-    return json_data
\ No newline at end of file
+    body = dumps(_envelope(data, status_code)) + b"\n"
+    return Response(body, status=status_code, mimetype=JSON_MIMETYPE), status_code
+
+
+class PreparedResponse:
+    """
+    A standardized JSON response serialized once for data that never changes,
+    such as fixed error bodies. Each call returns a new Response around the
+    same body bytes, since hooks may still add headers to it.
+    """
+
+    def __init__(self, data: Union[str, Dict[str, Any], list, tuple], status_code: int):
+        self.body = dumps(_envelope(data, status_code)) + b"\n"
+        self.status_code = status_code
+
+    def __call__(self) -> tuple:
+        return Response(self.body, status=self.status_code, mimetype=JSON_MIMETYPE), self.status_code
+
+
+@lru_cache(maxsize=ERROR_RESPONSE_CACHE_SIZE)
+def _prepared_error(error, status_code):
+    return PreparedResponse({"error": error}, status_code)
+
+
+def error_response(error: str, status_code: int, details: str = None) -> tuple:
+    """
+    create_response({"error": error[, "details": details]}, status_code). Errors
+    without details are fixed strings, so their serialized body is reused instead
+    of built again; details usually carry per-request text and are not cached.
+    """
+    if details is None:
+        return _prepared_error(error, status_code)()
+    return create_response({"error": error, "details": details}, status_code)
+
@@ -0,0 +1,83 @@
+import json
+import socket
+from typing import Any, Dict, Optional, Tuple
+
+SATELLITES_FILE_PATH = "config/satellites.json"
+
+
+def normalize_ip(ip: str) -> Optional[bytes]:
+    """
+    Packs an IPv6 address so compressed and expanded spellings compare equal.
+    Returns None if the address is not valid IPv6.
+    """
+    try:
+        return socket.inet_pton(socket.AF_INET6, ip)
+    except (OSError, ValueError):
+        return None
+
+
+class SatelliteRegistry:
+    """
+    In-memory view of the constellation, indexed by IP address and by function.
+    The JSON body for the satellite list is serialized once on load.
+    """
+
+    def __init__(self, satellites: list):
+        self._satellites = tuple(satellites)
+        self._by_ip: Dict[bytes, Dict[str, Any]] = {}
+
+        by_function: Dict[str, list] = {}
+        for satellite in self._satellites:
+            packed_ip = normalize_ip(satellite["ip"])
+            if packed_ip is None:
+                raise ValueError(f"Invalid satellite IPv6 address: {satellite['ip']}")
+            self._by_ip[packed_ip] = satellite
+            by_function.setdefault(satellite["function"], []).append(satellite)
+        self._by_function: Dict[str, Tuple[Dict[str, Any], ...]] = {function: tuple(group) for function, group in by_function.items()}
+
+        # Serialized the same way as Flask's default JSON provider
+        self.json_body = (json.dumps(
+            {"satellites": list(self._satellites)},
+            ensure_ascii=True,
+            sort_keys=True,
+            separators=(",", ":")
+        ) + "\n").encode()
+
+    @classmethod
+    def from_file(cls, path: str = SATELLITES_FILE_PATH) -> "SatelliteRegistry":
+        with open(path, "r", encoding="utf-8") as satellites_file:
+            return cls(json.load(satellites_file)["satellites"])
+
+    def get(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Looks a satellite up by IPv6 address in any notation."""
+        packed_ip = normalize_ip(ip)
+        if packed_ip is None:
+            return None
+        return self._by_ip.get(packed_ip)
+
+    def by_function(self, function: str) -> Tuple[Dict[str, Any], ...]:
+        return self._by_function.get(function, ())
+
+    def __len__(self):
+        return len(self._satellites)
+
+    def __iter__(self):
+        return iter(self._satellites)
+
+
+_registry: Optional[SatelliteRegistry] = None
+
+
+def get_registry() -> SatelliteRegistry:
+    """Returns the process-wide registry, loading it on first use."""
+    global _registry
+    if _registry is None:
+        _registry = SatelliteRegistry.from_file()
+    return _registry
+
+
+def reload_registry() -> SatelliteRegistry:
+    """Reads the satellite list again and makes it the process-wide registry."""
+    global _registry
+    _registry = SatelliteRegistry.from_file()
+    return _registry
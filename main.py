@@ -1,70 +1,106 @@
 import time
-from flask import Flask, request, g
 
-from config.config import load_from_config_file
+# Taken before the heavier imports so startup timing includes them
+STARTUP_STARTED = time.perf_counter()
+
+from flask import Flask, g, request
+
+from config.config import get_config
+from config.constants import FRAME_CONTENT_TYPE
+from helpers.image_cache import image_cache
+from helpers.metrics import MetricsMiddleware, end_stage, metrics, profiler, start_request_timing
 from routers.earth_router import router as main_router
-from config.constants import X_BOBB_HEADER, ERROR_INVALID_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
-from helpers.response_helper import create_response
-from utils.crypto_utils import generate_keys
-from utils.headers import BobbHeaders
-from utils.optional_headers import BobbOptionalHeaders
+from middleware.header import process_bobb_headers
+from middleware.replay import replay_cache
+from middleware.response_header import ResponseHeaderStamper
+from middleware.scheduler import SchedulerSlotMiddleware, scheduler
+from utils.crypto_utils import ensure_keys
 
 app = Flask(__name__)
 
 app.register_blueprint(main_router)
 
+# Frees scheduler slots once the response body has been produced
+app.wsgi_app = SchedulerSlotMiddleware(app.wsgi_app, scheduler)
+# Times every request until its body is sent and samples requests for the profiler
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics, profiler)
+metrics.add_collector(scheduler.prometheus_samples)
+metrics.add_collector(replay_cache.prometheus_samples)
+metrics.add_collector(image_cache.prometheus_samples)
+
+response_header_stamper = ResponseHeaderStamper(
+    version_major=1,
+    version_minor=0,
+    message_type=2,
+    hop_count=10,
+    priority=1,
+    encryption_algo="AES256"
+)
+
 
 @app.before_request
 def add_custom_headers_to_request():
-    custom_header = request.headers.get(X_BOBB_HEADER)
-    if custom_header:
-        try:
-            bobb = BobbHeaders()
-            g.bobb_header = bobb.parse_header(bytes.fromhex(custom_header))
-        except Exception as e:
-            return create_response({"error": ERROR_INVALID_BOBB_HEADER, "details": str(e)}, 400)
-    else:
-        g.bobb_header = None
-
-    optional_header = request.headers.get(X_BOBB_OPTIONAL_HEADER)
-    if optional_header:
-        try:
-            leo = BobbOptionalHeaders()
-            g.bobb_optional_header = leo.parse_optional_header(
-                bytes.fromhex(optional_header))
-        except Exception as e:
-            return create_response({"error": X_BOBB_OPTIONAL_HEADER, "details": str(e)}, 400)
-    else:
-        g.bobb_optional_header = None
+    start_request_timing()
+    error_response = process_bobb_headers()
+    end_stage("headers")
+    if error_response is not None:
+        return error_response
+    # Retransmits are answered from the replay cache or rejected before they take a slot
+    duplicate_response = replay_cache.check()
+    end_stage("replay")
+    if duplicate_response is not None:
+        return duplicate_response
+    # Waits for a slot according to the optional header priority, or sheds the request
+    admission_response = scheduler.admit()
+    end_stage("scheduler_wait")
+    g.metrics_in_handler = admission_response is None
+    return admission_response
+
+
+@app.teardown_request
+def finish_replay_check(exception=None):
+    replay_cache.finish(exception)
 
 
 @app.after_request
 def add_custom_headers_to_response(response):
     """
     Middleware to inject the BobbHeaders and LEOOptionalHeaders into the response.
+    The sequence number increases per client connection. Binary frames already
+    carry both headers in-band, so they are left alone.
     """
-    bobb_response = BobbHeaders(
-        version_major=1,
-        version_minor=0,
-        message_type=2,
-        sequence_number=456,
-        timestamp=int(time.time())
-    )
-    response.headers[X_BOBB_HEADER] = bobb_response.build_header().hex()
+    if g.pop("metrics_in_handler", False):
+        end_stage("handler")
+    # Streamed bodies keep their scheduler slot until the server closes them
+    scheduler.release_unless_streamed(response)
+    if response.mimetype == FRAME_CONTENT_TYPE:
+        return response
 
-    leo_response = BobbOptionalHeaders(
-        timestamp=int(time.time()),
-        hop_count=10,
-        priority=1,
-        encryption_algo="AES256"
-    )
-    response.headers[X_BOBB_OPTIONAL_HEADER] = leo_response.build_optional_header(
-    ).hex()
+    # Kept before stamping so a replayed copy gets fresh headers of its own
+    replay_cache.remember(response)
+
+    connection_id = (request.environ.get("REMOTE_ADDR"), request.environ.get("REMOTE_PORT"))
+    with metrics.stage("response_headers"):
+        return response_header_stamper.stamp(response, connection_id)
 
-    return response
+
+def start_node():
+    """Loads the node config and key pair, printing how long each startup step took."""
+    imported = time.perf_counter()
+    name = get_config()["name"]
+    configured = time.perf_counter()
+    generated = ensure_keys(name)
+    keys_ready = time.perf_counter()
+
+    print(
+        f"Startup for '{name}': imports {(imported - STARTUP_STARTED) * 1000:.1f} ms, "
+        f"config {(configured - imported) * 1000:.1f} ms, "
+        f"keys {(keys_ready - configured) * 1000:.1f} ms ({'generated' if generated else 'reused'}), "
+        f"total {(keys_ready - STARTUP_STARTED) * 1000:.1f} ms"
+    )
+    return name
 
 
 if __name__ == "__main__":
-    name = load_from_config_file()["name"]
-    generate_keys(name)
+    start_node()
     app.run(debug=True, port=30001)
\ No newline at end of file
@@ -1,3 +1,6 @@
+from functools import wraps
+from typing import NamedTuple, Optional
+
 from flask import request, g
 from config.constants import (
     X_BOBB_HEADER,
@@ -5,35 +8,94 @@ from config.constants import (
     ERROR_INVALID_BOBB_HEADER,
     ERROR_INVALID_OPTIONAL_HEADER
 )
-from helpers.response_helper import create_response
-from utils.headers import BobbHeaders
-from utils.optional_headers import BobbOptionalHeaders
+from helpers.response_helper import error_response
+from utils.headers import BobbHeaderRecord, HEADER_SIZE, parse_from
+from utils.optional_headers import BobbOptionalHeaderRecord, OPTIONAL_HEADER_SIZE, parse_optional_from
 
+# Both headers travel hex encoded, two characters per byte
+BOBB_HEADER_HEX_LENGTH = HEADER_SIZE * 2
+OPTIONAL_HEADER_HEX_LENGTH = OPTIONAL_HEADER_SIZE * 2
 
-def check_headers():
+# WSGI environ keys, read directly to skip the case-insensitive header lookup
+BOBB_HEADER_ENVIRON_KEY = "HTTP_" + X_BOBB_HEADER.upper().replace("-", "_")
+OPTIONAL_HEADER_ENVIRON_KEY = "HTTP_" + X_BOBB_OPTIONAL_HEADER.upper().replace("-", "_")
+
+
+class ParsedBobbHeaders(NamedTuple):
+    """Result of parsing the request headers once. A header that was not sent is None."""
+    header: Optional[BobbHeaderRecord]
+    optional_header: Optional[BobbOptionalHeaderRecord]
+
+
+def _decode(value, hex_length, parse):
+    # Reject on length before bytes.fromhex allocates anything
+    if len(value) != hex_length:
+        raise ValueError(f"Expected {hex_length} hex characters, got {len(value)}")
+    decoded = bytes.fromhex(value)
+    # fromhex skips whitespace, so the right length of text can still decode short
+    if len(decoded) * 2 != hex_length:
+        raise ValueError(f"Expected {hex_length // 2} bytes, got {len(decoded)}")
+    return parse(decoded)
+
+
+def process_bobb_headers():
     """
-    Middleware to parse BobbHeaders and BobbOptionalHeaders from the request.
-    Returns True if valid, otherwise returns a Flask response.
+    Parses BobbHeaders and BobbOptionalHeaders from the request exactly once and
+    stores the result in g.bobb_headers (plus g.bobb_header / g.bobb_optional_header).
+    Returns None if the headers are absent or valid, otherwise a Flask response.
     """
-    custom_header = request.headers.get(X_BOBB_HEADER)
+    header = None
+    custom_header = request.environ.get(BOBB_HEADER_ENVIRON_KEY)
     if custom_header:
         try:
-            bobb = BobbHeaders()
-            g.bobb_header = bobb.parse_header(bytes.fromhex(custom_header))
-        except Exception as e:
-            return create_response({"error": ERROR_INVALID_BOBB_HEADER, "details": str(e)}, 400)
-    else:
-        return create_response({"error": ERROR_INVALID_BOBB_HEADER}, 400)
-
-    optional_header = request.headers.get(X_BOBB_OPTIONAL_HEADER)
-    if optional_header:
+            header = _decode(custom_header, BOBB_HEADER_HEX_LENGTH, parse_from)
+        except ValueError as e:
+            return error_response(ERROR_INVALID_BOBB_HEADER, 400, str(e))
+
+    optional_header = None
+    custom_optional_header = request.environ.get(OPTIONAL_HEADER_ENVIRON_KEY)
+    if custom_optional_header:
         try:
-            leo = BobbOptionalHeaders()
-            g.bobb_optional_header = leo.parse_optional_header(
-                bytes.fromhex(optional_header))
-        except Exception as e:
-            return create_response({"error": ERROR_INVALID_OPTIONAL_HEADER, "details": str(e)}, 400)
-    else:
-        return create_response({"error": ERROR_INVALID_OPTIONAL_HEADER}, 400)
-
-    return True
\ No newline at end of file
+            optional_header = _decode(custom_optional_header, OPTIONAL_HEADER_HEX_LENGTH, parse_optional_from)
+            # The record only decodes encryption_algo on access, so check it here once
+            optional_header.encryption_algo_bytes.decode("utf-8")
+        except UnicodeDecodeError:
+            return error_response(ERROR_INVALID_OPTIONAL_HEADER, 400, "encryption_algo is not valid utf-8")
+        except ValueError as e:
+            return error_response(ERROR_INVALID_OPTIONAL_HEADER, 400, str(e))
+
+    g.bobb_headers = ParsedBobbHeaders(header, optional_header)
+    g.bobb_header = header
+    g.bobb_optional_header = optional_header
+    return None
+
+
+def check_headers():
+    """
+    Middleware to require BobbHeaders and BobbOptionalHeaders on the request.
+    Reuses the result of process_bobb_headers if the app hook already ran.
+    Returns True if valid, otherwise returns a Flask response.
+    """
+    if "bobb_headers" not in g:
+        header_error = process_bobb_headers()
+        if header_error is not None:
+            return header_error
+
+    if g.bobb_headers.header is None:
+        return error_response(ERROR_INVALID_BOBB_HEADER, 400)
+    if g.bobb_headers.optional_header is None:
+        return error_response(ERROR_INVALID_OPTIONAL_HEADER, 400)
+
+    return True
+
+
+def require_bobb_headers(view):
+    """Route decorator that rejects requests without valid Bobb headers."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        middleware = check_headers()
+        if middleware is not True:
+            return middleware
+        return view(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, g, request
+
+from config.constants import (
+    ERROR_DUPLICATE_REQUEST,
+    REPLAY_CACHED_RESPONSES,
+    REPLAY_EXPIRY,
+    REPLAY_MAX_CACHED_BODY,
+    REPLAY_MAX_SOURCES,
+    REPLAY_WINDOW_SIZE,
+    STATUS_CONFLICT
+)
+from helpers.response_helper import error_response
+
+# Only responses to these methods are replayed for a retransmit
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD"))
+
+SEQUENCE_SPACE = 1 << 32
+HALF_SEQUENCE_SPACE = SEQUENCE_SPACE >> 1
+
+
+class SequenceWindow:
+    """
+    Sliding window over the sequence numbers seen from one source.
+
+    Bit i of bitmap is set when highest - i has been seen. Sequence numbers are
+    compared with serial number arithmetic so the window survives the 32-bit
+    wrap around.
+    """
+    __slots__ = ("highest", "timestamp", "bitmap", "last_seen")
+
+    def __init__(self, sequence_number, timestamp, now):
+        self.highest = sequence_number
+        self.timestamp = timestamp
+        self.bitmap = 1
+        self.last_seen = now
+
+    def check_and_set(self, sequence_number, timestamp, window_size=REPLAY_WINDOW_SIZE):
+        """Marks sequence_number as seen. Returns False if it already was (or is too old to tell)."""
+        ahead = (sequence_number - self.highest) % SEQUENCE_SPACE
+        if 0 < ahead < HALF_SEQUENCE_SPACE:
+            self.bitmap = ((self.bitmap << ahead) | 1) & ((1 << window_size) - 1) if ahead < window_size else 1
+            self.highest = sequence_number
+            self.timestamp = timestamp
+            return True
+
+        behind = (self.highest - sequence_number) % SEQUENCE_SPACE
+        if behind < window_size and not self.bitmap & (1 << behind):
+            self.bitmap |= 1 << behind
+            return True
+        if timestamp > self.timestamp:
+            # A retransmit carries the original timestamp; a newer one means the sender restarted its count
+            self.highest = sequence_number
+            self.timestamp = timestamp
+            self.bitmap = 1
+            return True
+        return False
+
+    def clear(self, sequence_number, window_size=REPLAY_WINDOW_SIZE):
+        """Forgets that sequence_number was seen, if it is still inside the window."""
+        behind = (self.highest - sequence_number) % SEQUENCE_SPACE
+        if behind < window_size:
+            self.bitmap &= ~(1 << behind)
+
+
+class ReplayCache:
+    """
+    Detects retransmitted requests by (source, sequence_number).
+
+    One SequenceWindow is kept per source, at most max_sources of them, in LRU
+    order; a source that has been quiet for expiry seconds is forgotten. For
+    idempotent requests the response is kept too (small, non-streamed bodies
+    only), so a retransmit is answered from memory instead of being processed
+    again. Other duplicates are rejected with a 409.
+
+    A request that was shed or failed with a 5xx was never processed, so its
+    sequence number is forgotten again and the client may retry with the same
+    header.
+    """
+
+    def __init__(self, window_size=REPLAY_WINDOW_SIZE, max_sources=REPLAY_MAX_SOURCES, expiry=REPLAY_EXPIRY,
+                 max_responses=REPLAY_CACHED_RESPONSES, max_body=REPLAY_MAX_CACHED_BODY, clock=time.monotonic):
+        self.window_size = window_size
+        self.max_sources = max_sources
+        self.expiry = expiry
+        self.max_responses = max_responses
+        self.max_body = max_body
+        self._clock = clock
+        self._windows = OrderedDict()    # source -> SequenceWindow, least recently seen first
+        self._responses = OrderedDict()  # (source, sequence_number) -> (stored, status, mimetype, body)
+        self._lock = threading.Lock()
+        self.duplicates = 0
+        self.replayed = 0
+
+    def _expire(self, entries, now, stored_at):
+        while entries:
+            oldest = next(iter(entries.values()))
+            if now - stored_at(oldest) < self.expiry:
+                break
+            entries.popitem(last=False)
+
+    def seen(self, source, sequence_number, timestamp):
+        """Records a request and returns True if it is a duplicate."""
+        now = self._clock()
+        with self._lock:
+            self._expire(self._windows, now, lambda window: window.last_seen)
+            window = self._windows.get(source)
+            if window is None:
+                self._windows[source] = SequenceWindow(sequence_number, timestamp, now)
+                if len(self._windows) > self.max_sources:
+                    self._windows.popitem(last=False)
+                return False
+            window.last_seen = now
+            self._windows.move_to_end(source)
+            if window.check_and_set(sequence_number, timestamp, self.window_size):
+                return False
+            self.duplicates += 1
+            return True
+
+    def forget(self, key):
+        """Unmarks a (source, sequence_number) recorded by seen."""
+        source, sequence_number = key
+        with self._lock:
+            window = self._windows.get(source)
+            if window is not None:
+                window.clear(sequence_number, self.window_size)
+
+    def store(self, key, status, mimetype, body):
+        with self._lock:
+            self._responses[key] = (self._clock(), status, mimetype, body)
+            self._responses.move_to_end(key)
+            if len(self._responses) > self.max_responses:
+                self._responses.popitem(last=False)
+
+    def cached(self, key):
+        """Returns (status, mimetype, body) stored for a request, or None."""
+        now = self._clock()
+        with self._lock:
+            self._expire(self._responses, now, lambda entry: entry[0])
+            entry = self._responses.get(key)
+            if entry is None:
+                return None
+            self.replayed += 1
+            return entry[1:]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sources": len(self._windows),
+                "cached_responses": len(self._responses),
+                "duplicates": self.duplicates,
+                "replayed": self.replayed,
+            }
+
+    def prometheus_samples(self):
+        """Replay cache metrics in the collector format of helpers.metrics."""
+        stats = self.stats()
+        return [
+            ("bobb_replay_sources", "gauge", "Sources with a tracked sequence window.", [({}, stats["sources"])]),
+            ("bobb_replay_cached_responses", "gauge", "Responses kept for retransmits.", [({}, stats["cached_responses"])]),
+            ("bobb_replay_duplicates_total", "counter", "Retransmitted requests detected.", [({}, stats["duplicates"])]),
+            ("bobb_replay_replayed_total", "counter", "Retransmits answered from the cache.", [({}, stats["replayed"])]),
+        ]
+
+    def check(self):
+        """
+        Request hook, run after process_bobb_headers. Returns None for a new
+        request, the cached response for a retransmit of an idempotent one and
+        a 409 for any other duplicate. Requests without BobbHeaders are not tracked.
+        """
+        header = g.get("bobb_header")
+        if header is None:
+            return None
+        source = (request.environ.get("REMOTE_ADDR"), header.source_ip, header.source_port)
+        key = (source, header.sequence_number)
+        if not self.seen(source, header.sequence_number, header.timestamp):
+            g.replay_key = key
+            return None
+
+        cached = self.cached(key)
+        if cached is not None and request.method in IDEMPOTENT_METHODS:
+            status, mimetype, body = cached
+            return Response(body, status=status, mimetype=mimetype)
+        return error_response(ERROR_DUPLICATE_REQUEST, STATUS_CONFLICT)
+
+    def remember(self, response):
+        """
+        After-request hook: keeps the response of an idempotent request for
+        retransmits, or forgets the request if it was shed or failed.
+        """
+        key = g.pop("replay_key", None)
+        if key is None:
+            return response
+        if response.status_code >= 500:
+            self.forget(key)
+            return response
+        if request.method not in IDEMPOTENT_METHODS or response.is_streamed or response.direct_passthrough:
+            return response
+        body = response.get_data()
+        if len(body) <= self.max_body:
+            self.store(key, response.status_code, response.mimetype, body)
+        return response
+
+    def finish(self, exception=None):
+        """Teardown hook: forgets a request whose handler raised before remember could run."""
+        key = g.pop("replay_key", None)
+        if key is not None and exception is not None:
+            self.forget(key)
+
+
+replay_cache = ReplayCache()
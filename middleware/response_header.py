@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config.constants import X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from utils.headers import BobbHeaders, HEADER_SIZE
+from utils.optional_headers import BobbOptionalHeaders
+
+# The last 8 bytes of BobbHeaders are sequence_number and timestamp
+HEADER_PREFIX_SIZE = HEADER_SIZE - 8
+
+# Connections we keep a sequence counter for before the oldest is forgotten
+MAX_TRACKED_CONNECTIONS = 4096
+
+
+class ResponseHeaderStamper:
+    """
+    Stamps BobbHeaders and BobbOptionalHeaders onto responses.
+
+    Everything except the sequence number and timestamp is constant, so the hex
+    encoded prefix is built once and the timestamp dependent parts are only
+    rebuilt when the second changes.
+    """
+
+    def __init__(self, version_major=1, version_minor=0, message_type=2,
+                 hop_count=10, priority=1, encryption_algo="AES256",
+                 max_connections=MAX_TRACKED_CONNECTIONS):
+        template = BobbHeaders(
+            version_major=version_major,
+            version_minor=version_minor,
+            message_type=message_type,
+            sequence_number=0,
+            timestamp=0
+        )
+        self._header_prefix = template.build_header()[:HEADER_PREFIX_SIZE].hex()
+        self._hop_count = hop_count
+        self._priority = priority
+        self._encryption_algo = encryption_algo
+        # (second, timestamp hex, optional header hex), swapped as a whole
+        self._cached = (None, None, None)
+        self._sequences = OrderedDict()
+        self._max_connections = max_connections
+        self._lock = threading.Lock()
+
+    def _refresh(self, now):
+        optional_header = BobbOptionalHeaders(
+            timestamp=now,
+            hop_count=self._hop_count,
+            priority=self._priority,
+            encryption_algo=self._encryption_algo
+        )
+        self._cached = (now, f"{now:08x}", optional_header.build_optional_header().hex())
+        return self._cached
+
+    def next_sequence_number(self, connection_id):
+        """Returns the next sequence number for a connection, starting at 0."""
+        with self._lock:
+            sequence_number = (self._sequences.pop(connection_id, -1) + 1) & 0xFFFFFFFF
+            self._sequences[connection_id] = sequence_number
+            if len(self._sequences) > self._max_connections:
+                self._sequences.popitem(last=False)
+        return sequence_number
+
+    def build(self, connection_id):
+        """Returns the (X-Bobb-Header, X-Bobb-Optional-Header) hex values for the next response."""
+        now = int(time.time())
+        cached = self._cached
+        if cached[0] != now:
+            cached = self._refresh(now)
+        sequence_number = self.next_sequence_number(connection_id)
+        return f"{self._header_prefix}{sequence_number:08x}{cached[1]}", cached[2]
+
+    def stamp(self, response, connection_id):
+        bobb_header, optional_header = self.build(connection_id)
+        response.headers[X_BOBB_HEADER] = bobb_header
+        response.headers[X_BOBB_OPTIONAL_HEADER] = optional_header
+        return response
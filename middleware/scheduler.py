@@ -0,0 +1,265 @@
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from flask import g, request
+from werkzeug.wsgi import ClosingIterator
+
+from config.constants import (
+    DEFAULT_PRIORITY,
+    ERROR_SERVER_OVERLOADED,
+    SCHEDULER_EXEMPT_PATHS,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_MAX_QUEUE,
+    SCHEDULER_QUEUE_TIMEOUT,
+    SCHEDULER_WEIGHTS,
+    STATUS_SERVICE_UNAVAILABLE
+)
+from helpers.response_helper import error_response
+
+# Recent wait times kept per priority class for the p50/p99 in stats()
+WAIT_SAMPLES = 1024
+
+# Set in the WSGI environ while a request holds a slot
+SLOT_ENVIRON_KEY = "bobb.scheduler_slot"
+
+
+class _Waiter:
+    __slots__ = ("priority_class", "enqueued", "event", "admitted")
+
+    def __init__(self, priority_class, enqueued):
+        self.priority_class = priority_class
+        self.enqueued = enqueued
+        self.event = threading.Event()
+        self.admitted = False
+
+
+class _ClassStats:
+    __slots__ = ("admitted", "shed", "timed_out", "max_depth", "wait_total", "wait_max", "waits")
+
+    def __init__(self):
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+    def record_wait(self, wait):
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.waits.append(wait)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class PriorityScheduler:
+    """
+    Admission control and scheduling for request handlers.
+
+    At most max_concurrency requests run at once. The rest wait in one FIFO
+    queue per priority class; the optional header priority picks the class
+    (higher is more important, anything past the last class joins it). When a
+    slot frees up the next class is chosen by smooth weighted round robin, so
+    a class with weight 8 is served eight times as often as one with weight 1
+    while every class with waiters keeps making progress.
+
+    Under overload the queues hold at most max_queue requests in total. A new
+    request then pushes out the newest waiter of a lower class, and is itself
+    rejected only if nothing below it is queued. Waiters that are not admitted
+    within queue_timeout seconds give up. Both end in a 503.
+    """
+
+    def __init__(self, max_concurrency=SCHEDULER_MAX_CONCURRENCY, max_queue=SCHEDULER_MAX_QUEUE,
+                 queue_timeout=SCHEDULER_QUEUE_TIMEOUT, weights=SCHEDULER_WEIGHTS, clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.weights = tuple(weights)
+        self._clock = clock
+        self._queues = [deque() for _ in self.weights]
+        self._current = [0] * len(self.weights)
+        self._stats = [_ClassStats() for _ in self.weights]
+        self._active = 0
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def priority_class(self, priority):
+        return min(priority, len(self.weights) - 1)
+
+    def acquire(self, priority=DEFAULT_PRIORITY):
+        """Blocks until the request may run. Returns False if it was shed instead."""
+        priority_class = self.priority_class(priority)
+        stats = self._stats[priority_class]
+        with self._lock:
+            if self._active < self.max_concurrency and not self._queued:
+                self._active += 1
+                stats.admitted += 1
+                stats.record_wait(0.0)
+                return True
+            if self._queued >= self.max_queue and not self._evict_below(priority_class):
+                stats.shed += 1
+                return False
+            waiter = _Waiter(priority_class, self._clock())
+            queue = self._queues[priority_class]
+            queue.append(waiter)
+            self._queued += 1
+            stats.max_depth = max(stats.max_depth, len(queue))
+
+        waiter.event.wait(self.queue_timeout)
+
+        with self._lock:
+            stats.record_wait(self._clock() - waiter.enqueued)
+            if not waiter.event.is_set():
+                self._queues[priority_class].remove(waiter)
+                self._queued -= 1
+                stats.timed_out += 1
+                return False
+            return waiter.admitted
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self._dispatch()
+
+    def _evict_below(self, priority_class):
+        # The newest waiter of the lowest queued class has waited the least
+        for lower_class in range(priority_class):
+            queue = self._queues[lower_class]
+            if queue:
+                waiter = queue.pop()
+                self._queued -= 1
+                self._stats[lower_class].shed += 1
+                waiter.event.set()
+                return True
+        return False
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency and self._queued:
+            # Smooth weighted round robin over the classes that have waiters
+            total = 0
+            chosen = None
+            for priority_class, queue in enumerate(self._queues):
+                if queue:
+                    weight = self.weights[priority_class]
+                    self._current[priority_class] += weight
+                    total += weight
+                    if chosen is None or self._current[priority_class] > self._current[chosen]:
+                        chosen = priority_class
+            self._current[chosen] -= total
+
+            waiter = self._queues[chosen].popleft()
+            self._queued -= 1
+            self._active += 1
+            self._stats[chosen].admitted += 1
+            waiter.admitted = True
+            waiter.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            classes = {}
+            for priority_class, stats in enumerate(self._stats):
+                waits = sorted(stats.waits)
+                classes[priority_class] = {
+                    "weight": self.weights[priority_class],
+                    "queue_depth": len(self._queues[priority_class]),
+                    "max_queue_depth": stats.max_depth,
+                    "admitted": stats.admitted,
+                    "shed": stats.shed,
+                    "timed_out": stats.timed_out,
+                    "wait_seconds_total": stats.wait_total,
+                    "wait_seconds_max": stats.wait_max,
+                    "wait_seconds_p50": _percentile(waits, 0.50),
+                    "wait_seconds_p99": _percentile(waits, 0.99),
+                }
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "classes": classes,
+            }
+
+    def prometheus_samples(self):
+        """Queue and admission metrics in the collector format of helpers.metrics."""
+        stats = self.stats()
+        classes = stats["classes"].items()
+        return [
+            ("bobb_scheduler_active_requests", "gauge", "Requests currently holding a scheduler slot.",
+             [({}, stats["active"])]),
+            ("bobb_scheduler_queue_depth", "gauge", "Requests waiting for a slot.",
+             [({"priority_class": priority_class}, values["queue_depth"]) for priority_class, values in classes]),
+            ("bobb_scheduler_admitted_total", "counter", "Requests admitted.",
+             [({"priority_class": priority_class}, values["admitted"]) for priority_class, values in classes]),
+            ("bobb_scheduler_shed_total", "counter", "Requests shed with a 503.",
+             [({"priority_class": priority_class, "reason": "overload"}, values["shed"]) for priority_class, values in classes]
+             + [({"priority_class": priority_class, "reason": "timeout"}, values["timed_out"]) for priority_class, values in classes]),
+            ("bobb_scheduler_wait_seconds_total", "counter", "Time requests spent waiting for a slot.",
+             [({"priority_class": priority_class}, values["wait_seconds_total"]) for priority_class, values in classes]),
+        ]
+
+    def admit(self):
+        """
+        Request hook: waits for a slot using the priority from g.bobb_optional_header.
+        Returns None once admitted, otherwise a 503 response. The monitoring
+        endpoints in SCHEDULER_EXEMPT_PATHS are cheap and always run, so an
+        overloaded node can still be observed.
+        """
+        if request.path in SCHEDULER_EXEMPT_PATHS:
+            return None
+        optional_header = g.get("bobb_optional_header")
+        priority = optional_header.priority if optional_header is not None else DEFAULT_PRIORITY
+        if not self.acquire(priority):
+            response, status_code = error_response(ERROR_SERVER_OVERLOADED, STATUS_SERVICE_UNAVAILABLE)
+            return response, status_code, {"Retry-After": "1"}
+        request.environ[SLOT_ENVIRON_KEY] = True
+        return None
+
+    def release_unless_streamed(self, response):
+        """
+        after_request hook: frees the slot of a response whose body is already
+        built. A streamed body is produced after the request has been torn
+        down, so its slot is freed by SchedulerSlotMiddleware instead.
+        """
+        if not response.is_streamed:
+            self.release_slot(request.environ)
+
+    def release_slot(self, environ):
+        if environ.pop(SLOT_ENVIRON_KEY, False):
+            self.release()
+
+
+class SchedulerSlotMiddleware:
+    """
+    WSGI middleware freeing a request's scheduler slot once its response has
+    been closed, i.e. after the whole body was produced (or, for
+    wsgi.file_wrapper bodies the server sends itself, once the app returns).
+    """
+
+    def __init__(self, wsgi_app, scheduler):
+        self.wsgi_app = wsgi_app
+        self.scheduler = scheduler
+
+    def __call__(self, environ, start_response):
+        release = partial(self.scheduler.release_slot, environ)
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except BaseException:
+            release()
+            raise
+
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None and isinstance(file_wrapper, type) and isinstance(app_iter, file_wrapper):
+            # Keep the server's sendfile path intact
+            release()
+            return app_iter
+        return ClosingIterator(app_iter, release)
+
+
+scheduler = PriorityScheduler()
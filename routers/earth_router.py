@@ -1,9 +1,14 @@
-from flask import Blueprint
+from flask import Blueprint, Response
 
-from config.constants import SATELLITE_FUNCTION_DISASTER_IMAGING
-from controllers.create_header import create_header
-from middleware.header import check_headers
-import base64
+from controllers.capture_image import capture_image as capture_satellite_image, download_image as download_satellite_image
+from controllers.create_header import create_header, create_headers_batch
+from controllers.frames import frame_request
+from controllers.transfers import create_transfer, transfer_chunks
+from controllers.metrics import configure_profiler, metrics_endpoint, profiler_report
+from helpers.satellite_registry import get_registry
+from helpers.response_helper import create_response
+from middleware.header import require_bobb_headers
+from middleware.scheduler import scheduler
 
 router = Blueprint('main', __name__)
 
@@ -11,13 +16,14 @@ router = Blueprint('main', __name__)
 def create_custom_headers():
     return create_header()
 
+@router.route('/v1/create-header/batch', methods=['POST'])
+def create_custom_headers_batch():
+    return create_headers_batch()
+
 @router.route('/v1/satellites', methods=['GET'])
+@require_bobb_headers
 def get_satellites():
-    middleware = check_headers()
-    if middleware is not True:
-        return middleware
-
-    return {"satellites": [{"location": "Valencia", "ip": "2001:0000:130F:0000:0000:09C0:876A:130B", "function": "disaster-imaging"}, {"location": "Madrid", "ip": "2001:0000:130F:0000:0000:09C0:876A:130C", "function": "disaster-imaging"}, {"location": "Barcelona", "ip": "2001:0000:130F:0000:0000:09C0:876A:130D", "function": "disaster-imaging"}, {"location": "Sevilla", "ip": "2001:0000:130F:0000:0000:09C0:876A:130E", "function": "disaster-imaging"}, {"location": "Zaragoza", "ip": "2001:0000:130F:0000:0000:09C0:876A:130F", "function": "disaster-imaging"}, {"location": "Málaga", "ip": "2001:0000:130F:0000:0000:09C0:876A:1310", "function": "disaster-imaging"}, {"location": "Murcia", "ip": "2001:0000:130F:0000:0000:09C0:876A:1311", "function": "disaster-imaging"}, {"location": "Palma de Mallorca", "ip": "2001:0000:130F:0000:0000:09C0:876A:1312", "function": "disaster-imaging"}, {"location": "Las Palmas de Gran Canaria", "ip": "2001:0000:130F:0000:0000:09C0:876A:1313", "function": "disaster-imaging"}, {"location": "Bilbao", "ip": "2001:0000:130F:0000:0000:09C0:876A:1314", "function": "disaster-imaging"}]}
+    return Response(get_registry().json_body, mimetype="application/json")
 
 @router.route('/v1/satellites/<string:ip>/images', methods=['POST'])
 def capture_image(ip):
@@ -25,31 +31,36 @@ def capture_image(ip):
     # if middleware is not True:
     #     return middleware
 
-    satellites = {
-        "satellites": [
-        {"location": "Valencia", "ip": "2001:0000:130F:0000:0000:09C0:876A:130B", "function": "disaster-imaging"},
-        {"location": "Madrid", "ip": "2001:0000:130F:0000:0000:09C0:876A:130C", "function": "disaster-imaging"},
-        {"location": "Barcelona", "ip": "2001:0000:130F:0000:0000:09C0:876A:130D", "function": "disaster-imaging"},
-        {"location": "Sevilla", "ip": "2001:0000:130F:0000:0000:09C0:876A:130E", "function": "disaster-imaging"},
-        {"location": "Zaragoza", "ip": "2001:0000:130F:0000:0000:09C0:876A:130F", "function": "disaster-imaging"},
-        {"location": "Málaga", "ip": "2001:0000:130F:0000:0000:09C0:876A:1310", "function": "disaster-imaging"},
-        {"location": "Murcia", "ip": "2001:0000:130F:0000:0000:09C0:876A:1311", "function": "disaster-imaging"},
-        {"location": "Palma de Mallorca", "ip": "2001:0000:130F:0000:0000:09C0:876A:1312", "function": "disaster-imaging"},
-        {"location": "Las Palmas de Gran Canaria", "ip": "2001:0000:130F:0000:0000:09C0:876A:1313", "function": "disaster-imaging"},
-        {"location": "Bilbao", "ip": "2001:0000:130F:0000:0000:09C0:876A:1314", "function": "whale-tracking"}
-        ]
-    }
-
-    if ip not in [satellite["ip"] for satellite in satellites["satellites"]]:
-        return {"error": "Satellite not found"}, 404
-
-    satellite = [satellite for satellite in satellites["satellites"] if satellite["ip"] == ip][0]
-    if satellite["function"] != SATELLITE_FUNCTION_DISASTER_IMAGING:
-        return {"error": "Satellite can not take images", "status": "failure", "status_code": 400}, 400
-
-
-    with open("development/mar-menor.jpg", "rb") as image_file:
-        base64_bytes = base64.b64encode(image_file.read())
-        encoded_string = base64_bytes.decode()
-
-    return {"status":"success","image": encoded_string, "status_code": 200}
\ No newline at end of file
+    return capture_satellite_image(ip)
+
+@router.route('/v1/satellites/<string:ip>/images', methods=['GET'])
+def download_image(ip):
+    return download_satellite_image(ip)
+
+@router.route('/v1/satellites/<string:ip>/transfers', methods=['POST'])
+def start_transfer(ip):
+    return create_transfer(ip)
+
+@router.route('/v1/transfers/<string:transfer_id>/chunks', methods=['GET'])
+def get_transfer_chunks(transfer_id):
+    return transfer_chunks(transfer_id)
+
+@router.route('/v1/frames', methods=['POST'])
+def frames():
+    return frame_request()
+
+@router.route('/v1/scheduler', methods=['GET'])
+def scheduler_stats():
+    return create_response(scheduler.stats(), 200)
+
+@router.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return metrics_endpoint()
+
+@router.route('/metrics/profiler', methods=['GET'])
+def get_profiler_report():
+    return profiler_report()
+
+@router.route('/metrics/profiler', methods=['PUT'])
+def set_profiler():
+    return configure_profiler()
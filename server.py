@@ -0,0 +1,300 @@
+"""
+Production server for the satellite node.
+
+A parent process loads the config, the key pair and the satellite list once,
+then forks worker processes that serve the Flask app on one port. Workers
+inherit that state copy-on-write; gc.freeze() before each fork keeps the
+garbage collector from touching (and so copying) the inherited objects.
+
+By default the parent opens one listening socket that every worker accepts
+on. With --reuseport each worker binds its own socket with SO_REUSEPORT and
+the kernel spreads new connections across them.
+
+    python server.py --workers 4 --port 30001
+
+Signals to the parent:
+    SIGHUP          reload config and satellite list, start new workers, then drain the old ones
+    SIGTERM/SIGINT  drain every worker and exit
+
+Each worker keeps its own request scheduler, replay cache and metrics, so
+/metrics shows the worker that answered and a retransmit that reaches a
+different worker than the original is not recognised as a duplicate.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import ClosingIterator
+
+from config.config import get_config, reload_config
+from config.constants import SERVER_DRAIN_TIMEOUT, SERVER_LISTEN_BACKLOG, SERVER_PORT
+from helpers.image_cache import image_cache
+from helpers.satellite_registry import get_registry, reload_registry
+from main import app, start_node
+from utils.crypto_utils import ensure_keys
+
+# How often the parent checks on its workers
+SUPERVISOR_INTERVAL = 0.2  # seconds
+
+# A worker exiting sooner than this after it started is respawned with a delay
+MIN_WORKER_LIFETIME = 1.0  # seconds
+
+
+class InFlightCounter:
+    """WSGI middleware counting requests whose response body has not been sent yet."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _done(self):
+        with self._lock:
+            self.count -= 1
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.count += 1
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self._done()
+            raise
+        return ClosingIterator(app_iter, self._done)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Leaves out the per-request access log line."""
+
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+class PreforkWSGIServer(ThreadedWSGIServer):
+    multiprocess = True
+
+
+def listening_socket(host, port, reuseport=False, backlog=SERVER_LISTEN_BACKLOG):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuseport:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def serve_worker(app, listener, drain_timeout=SERVER_DRAIN_TIMEOUT, access_log=False):
+    """
+    Serves app on the listener until SIGTERM or SIGINT, then stops accepting and
+    waits up to drain_timeout for the requests in flight to finish.
+    """
+    counter = InFlightCounter(app)
+    host, port = listener.getsockname()[:2]
+    handler = WSGIRequestHandler if access_log else QuietRequestHandler
+    server = PreforkWSGIServer(host, port, counter, handler, fd=listener.fileno())
+    listener.close()
+    # Workers share the socket, so a worker woken for a connection another one
+    # accepted first must not block in accept()
+    server.socket.setblocking(False)
+
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() waits for serve_forever to return, so it cannot run on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    server.serve_forever()
+    server.socket.close()
+    deadline = time.monotonic() + drain_timeout
+    while counter.count > 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+class PreforkServer:
+    """Forks and supervises the worker processes."""
+
+    def __init__(self, app, host="::", port=SERVER_PORT, workers=None, reuseport=False,
+                 drain_timeout=SERVER_DRAIN_TIMEOUT, access_log=False, reload=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = workers or os.cpu_count() or 1
+        self.reuseport = reuseport
+        self.drain_timeout = drain_timeout
+        self.access_log = access_log
+        self.reload = reload
+        self.listener = None
+        self.workers = {}  # pid -> start time
+        self.retiring = set()
+        self._stopping = False
+        self._reload = False
+
+    def start(self):
+        if not self.reuseport:
+            self.listener = listening_socket(self.host, self.port)
+            self.port = self.listener.getsockname()[1]
+        for _ in range(self.worker_count):
+            self._spawn()
+
+    def _spawn(self):
+        if self.listener is not None:
+            listener = self.listener
+        else:
+            listener = listening_socket(self.host, self.port, reuseport=True)
+            self.port = listener.getsockname()[1]
+
+        # Whatever was loaded so far stays in pages shared with the workers
+        gc.collect()
+        gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            # The parent's handlers only set flags on the parent's copy of this object
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 0
+            try:
+                serve_worker(self.app, listener, self.drain_timeout, self.access_log)
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                # Never return into the parent's code, and skip its atexit handlers
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+
+        if listener is not self.listener:
+            listener.close()
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def reap(self):
+        """Collects exited workers and replaces the ones that exited unexpectedly."""
+        for pid in list(self.workers) + list(self.retiring):
+            try:
+                exited, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                exited, status = pid, 0
+            if exited == 0:
+                continue
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+
+            started = self.workers.pop(pid)
+            if self._stopping:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, starting a new one", file=sys.stderr)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                # Do not fork in a tight loop if workers die on startup
+                time.sleep(MIN_WORKER_LIFETIME)
+            self._spawn()
+
+    def restart_workers(self):
+        """Reloads the shared state, starts a full set of new workers, then drains and stops the old ones."""
+        if self.reload is not None:
+            self.reload()
+        old_workers = list(self.workers)
+        for _ in range(self.worker_count):
+            self._spawn()
+        for pid in old_workers:
+            self.workers.pop(pid, None)
+            self.retiring.add(pid)
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def stop(self):
+        """Drains every worker, killing the ones still running after the drain timeout."""
+        self._stopping = True
+        pids = list(self.workers) + list(self.retiring)
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.drain_timeout + 5
+        while (self.workers or self.retiring) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.workers) + list(self.retiring):
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+        self.retiring.clear()
+
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+    def serve_forever(self):
+        self.start()
+        print(f"Serving on {self.host} port {self.port} with {self.worker_count} workers (parent {os.getpid()})")
+        sys.stdout.flush()
+
+        def request_stop(signum, frame):
+            self._stopping = True
+
+        def request_reload(signum, frame):
+            self._reload = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_reload)
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    print("Reloading: starting new workers and draining the old ones")
+                    sys.stdout.flush()
+                    self.restart_workers()
+                self.reap()
+                time.sleep(SUPERVISOR_INTERVAL)
+        finally:
+            self.stop()
+
+
+def reload_node_state():
+    """Reads the config, key pair and satellite list again for the next workers."""
+    reload_config()
+    ensure_keys(get_config()["name"])
+    reload_registry()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the satellite node with several worker processes")
+    parser.add_argument("--host", default="::")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--reuseport", action="store_true", help="one SO_REUSEPORT socket per worker instead of a shared one")
+    parser.add_argument("--drain-timeout", type=float, default=SERVER_DRAIN_TIMEOUT)
+    parser.add_argument("--access-log", action="store_true", help="log every request")
+    parser.add_argument("--image-cache-dir", help="spill cached images to memory-mapped files here, shared by all workers")
+    args = parser.parse_args()
+
+    image_cache.spill_dir = args.image_cache_dir
+
+    # Loaded once here and inherited by every worker
+    start_node()
+    get_registry()
+    PreforkServer(
+        app, args.host, args.port, args.workers, args.reuseport,
+        args.drain_timeout, args.access_log, reload=reload_node_state
+    ).serve_forever()
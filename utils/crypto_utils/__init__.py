@@ -1,18 +1,54 @@
 # utils/crypto_utils/__init__.py
 from .key_management import (
 generate_keys,
+ensure_keys,
 read_private_key,
 read_public_key
 )
+from .cipher_session import (
+    CipherSession,
+    get_session
+)
+from .keyring import (
+    SharedKeyCache,
+    public_key_fingerprint
+)
+from .compression import (
+    available_codecs,
+    compress_chunk,
+    decompress_chunk
+)
 from .data_encryption import (
     derive_shared_key,
+    shared_key_cache,
     create_shared_key,
     encrypt_data,
     decrypt_data,
     encrypt_large_file,
+    iter_encrypted_chunks,
+    iter_encrypted_records,
+    iter_decrypted_records,
+    encrypted_stream_size,
     reassemble_file_from_chunks,
+    iter_decrypted_chunk_files,
+    iter_decrypted_chunks,
     encrypt_chunk,
     decrypt_chunk,
     encrypt_file_to_array,
     reconstruct_file_from_array
 )
+from .transfer import (
+    ChunkBitmap,
+    TransferManifest,
+    TransferReceiver,
+    build_manifest,
+    iter_transfer_records,
+    format_ranges,
+    parse_ranges
+)
+from .container import (
+    ContainerReader,
+    ContainerWriter,
+    encrypt_file_to_container,
+    decrypt_container_to_file
+)
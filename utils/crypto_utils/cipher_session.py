@@ -0,0 +1,86 @@
+# utils/crypto_utils/cipher_session.py
+import os
+import threading
+from functools import lru_cache
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+NONCE_SIZE = 12  # 96-bit AES-GCM nonce
+TAG_SIZE = 16
+NONCE_SPACE = 1 << (NONCE_SIZE * 8)
+
+# Number of sessions the module level helpers keep prepared
+SESSION_CACHE_SIZE = 64
+
+
+class CipherSession:
+    """
+    A prepared AES-GCM context for one key.
+
+    Nonces come from a 96-bit counter that starts at a random value, so no two
+    messages in a session share a nonce and separate sessions with the same key
+    are astronomically unlikely to overlap. The counter is reseeded after a fork
+    so worker processes that inherit a session never reuse each other's nonces.
+    """
+
+    def __init__(self, key: bytes):
+        self._aesgcm = AESGCM(key)
+        self._lock = threading.Lock()
+        self._seed()
+
+    def _seed(self):
+        self._pid = os.getpid()
+        self._counter = int.from_bytes(os.urandom(NONCE_SIZE), "big")
+
+    def next_nonce(self) -> bytes:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._seed()
+            counter = self._counter
+            self._counter = (counter + 1) % NONCE_SPACE
+        return counter.to_bytes(NONCE_SIZE, "big")
+
+    @staticmethod
+    def encrypted_size(length: int) -> int:
+        """Size of nonce + ciphertext + tag for a plaintext of the given length."""
+        return NONCE_SIZE + length + TAG_SIZE
+
+    def encrypt_chunk(self, data, associated_data=None) -> tuple:
+        """Returns (nonce, ciphertext + tag)."""
+        nonce = self.next_nonce()
+        return nonce, self._aesgcm.encrypt(nonce, data, associated_data)
+
+    def encrypt(self, data, associated_data=None) -> bytes:
+        """Returns nonce + ciphertext + tag as one message."""
+        nonce, encrypted_data = self.encrypt_chunk(data, associated_data)
+        return nonce + encrypted_data
+
+    def encrypt_into(self, buffer, data, offset=0, associated_data=None) -> int:
+        """
+        Writes nonce + ciphertext + tag into a caller supplied buffer at offset
+        and returns the number of bytes written.
+        """
+        nonce, encrypted_data = self.encrypt_chunk(data, associated_data)
+        end = offset + NONCE_SIZE + len(encrypted_data)
+        view = memoryview(buffer)
+        view[offset:offset + NONCE_SIZE] = nonce
+        view[offset + NONCE_SIZE:end] = encrypted_data
+        return end - offset
+
+    def decrypt_chunk(self, nonce, encrypted_data, associated_data=None) -> bytes:
+        return self._aesgcm.decrypt(nonce, encrypted_data, associated_data)
+
+    def decrypt(self, message, associated_data=None) -> bytes:
+        """Decrypts nonce + ciphertext + tag; the nonce and ciphertext are sliced without copying."""
+        view = memoryview(message)
+        return self._aesgcm.decrypt(view[:NONCE_SIZE], view[NONCE_SIZE:], associated_data)
+
+
+@lru_cache(maxsize=SESSION_CACHE_SIZE)
+def _cached_session(key: bytes) -> CipherSession:
+    return CipherSession(key)
+
+
+def get_session(key) -> CipherSession:
+    """Returns a prepared session for a key, reusing it across calls."""
+    return _cached_session(bytes(key))
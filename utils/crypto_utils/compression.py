@@ -0,0 +1,88 @@
+# utils/crypto_utils/compression.py
+"""
+Optional compression of chunks before they are encrypted. Ciphertext does not
+compress, so this is the last point where it can happen.
+
+compress_chunk first probes a sample from the middle of the chunk with a fast
+zlib pass. Chunks whose sample does not shrink (JPEGs, archives, encrypted
+data) are kept as they are and cost only the probe. The codec a chunk ends up
+with travels in its metadata and is authenticated as associated data (see
+codec_aad), so a chunk relabelled with another codec fails to decrypt.
+
+Codecs: "zlib" and "lzma" from the standard library, "zstd" when the
+zstandard package is installed.
+"""
+import lzma
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+CODEC_LZMA = "lzma"
+CODEC_ZSTD = "zstd"
+
+# Bytes of each chunk compressed to decide whether the whole chunk is worth it
+PROBE_SIZE = 4096
+
+# A chunk is compressed only if its probe shrinks below this fraction
+PROBE_RATIO = 0.9
+
+_COMPRESS = {
+    CODEC_ZLIB: lambda data: zlib.compress(data, 6),
+    CODEC_LZMA: lambda data: lzma.compress(data, preset=1),
+}
+_DECOMPRESS = {
+    CODEC_NONE: bytes,
+    CODEC_ZLIB: zlib.decompress,
+    CODEC_LZMA: lzma.decompress,
+}
+if zstandard is not None:
+    # Compressor objects are not safe to share between threads, and are cheap to create
+    _COMPRESS[CODEC_ZSTD] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+    _DECOMPRESS[CODEC_ZSTD] = lambda data: zstandard.ZstdDecompressor().decompress(data)
+
+
+def available_codecs():
+    """Codecs compress_chunk accepts in this environment."""
+    return tuple(_COMPRESS)
+
+
+def check_codec(codec):
+    if codec not in _COMPRESS:
+        raise ValueError(f"Unsupported compression codec {codec!r}, available: {', '.join(available_codecs())}")
+
+
+def compress_chunk(chunk_data, codec=CODEC_ZLIB):
+    """
+    Returns (codec, data): the chunk compressed with codec, or (CODEC_NONE,
+    chunk_data) when the probe or the result shows it does not shrink.
+    """
+    check_codec(codec)
+    if len(chunk_data) > PROBE_SIZE:
+        start = (len(chunk_data) - PROBE_SIZE) // 2
+        if len(zlib.compress(chunk_data[start:start + PROBE_SIZE], 1)) > PROBE_SIZE * PROBE_RATIO:
+            return CODEC_NONE, chunk_data
+    compressed = _COMPRESS[codec](chunk_data)
+    if len(compressed) >= len(chunk_data):
+        return CODEC_NONE, chunk_data
+    return codec, compressed
+
+
+def decompress_chunk(codec, data) -> bytes:
+    """Reverses compress_chunk. Raises ValueError for an unknown codec."""
+    try:
+        decompress = _DECOMPRESS[codec]
+    except KeyError:
+        raise ValueError(f"Unsupported compression codec {codec!r}")
+    return decompress(data)
+
+
+def codec_aad(codec, associated_data=None):
+    """Associated data of a chunk stored with codec; unchanged for uncompressed chunks."""
+    if codec == CODEC_NONE:
+        return associated_data
+    return (associated_data or b"") + b"codec:" + codec.encode()
@@ -0,0 +1,207 @@
+# utils/crypto_utils/container.py
+"""
+Single-file container for chunk-encrypted data.
+
+Layout:
+    header   magic (8s) | version (H) | reserved (H) | chunk_size (I) | footer_offset (Q)
+    payloads AES-GCM ciphertext of every chunk, without its tag, back to back
+    index    one fixed-size entry per chunk: offset (Q) | length (I) | nonce (12s) | tag (16s)
+    footer   index_offset (Q) | chunk_count (Q) | magic (8s)
+
+Chunks are appended without touching what is already committed: an
+appending writer writes the new payloads after the current footer, then a
+complete new index and footer, syncs them, and only then points
+footer_offset in the header at the new footer. A crash before that last
+write leaves the header pointing at the old, intact footer; the unfinished
+tail is cut off by the next writer. The index and footer of earlier appends
+stay behind as unused bytes. Entry i lives at index_offset + i *
+INDEX_ENTRY_SIZE, which gives O(1) access to any chunk.
+"""
+import mmap
+import os
+import struct
+
+from utils.crypto_utils.data_encryption import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WORKERS,
+    decrypt_chunk,
+    encrypt_chunk,
+    iter_encrypted_chunks
+)
+
+CONTAINER_MAGIC = b"BOBBENC\0"
+CONTAINER_VERSION = 2
+
+HEADER_STRUCT = struct.Struct("!8sHHIQ")
+FOOTER_OFFSET_STRUCT = struct.Struct("!Q")
+# footer_offset is the last field of the header
+FOOTER_OFFSET_POSITION = HEADER_STRUCT.size - FOOTER_OFFSET_STRUCT.size
+INDEX_ENTRY_STRUCT = struct.Struct("!QI12s16s")
+FOOTER_STRUCT = struct.Struct("!QQ8s")
+
+INDEX_ENTRY_SIZE = INDEX_ENTRY_STRUCT.size  # 40 bytes
+TAG_SIZE = 16
+
+
+def _read_footer(file, file_size):
+    """Returns (chunk_size, index_offset, chunk_count, footer_offset) of the last committed footer."""
+    if file_size < HEADER_STRUCT.size + FOOTER_STRUCT.size:
+        raise ValueError("File is too small to be a container")
+    file.seek(0)
+    magic, version, _, chunk_size, footer_offset = HEADER_STRUCT.unpack(file.read(HEADER_STRUCT.size))
+    if magic != CONTAINER_MAGIC:
+        raise ValueError("Not an encrypted container")
+    if version != CONTAINER_VERSION:
+        raise ValueError(f"Unsupported container version {version}, expected {CONTAINER_VERSION}")
+    if footer_offset == 0:
+        raise ValueError("Container was never closed")
+    if footer_offset + FOOTER_STRUCT.size > file_size:
+        raise ValueError("Container footer is past the end of the file")
+    file.seek(footer_offset)
+    index_offset, chunk_count, magic = FOOTER_STRUCT.unpack(file.read(FOOTER_STRUCT.size))
+    if magic != CONTAINER_MAGIC or index_offset + chunk_count * INDEX_ENTRY_SIZE != footer_offset:
+        raise ValueError("Container footer is corrupt")
+    return chunk_size, index_offset, chunk_count, footer_offset
+
+
+class ContainerWriter:
+    """
+    Appends encrypted chunks to a container file. Opening an existing
+    container continues after its last committed chunk; the chunks are
+    committed by close().
+    """
+
+    def __init__(self, path, key, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.key = key
+        self.index = []
+        if os.path.exists(path):
+            self.file = open(path, "r+b")
+            try:
+                self.chunk_size, index_offset, chunk_count, footer_offset = _read_footer(
+                    self.file, os.path.getsize(path)
+                )
+            except Exception:
+                self.file.close()
+                raise
+            self.file.seek(index_offset)
+            index_data = self.file.read(chunk_count * INDEX_ENTRY_SIZE)
+            self.index = list(INDEX_ENTRY_STRUCT.iter_unpack(index_data))
+            # Drops whatever an interrupted writer left after the committed footer
+            self.file.truncate(footer_offset + FOOTER_STRUCT.size)
+            self.file.seek(footer_offset + FOOTER_STRUCT.size)
+        else:
+            self.file = open(path, "wb")
+            self.chunk_size = chunk_size
+            self.file.write(HEADER_STRUCT.pack(CONTAINER_MAGIC, CONTAINER_VERSION, 0, chunk_size, 0))
+
+    def __len__(self):
+        return len(self.index)
+
+    def append(self, chunk_data):
+        """Encrypts and appends one chunk, returning its chunk id."""
+        iv, encrypted_chunk = encrypt_chunk(chunk_data, self.key)
+        return self.append_encrypted(iv, encrypted_chunk)
+
+    def append_encrypted(self, iv, encrypted_chunk):
+        """Appends a chunk that was already encrypted with AES-GCM (ciphertext + tag)."""
+        encrypted_chunk = memoryview(encrypted_chunk)
+        ciphertext, tag = encrypted_chunk[:-TAG_SIZE], encrypted_chunk[-TAG_SIZE:]
+        offset = self.file.tell()
+        self.file.write(ciphertext)
+        self.index.append((offset, len(ciphertext), bytes(iv), bytes(tag)))
+        return len(self.index) - 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        index_data = bytearray(len(self.index) * INDEX_ENTRY_SIZE)
+        for position, entry in enumerate(self.index):
+            INDEX_ENTRY_STRUCT.pack_into(index_data, position * INDEX_ENTRY_SIZE, *entry)
+        footer_offset = index_offset + len(index_data)
+        self.file.write(index_data)
+        self.file.write(FOOTER_STRUCT.pack(index_offset, len(self.index), CONTAINER_MAGIC))
+        self.file.flush()
+        # The new footer must be on disk before the header points at it
+        os.fsync(self.file.fileno())
+        os.pwrite(self.file.fileno(), FOOTER_OFFSET_STRUCT.pack(footer_offset), FOOTER_OFFSET_POSITION)
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ContainerReader:
+    """Reads and decrypts chunks from a container through a read-only mmap."""
+
+    def __init__(self, path, key):
+        self.key = key
+        self.file = open(path, "rb")
+        try:
+            self.chunk_size, self.index_offset, self.chunk_count, _ = _read_footer(self.file, os.path.getsize(path))
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+
+    def __len__(self):
+        return self.chunk_count
+
+    def entry(self, chunk_id):
+        """Returns (offset, length, nonce, tag) for a chunk."""
+        if not 0 <= chunk_id < self.chunk_count:
+            raise IndexError(f"Chunk {chunk_id} out of range")
+        return INDEX_ENTRY_STRUCT.unpack_from(self.data, self.index_offset + chunk_id * INDEX_ENTRY_SIZE)
+
+    def read_encrypted(self, chunk_id):
+        """Returns (iv, ciphertext + tag) for a chunk without decrypting it."""
+        offset, length, nonce, tag = self.entry(chunk_id)
+        # Copy the payload straight out of the mapping next to its tag
+        encrypted_chunk = bytearray(length + TAG_SIZE)
+        with memoryview(self.data) as view:
+            encrypted_chunk[:length] = view[offset:offset + length]
+        encrypted_chunk[length:] = tag
+        return nonce, encrypted_chunk
+
+    def read_chunk(self, chunk_id):
+        return decrypt_chunk(*self.read_encrypted(chunk_id), self.key)
+
+    def __iter__(self):
+        for chunk_id in range(self.chunk_count):
+            yield self.read_chunk(chunk_id)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def encrypt_file_to_container(file_path, container_path, key, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS,
+                              append=False):
+    """
+    Encrypts a file into a single container file. Raises FileExistsError if the
+    container exists, unless append is True, in which case the file's chunks are
+    added after the ones already in it.
+    """
+    if not append and os.path.exists(container_path):
+        raise FileExistsError(f"Container {container_path} already exists")
+    with ContainerWriter(container_path, key, chunk_size) as writer:
+        for _, iv, encrypted_chunk in iter_encrypted_chunks(file_path, key, writer.chunk_size, workers):
+            writer.append_encrypted(iv, encrypted_chunk)
+
+
+def decrypt_container_to_file(container_path, output_file, key):
+    """Decrypts every chunk of a container, in order, into output_file."""
+    with ContainerReader(container_path, key) as reader, open(output_file, "wb") as file:
+        for decrypted_chunk in reader:
+            file.write(decrypted_chunk)
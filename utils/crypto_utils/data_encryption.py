@@ -1,24 +1,35 @@
 
 # utils/crypto_utils/data_encryption.py
 import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import x25519
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from utils.crypto_utils import read_private_key, read_public_key
+from utils.crypto_utils.cipher_session import CipherSession, get_session
+from utils.crypto_utils.compression import CODEC_NONE, check_codec, codec_aad, compress_chunk, decompress_chunk
+from utils.crypto_utils.keyring import SharedKeyCache
 
 # Default chunk size in bytes (configurable)
 DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MB
 
+# Default number of threads encrypting chunks in parallel (AES-GCM releases the GIL)
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Default number of chunks that may arrive ahead of a missing one
+DEFAULT_REORDER_WINDOW = 16
+
+# Length prefix of each record in an encrypted stream
+RECORD_LENGTH = struct.Struct("!I")
+
+# Associated data of a stream chunk: chunk id and plaintext size of the whole stream
+STREAM_CHUNK_AAD = struct.Struct("!QQ")
+
 # Derive shared key function
 def derive_shared_key(private_key_filename: str, peer_public_key_filename: str) -> bytes:
-    """Reads keys from files and creates a shared key."""
-    # Read private and public keys using the functions from key_management.py
-    private_key = read_private_key(private_key_filename)
-    peer_public_key = read_public_key(peer_public_key_filename)
-
-    # Create shared key using the private and public keys
-    return create_shared_key(private_key, peer_public_key)
+    """Reads keys from files and creates a shared key. Cached until either key file changes on disk."""
+    return shared_key_cache.get_from_files(private_key_filename, peer_public_key_filename)
     
 def create_shared_key(private_key: x25519.X25519PrivateKey, peer_public_key: x25519.X25519PublicKey) -> bytes:
     """Creates a shared key using ECDH and derives a symmetric AES key."""
@@ -35,19 +46,16 @@ def create_shared_key(private_key: x25519.X25519PrivateKey, peer_public_key: x25
 
     return derived_key
 
+# Process-wide cache of derived keys used by derive_shared_key
+shared_key_cache = SharedKeyCache(create_shared_key)
+
 # Encrypt data function
 def encrypt_data(data: bytes, key: bytes) -> bytes:
-    iv = os.urandom(12)
-    aesgcm = AESGCM(key)
-    encrypted_data = aesgcm.encrypt(iv, data, None)
-    return iv + encrypted_data
+    return get_session(key).encrypt(data)
 
 # Decrypt data function
 def decrypt_data(encrypted_data: bytes, key: bytes) -> bytes:
-    iv = encrypted_data[:12]
-    ciphertext = encrypted_data[12:]
-    aesgcm = AESGCM(key)
-    return aesgcm.decrypt(iv, ciphertext, None)
+    return get_session(key).decrypt(encrypted_data)
 
 # Split file function
 def split_file(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
@@ -64,63 +72,202 @@ def split_file(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
 # Encrypt a single chunk function
 def encrypt_chunk(chunk_data, key):
     """Encrypts a file chunk using AES-GCM and returns encrypted data with IV."""
-    iv = os.urandom(12)
-    aesgcm = AESGCM(key)
-    encrypted_chunk = aesgcm.encrypt(iv, chunk_data, None)
-    return iv, encrypted_chunk  # Return iv and encrypted chunk as a tuple
+    return get_session(key).encrypt_chunk(chunk_data)  # Return iv and encrypted chunk as a tuple
+
+def decrypt_chunk(iv, encrypted_chunk, key, codec=CODEC_NONE):
+    """Decrypts a file chunk using AES-GCM and returns the decrypted data, decompressed if it was stored with a codec."""
+    return decompress_chunk(codec, get_session(key).decrypt_chunk(iv, encrypted_chunk, codec_aad(codec)))
+
+# Encrypt a file chunk by chunk on a thread pool
+def iter_encrypted_chunks(file_path, key, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS, associated_data=None,
+                          chunk_ids=None, compression=None):
+    """
+    Reads and encrypts a file on a bounded thread pool and yields
+    (chunk_id, iv, encrypted_chunk) in chunk order.
+
+    Each worker reads its own chunk with os.pread and encrypts it with a shared
+    CipherSession. At most 2 * workers chunks are in flight, so memory stays
+    bounded while the caller writes results out. workers=1 runs inline.
+    associated_data(chunk_id), if given, returns the data each chunk is
+    authenticated with. chunk_ids, if given, limits the output to those chunks,
+    in that order. compression, if given, names the codec chunks are compressed
+    with before encryption (see compression.py); each result then carries the
+    codec the chunk was stored with as a fourth item.
+    """
+    session = get_session(key)
+    if compression is not None:
+        check_codec(compression)
 
-def decrypt_chunk(iv, encrypted_chunk, key):
-    """Decrypts a file chunk using AES-GCM and returns the decrypted data."""
-    aesgcm = AESGCM(key)
-    return aesgcm.decrypt(iv, encrypted_chunk, None)
+    def encrypt(chunk_id, chunk_data):
+        aad = associated_data(chunk_id) if associated_data else None
+        if compression is None:
+            return session.encrypt_chunk(chunk_data, aad)
+        codec, chunk_data = compress_chunk(chunk_data, compression)
+        return (*session.encrypt_chunk(chunk_data, codec_aad(codec, aad)), codec)
+
+    if workers <= 1 and chunk_ids is None:
+        for chunk_id, chunk_data in split_file(file_path, chunk_size):
+            yield (chunk_id, *encrypt(chunk_id, chunk_data))
+        return
+
+    def read_and_encrypt(fd, chunk_id):
+        return encrypt(chunk_id, os.pread(fd, chunk_size, chunk_id * chunk_size))
+
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        if chunk_ids is None:
+            chunk_ids = range((os.fstat(fd).st_size + chunk_size - 1) // chunk_size)
+        if workers <= 1:
+            for chunk_id in chunk_ids:
+                yield (chunk_id, *read_and_encrypt(fd, chunk_id))
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk_id in chunk_ids:
+                pending.append((chunk_id, pool.submit(read_and_encrypt, fd, chunk_id)))
+                if len(pending) >= workers * 2:
+                    done_id, future = pending.popleft()
+                    yield (done_id, *future.result())
+            while pending:
+                done_id, future = pending.popleft()
+                yield (done_id, *future.result())
+    finally:
+        os.close(fd)
+
+def stream_chunk_aad(chunk_id, total_size):
+    """Binds a stream chunk to its position and the stream size, so reordered or truncated streams fail to decrypt."""
+    return STREAM_CHUNK_AAD.pack(chunk_id, total_size)
+
+def encrypted_stream_size(total_size, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bytes iter_encrypted_records produces for a file of total_size bytes."""
+    chunk_count = (total_size + chunk_size - 1) // chunk_size
+    return total_size + chunk_count * (RECORD_LENGTH.size + CipherSession.encrypted_size(0))
+
+def iter_encrypted_records(file_path, key, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Encrypts a file into a stream of length-prefixed records
+    [4-byte length][12-byte IV][ciphertext + tag], one per chunk, as it is read.
+    Each record is yielded as (length prefix + IV, ciphertext + tag) so the large
+    part is never copied. Chunks are authenticated with stream_chunk_aad.
+    """
+    total_size = os.path.getsize(file_path)
+    chunks = iter_encrypted_chunks(
+        file_path, key, chunk_size, workers,
+        associated_data=lambda chunk_id: stream_chunk_aad(chunk_id, total_size)
+    )
+    for chunk_id, iv, encrypted_chunk in chunks:
+        yield RECORD_LENGTH.pack(len(iv) + len(encrypted_chunk)) + iv, encrypted_chunk
+
+def iter_decrypted_records(read, key, total_size, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decrypts a stream written by iter_encrypted_records, reading it with
+    read(n) (e.g. a file's or response's read), and yields the plaintext chunks.
+    Raises ValueError if the stream ends early and InvalidTag if it was altered.
+    """
+    session = get_session(key)
+    chunk_count = (total_size + chunk_size - 1) // chunk_size
+    for chunk_id in range(chunk_count):
+        prefix = read(RECORD_LENGTH.size)
+        if len(prefix) < RECORD_LENGTH.size:
+            raise ValueError(f"Stream ended before chunk {chunk_id}")
+        length, = RECORD_LENGTH.unpack(prefix)
+        record = read(length)
+        if len(record) < length:
+            raise ValueError(f"Stream ended inside chunk {chunk_id}")
+        yield session.decrypt(record, stream_chunk_aad(chunk_id, total_size))
 
 # Encrypt and split large file
-def encrypt_large_file(file_path, key, output_dir="encrypted_chunks", chunk_size=DEFAULT_CHUNK_SIZE):
-    """Splits, encrypts, and saves a large file in chunks."""
+def encrypt_large_file(file_path, key, output_dir="encrypted_chunks", chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS,
+                       compression=None):
+    """
+    Splits, encrypts, and saves a large file in chunks, encrypting up to `workers` chunks in parallel.
+    Compressed chunks are saved as chunk_N.<codec>.enc.
+    """
     os.makedirs(output_dir, exist_ok=True)
-    for chunk_id, chunk_data in split_file(file_path, chunk_size):
-        iv, encrypted_chunk = encrypt_chunk(chunk_data, key)  # Unpack iv and encrypted_chunk from encrypt_chunk
-        chunk_filename = os.path.join(output_dir, f"chunk_{chunk_id}.enc")
+    chunk_count = 0
+    for chunk_id, iv, encrypted_chunk, *codec in iter_encrypted_chunks(file_path, key, chunk_size, workers,
+                                                                       compression=compression):
+        suffix = f".{codec[0]}" if codec and codec[0] != CODEC_NONE else ""
+        chunk_filename = os.path.join(output_dir, f"chunk_{chunk_id}{suffix}.enc")
         with open(chunk_filename, "wb") as chunk_file:
-            chunk_file.write(iv + encrypted_chunk)  # Combine iv and encrypted data as a byte sequence
-        print(f"Chunk {chunk_id} encrypted and saved to {chunk_filename}.")
-        
+            chunk_file.write(iv)
+            chunk_file.write(encrypted_chunk)
+        chunk_count += 1
+    print(f"{chunk_count} chunks encrypted and saved to {output_dir}.")
+
+def iter_decrypted_chunk_files(chunk_dir, key):
+    """Decrypts the chunk_N.enc files in chunk_dir one at a time and yields the plaintext in chunk order."""
+    chunk_file_names = sorted(os.listdir(chunk_dir), key=lambda x: int(x.split('_')[1].split('.')[0]))
+    session = get_session(key)
+    for chunk_file_name in chunk_file_names:
+        name_parts = chunk_file_name.split('.')
+        codec = name_parts[1] if len(name_parts) == 3 else CODEC_NONE
+        with open(os.path.join(chunk_dir, chunk_file_name), "rb") as chunk_file:
+            # IV followed by the encrypted data, split without copying
+            yield decompress_chunk(codec, session.decrypt(chunk_file.read(), codec_aad(codec)))
+
 def reassemble_file_from_chunks(output_file, chunk_dir, key):
-    """Takes an array of encrypted chunks and reconstructs the original file by decrypting each chunk, ordered by chunk_id."""
-    # Sort encrypted_chunks by chunk_id to ensure correct order
-    encrypted_chunks = sorted(os.listdir(chunk_dir), key=lambda x: int(x.split('_')[1].split('.')[0]))
-    
+    """Takes a directory of encrypted chunk files and reconstructs the original file by decrypting each chunk, ordered by chunk_id."""
     with open(output_file, "wb") as file:
-        for chunk_file_name in encrypted_chunks:
-            chunk_path = os.path.join(chunk_dir, chunk_file_name)
-            with open(chunk_path, "rb") as chunk_file:
-                iv = chunk_file.read(12)  # Read the IV first
-                encrypted_chunk = chunk_file.read()  # Read the remaining encrypted data
-                decrypted_chunk = decrypt_chunk(iv, encrypted_chunk, key)  # Pass both iv and encrypted_chunk
-                file.write(decrypted_chunk)
+        for decrypted_chunk in iter_decrypted_chunk_files(chunk_dir, key):
+            file.write(decrypted_chunk)
     print(f"File successfully reconstructed and saved as {output_file}")
 
-def encrypt_file_to_array(file_path, key, chunk_size=DEFAULT_CHUNK_SIZE):
-    """Encrypts a file into chunks and returns an array with each chunk's encrypted data, IV, and chunk number."""
-    encrypted_chunks = []
-    with open(file_path, "rb") as file:
-        chunk_id = 0
-        while True:
-            chunk_data = file.read(chunk_size)
-            if not chunk_data:
-                break
-            iv, encrypted_chunk = encrypt_chunk(chunk_data, key)
-            encrypted_chunks.append({"chunk_id": chunk_id, "iv": iv, "data": encrypted_chunk})
-            chunk_id += 1
-    return encrypted_chunks
+def iter_decrypted_chunks(encrypted_chunks, key, window=DEFAULT_REORDER_WINDOW):
+    """
+    Decrypts chunks ({"chunk_id", "iv", "data"} dicts) as they arrive, in any order,
+    and yields the plaintext in chunk_id order.
+
+    Chunks with a "codec" are decompressed after decryption. Chunks that arrive
+    early wait in a reorder buffer. A chunk more than `window`
+    ids ahead of the next expected one raises ValueError, so memory is bounded by
+    the window rather than the file size. Duplicate chunks and chunks still missing
+    at the end also raise ValueError.
+    """
+    session = get_session(key)
+
+    def decrypt(chunk):
+        codec = chunk.get("codec", CODEC_NONE)
+        return decompress_chunk(codec, session.decrypt_chunk(chunk["iv"], chunk["data"], codec_aad(codec)))
+
+    pending = {}
+    next_chunk_id = 0
+    for chunk in encrypted_chunks:
+        chunk_id = chunk["chunk_id"]
+        if chunk_id < next_chunk_id or chunk_id in pending:
+            raise ValueError(f"Duplicate chunk {chunk_id}")
+        if chunk_id - next_chunk_id >= window:
+            raise ValueError(f"Chunk {chunk_id} is outside the reorder window while waiting for chunk {next_chunk_id}")
+        if chunk_id != next_chunk_id:
+            pending[chunk_id] = chunk
+            continue
+
+        yield decrypt(chunk)
+        next_chunk_id += 1
+        while next_chunk_id in pending:
+            yield decrypt(pending.pop(next_chunk_id))
+            next_chunk_id += 1
+
+    if pending:
+        raise ValueError(f"Missing chunk {next_chunk_id}")
+
+def encrypt_file_to_array(file_path, key, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS, compression=None):
+    """
+    Encrypts a file into chunks and returns an array with each chunk's encrypted data, IV, and chunk number.
+    With compression, each chunk also records the "codec" it was stored with.
+    """
+    chunks = iter_encrypted_chunks(file_path, key, chunk_size, workers, compression=compression)
+    if compression is None:
+        return [{"chunk_id": chunk_id, "iv": iv, "data": encrypted_chunk} for chunk_id, iv, encrypted_chunk in chunks]
+    return [
+        {"chunk_id": chunk_id, "iv": iv, "data": encrypted_chunk, "codec": codec}
+        for chunk_id, iv, encrypted_chunk, codec in chunks
+    ]
 
 def reconstruct_file_from_array(encrypted_chunks, output_file, key):
     """Takes an array of encrypted chunks and reconstructs the original file by decrypting each chunk, ordered by chunk_id."""
-    # Sort encrypted_chunks by chunk_id to ensure correct order
-    encrypted_chunks = sorted(encrypted_chunks, key=lambda x: x["chunk_id"])
-    
+    # The whole array is already in memory, so the reorder window can span all of it
     with open(output_file, "wb") as file:
-        for chunk in encrypted_chunks:
-            decrypted_chunk = decrypt_chunk(chunk["iv"], chunk["data"], key)
+        for decrypted_chunk in iter_decrypted_chunks(encrypted_chunks, key, window=max(len(encrypted_chunks), 1)):
             file.write(decrypted_chunk)
     print(f"File successfully reconstructed and saved as {output_file}")
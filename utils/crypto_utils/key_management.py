@@ -35,6 +35,26 @@ def generate_keys(satellite_name: str, key_dir="keys"):
     
     print(f"Keys for '{satellite_name}' generated and saved to '{key_dir}' directory as '{satellite_name}_private_key.pem' and '{satellite_name}_public_key.pem'")
 
+def ensure_keys(satellite_name: str, key_dir="keys") -> bool:
+    """
+    Reuses the satellite's key pair if both PEM files exist and belong together,
+    otherwise generates a new one. Returns True if the keys were generated.
+    """
+    private_key_path = os.path.join(key_dir, f"{satellite_name}_private_key.pem")
+    public_key_path = os.path.join(key_dir, f"{satellite_name}_public_key.pem")
+
+    try:
+        private_key = read_private_key(private_key_path)
+        public_key = read_public_key(public_key_path)
+        raw = serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        if private_key.public_key().public_bytes(*raw) == public_key.public_bytes(*raw):
+            return False
+    except (OSError, ValueError):
+        pass
+
+    generate_keys(satellite_name, key_dir)
+    return True
+
 def read_private_key(private_key_filename: str) -> x25519.X25519PrivateKey:
     """Reads the private key from the specified file."""
     with open(private_key_filename, "rb") as private_file:
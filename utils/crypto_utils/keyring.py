@@ -0,0 +1,150 @@
+# utils/crypto_utils/keyring.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import x25519
+from utils.crypto_utils.key_management import read_private_key, read_public_key
+
+# Default number of derived keys kept in memory
+DEFAULT_KEY_CACHE_SIZE = 256
+
+
+def public_key_fingerprint(public_key: x25519.X25519PublicKey) -> bytes:
+    """SHA-256 of the raw 32-byte public key."""
+    return hashlib.sha256(public_key.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )).digest()
+
+
+def private_key_id(private_key: x25519.X25519PrivateKey) -> bytes:
+    """Identifies an own key without the scalar multiplication public_key() would need."""
+    return hashlib.sha256(private_key.private_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PrivateFormat.Raw,
+        encryption_algorithm=serialization.NoEncryption()
+    )).digest()
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class SharedKeyCache:
+    """
+    Bounded LRU cache of derived shared keys, keyed by (own key, peer public key fingerprint).
+
+    derive is the function that turns (private_key, peer_public_key) into a
+    symmetric key. With a ttl (seconds) entries are re-derived once they are
+    older than the ttl. Keys loaded through get_from_files are re-read when
+    either file changes on disk (inode, size or mtime).
+    """
+
+    def __init__(self, derive, maxsize=DEFAULT_KEY_CACHE_SIZE, ttl=None, clock=time.monotonic):
+        self._derive = derive
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._keys = OrderedDict()   # (own id, peer fingerprint) -> (shared key, created)
+        self._files = OrderedDict()  # (private path, public path) -> (signatures, cache key)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, cache_key):
+        with self._lock:
+            entry = self._keys.get(cache_key)
+            if entry is not None:
+                shared_key, created = entry
+                if self._ttl is None or self._clock() - created < self._ttl:
+                    self._keys.move_to_end(cache_key)
+                    self.hits += 1
+                    return shared_key
+                del self._keys[cache_key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def _store(self, cache_key, shared_key):
+        with self._lock:
+            self._keys[cache_key] = (shared_key, self._clock())
+            self._keys.move_to_end(cache_key)
+            while len(self._keys) > self._maxsize:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, private_key: x25519.X25519PrivateKey, peer_public_key: x25519.X25519PublicKey) -> bytes:
+        """Returns the shared key for a key pair, deriving it on a miss."""
+        cache_key = (private_key_id(private_key), public_key_fingerprint(peer_public_key))
+        shared_key = self._lookup(cache_key)
+        if shared_key is None:
+            shared_key = self._derive(private_key, peer_public_key)
+            self._store(cache_key, shared_key)
+        return shared_key
+
+    def get_from_files(self, private_key_filename: str, peer_public_key_filename: str) -> bytes:
+        """
+        Returns the shared key for two key files. While neither file changes only
+        two stat calls are made; the PEM files are not read or parsed again.
+        """
+        files_key = (private_key_filename, peer_public_key_filename)
+        signatures = (_file_signature(private_key_filename), _file_signature(peer_public_key_filename))
+
+        with self._lock:
+            known = self._files.get(files_key)
+        if known is not None and known[0] == signatures:
+            shared_key = self._lookup(known[1])
+            if shared_key is not None:
+                return shared_key
+        else:
+            if known is not None:
+                # A key file changed on disk, forget what it was derived into
+                self.invalidate(known[1])
+            with self._lock:
+                self.misses += 1
+
+        private_key = read_private_key(private_key_filename)
+        peer_public_key = read_public_key(peer_public_key_filename)
+        cache_key = (private_key_id(private_key), public_key_fingerprint(peer_public_key))
+        shared_key = self._derive(private_key, peer_public_key)
+        self._store(cache_key, shared_key)
+
+        with self._lock:
+            self._files[files_key] = (signatures, cache_key)
+            self._files.move_to_end(files_key)
+            while len(self._files) > self._maxsize:
+                self._files.popitem(last=False)
+        return shared_key
+
+    def invalidate(self, cache_key=None, peer_fingerprint=None):
+        """Drops one entry, every entry for a peer fingerprint, or everything when called without arguments."""
+        with self._lock:
+            if cache_key is None and peer_fingerprint is None:
+                self._keys.clear()
+                self._files.clear()
+                return
+            if cache_key is not None:
+                self._keys.pop(cache_key, None)
+            if peer_fingerprint is not None:
+                for key in [key for key in self._keys if key[1] == peer_fingerprint]:
+                    del self._keys[key]
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._keys),
+            }
@@ -0,0 +1,303 @@
+# utils/crypto_utils/transfer.py
+"""
+Resumable chunked transfers.
+
+The sender describes a file with a TransferManifest: its size, the chunk size
+and a SHA-256 digest per chunk. The transfer id is derived from those, so the
+same file gets the same id on every run of either side.
+
+Chunks travel as records:
+    chunk_id (I) | length (I) | IV (12s) | ciphertext + tag
+in any order and for any subset of chunks. Each chunk is authenticated with
+the transfer id, its chunk id and the file size.
+
+The receiver writes each verified chunk into place in a partial file and
+keeps a bitmap of received chunks next to it, so after a dropped connection
+or a restart it asks for the missing ranges only.
+"""
+import hashlib
+import json
+import os
+import struct
+from typing import NamedTuple, Tuple
+
+from cryptography.exceptions import InvalidTag
+
+from utils.crypto_utils.cipher_session import CipherSession, get_session
+from utils.crypto_utils.data_encryption import DEFAULT_WORKERS, iter_encrypted_chunks, split_file
+
+# Default plaintext bytes per transfer chunk; small enough that a lost chunk is cheap to resend
+DEFAULT_TRANSFER_CHUNK_SIZE = 64 * 1024
+
+TRANSFER_RECORD = struct.Struct("!II")
+TRANSFER_AAD = struct.Struct("!16sQQ")
+MANIFEST_ID_STRUCT = struct.Struct("!QI")
+
+TRANSFER_ID_LENGTH = 16  # bytes, sent as 32 hex characters
+DIGEST_SIZE = 32
+
+
+class TransferManifest(NamedTuple):
+    transfer_id: str
+    file_size: int
+    chunk_size: int
+    digests: Tuple[bytes, ...]
+
+    @property
+    def chunk_count(self):
+        return len(self.digests)
+
+    def chunk_length(self, chunk_id):
+        return min(self.chunk_size, self.file_size - chunk_id * self.chunk_size)
+
+    def to_dict(self):
+        return {
+            "transfer_id": self.transfer_id,
+            "file_size": self.file_size,
+            "chunk_size": self.chunk_size,
+            "chunk_count": self.chunk_count,
+            "digests": [digest.hex() for digest in self.digests],
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "TransferManifest":
+        """Rebuilds a manifest, raising ValueError if it does not match its transfer id."""
+        try:
+            manifest = cls(
+                data["transfer_id"], int(data["file_size"]), int(data["chunk_size"]),
+                tuple(bytes.fromhex(digest) for digest in data["digests"])
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid manifest: {e}")
+        if manifest.chunk_size <= 0 or manifest.chunk_count != _chunk_count(manifest.file_size, manifest.chunk_size):
+            raise ValueError("Manifest chunk count does not match its size")
+        if manifest.transfer_id != transfer_id(manifest.file_size, manifest.chunk_size, manifest.digests):
+            raise ValueError("Manifest does not match its transfer id")
+        return manifest
+
+
+def _chunk_count(file_size, chunk_size):
+    return (file_size + chunk_size - 1) // chunk_size
+
+
+def transfer_id(file_size, chunk_size, digests):
+    id_data = hashlib.sha256(MANIFEST_ID_STRUCT.pack(file_size, chunk_size))
+    for digest in digests:
+        id_data.update(digest)
+    return id_data.digest()[:TRANSFER_ID_LENGTH].hex()
+
+
+def build_manifest(file_path, chunk_size=DEFAULT_TRANSFER_CHUNK_SIZE) -> TransferManifest:
+    """Reads the file once and digests every chunk."""
+    digests = tuple(hashlib.sha256(chunk_data).digest() for _, chunk_data in split_file(file_path, chunk_size))
+    file_size = os.path.getsize(file_path)
+    return TransferManifest(transfer_id(file_size, chunk_size, digests), file_size, chunk_size, digests)
+
+
+def transfer_chunk_aad(manifest, chunk_id):
+    return TRANSFER_AAD.pack(bytes.fromhex(manifest.transfer_id), chunk_id, manifest.file_size)
+
+
+def format_ranges(ranges):
+    """[(0, 9), (15, 15)] -> "0-9,15"."""
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def parse_ranges(text, chunk_count):
+    """
+    "0-9,15" -> [0, ..., 9, 15]. Raises ValueError for malformed or out of
+    range chunk ids. Chunks listed twice are sent once.
+    """
+    chunk_ids = []
+    seen = set()
+    for part in text.split(","):
+        first, separator, last = part.strip().partition("-")
+        first = int(first)
+        last = int(last) if separator else first
+        if not 0 <= first <= last < chunk_count:
+            raise ValueError(f"Chunk range {part.strip()} is outside 0-{chunk_count - 1}")
+        for chunk_id in range(first, last + 1):
+            if chunk_id not in seen:
+                seen.add(chunk_id)
+                chunk_ids.append(chunk_id)
+    return chunk_ids
+
+
+def transfer_records_size(manifest, chunk_ids):
+    """Bytes iter_transfer_records produces for the given chunks."""
+    overhead = TRANSFER_RECORD.size + CipherSession.encrypted_size(0)
+    return sum(manifest.chunk_length(chunk_id) + overhead for chunk_id in chunk_ids)
+
+
+def iter_transfer_records(file_path, key, manifest, chunk_ids=None, workers=DEFAULT_WORKERS):
+    """
+    Yields the records for chunk_ids (every chunk by default) as
+    (record header + IV, ciphertext + tag), reading and encrypting ahead on a
+    bounded thread pool.
+    """
+    chunks = iter_encrypted_chunks(
+        file_path, key, manifest.chunk_size, workers,
+        associated_data=lambda chunk_id: transfer_chunk_aad(manifest, chunk_id),
+        chunk_ids=range(manifest.chunk_count) if chunk_ids is None else chunk_ids
+    )
+    for chunk_id, iv, encrypted_chunk in chunks:
+        yield TRANSFER_RECORD.pack(chunk_id, len(iv) + len(encrypted_chunk)) + iv, encrypted_chunk
+
+
+class ChunkBitmap:
+    """One bit per chunk, set once the chunk has been received."""
+
+    def __init__(self, chunk_count, bits=None):
+        self.chunk_count = chunk_count
+        size = (chunk_count + 7) // 8
+        if bits is not None and len(bits) != size:
+            raise ValueError(f"Bitmap has {len(bits)} bytes, expected {size}")
+        self.bits = bytearray(bits) if bits is not None else bytearray(size)
+
+    def add(self, chunk_id):
+        """Sets a chunk's bit and returns the index of the byte that changed."""
+        self.bits[chunk_id >> 3] |= 1 << (chunk_id & 7)
+        return chunk_id >> 3
+
+    def __contains__(self, chunk_id):
+        return bool(self.bits[chunk_id >> 3] & (1 << (chunk_id & 7)))
+
+    def count(self):
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def missing_ranges(self):
+        """Inclusive (first, last) ranges of chunks that have not been received."""
+        ranges = []
+        first = None
+        for byte_index, byte in enumerate(self.bits):
+            # Whole bytes that do not end or start a range
+            if (byte == 0xFF and first is None) or (byte == 0 and first is not None):
+                continue
+            for chunk_id in range(byte_index * 8, min(byte_index * 8 + 8, self.chunk_count)):
+                if byte & (1 << (chunk_id & 7)):
+                    if first is not None:
+                        ranges.append((first, chunk_id - 1))
+                        first = None
+                elif first is None:
+                    first = chunk_id
+        if first is not None:
+            ranges.append((first, self.chunk_count - 1))
+        return ranges
+
+    def __bytes__(self):
+        return bytes(self.bits)
+
+
+class TransferReceiver:
+    """
+    Receives the chunks of one transfer into state_dir:
+        <transfer id>.manifest.json  the manifest
+        <transfer id>.part           the file, chunks written in place as they arrive
+        <transfer id>.bitmap         which chunks of .part are complete
+    Opening a receiver for a transfer that is already in state_dir continues it.
+    """
+
+    def __init__(self, manifest, key, state_dir="transfers"):
+        self.manifest = manifest
+        self.key = key
+        os.makedirs(state_dir, exist_ok=True)
+        base_path = os.path.join(state_dir, manifest.transfer_id)
+        self.manifest_path = base_path + ".manifest.json"
+        self.part_path = base_path + ".part"
+        self.bitmap_path = base_path + ".bitmap"
+
+        if not os.path.exists(self.manifest_path):
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+                json.dump(manifest.to_dict(), manifest_file)
+            os.replace(tmp_path, self.manifest_path)
+
+        self._part_fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._bitmap_fd = os.open(self.bitmap_path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = (manifest.chunk_count + 7) // 8
+        bits = os.pread(self._bitmap_fd, size, 0)
+        if len(bits) == size:
+            self.bitmap = ChunkBitmap(manifest.chunk_count, bits)
+        else:
+            # New transfer, or the bitmap never got written completely
+            self.bitmap = ChunkBitmap(manifest.chunk_count)
+            os.ftruncate(self._bitmap_fd, 0)
+            os.pwrite(self._bitmap_fd, bytes(self.bitmap), 0)
+        if os.fstat(self._part_fd).st_size != manifest.file_size:
+            os.ftruncate(self._part_fd, manifest.file_size)
+        self._session = get_session(key)
+
+    @classmethod
+    def resume(cls, transfer_id, key, state_dir="transfers") -> "TransferReceiver":
+        """Reopens a transfer from its saved manifest."""
+        with open(os.path.join(state_dir, transfer_id + ".manifest.json"), "r", encoding="utf-8") as manifest_file:
+            return cls(TransferManifest.from_dict(json.load(manifest_file)), key, state_dir)
+
+    @property
+    def complete(self):
+        return self.bitmap.count() == self.manifest.chunk_count
+
+    def missing_ranges(self):
+        return self.bitmap.missing_ranges()
+
+    def store(self, chunk_id, record) -> bool:
+        """
+        Decrypts and verifies one record payload (IV + ciphertext + tag) and
+        writes it into place. Returns False for a chunk that fails to decrypt
+        or does not match its digest; it stays missing.
+        """
+        if not 0 <= chunk_id < self.manifest.chunk_count:
+            return False
+        try:
+            chunk_data = self._session.decrypt(record, transfer_chunk_aad(self.manifest, chunk_id))
+        except (InvalidTag, ValueError):
+            return False
+        if hashlib.sha256(chunk_data).digest() != self.manifest.digests[chunk_id]:
+            return False
+        # The data goes in before the bit that says it is there
+        os.pwrite(self._part_fd, chunk_data, chunk_id * self.manifest.chunk_size)
+        byte_index = self.bitmap.add(chunk_id)
+        os.pwrite(self._bitmap_fd, self.bitmap.bits[byte_index:byte_index + 1], byte_index)
+        return True
+
+    def receive(self, read) -> int:
+        """
+        Stores records read with read(n) until the stream ends, cleanly or
+        not, and returns how many chunks were stored.
+        """
+        stored = 0
+        while True:
+            header = read(TRANSFER_RECORD.size)
+            if len(header) < TRANSFER_RECORD.size:
+                return stored
+            chunk_id, length = TRANSFER_RECORD.unpack(header)
+            if length > self.manifest.chunk_size + CipherSession.encrypted_size(0):
+                # Not a record of this transfer; nothing after it can be trusted
+                return stored
+            record = read(length)
+            if len(record) < length:
+                return stored
+            if self.store(chunk_id, record):
+                stored += 1
+
+    def finish(self, output_path):
+        """Moves the completed file to output_path and removes the transfer state."""
+        if not self.complete:
+            raise ValueError(f"Transfer is missing chunks {format_ranges(self.missing_ranges())}")
+        os.fsync(self._part_fd)
+        self.close()
+        os.replace(self.part_path, output_path)
+        os.remove(self.bitmap_path)
+        os.remove(self.manifest_path)
+
+    def close(self):
+        if self._part_fd is not None:
+            os.close(self._part_fd)
+            os.close(self._bitmap_fd)
+            self._part_fd = self._bitmap_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
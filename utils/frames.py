@@ -0,0 +1,74 @@
+import struct
+from typing import NamedTuple
+
+from utils.headers import BobbHeaderRecord, HEADER_SIZE, parse_from
+from utils.optional_headers import BobbOptionalHeaderRecord, OPTIONAL_HEADER_SIZE, parse_optional_from
+
+# Frame layout: [length (I)][BobbHeaders][BobbOptionalHeaders][payload]
+# length counts everything after itself
+LENGTH_STRUCT = struct.Struct("!I")
+LENGTH_SIZE = LENGTH_STRUCT.size
+FRAME_HEADERS_SIZE = HEADER_SIZE + OPTIONAL_HEADER_SIZE  # 69 bytes
+
+# Largest frame a reader accepts
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+
+class Frame(NamedTuple):
+    header: BobbHeaderRecord
+    optional_header: BobbOptionalHeaderRecord
+    payload: memoryview
+
+
+def encode_frame_prefix(header, optional_header, payload_length):
+    """
+    Packs the length prefix and both headers. Large payloads can then be sent
+    straight after the prefix without being copied into the frame.
+    """
+    prefix = bytearray(LENGTH_SIZE + FRAME_HEADERS_SIZE)
+    LENGTH_STRUCT.pack_into(prefix, 0, FRAME_HEADERS_SIZE + payload_length)
+    header.pack_into(prefix, LENGTH_SIZE)
+    optional_header.pack_into(prefix, LENGTH_SIZE + HEADER_SIZE)
+    return prefix
+
+
+def encode_frame(header, optional_header, payload=b""):
+    """Packs a complete frame. header/optional_header may be the builder classes or parsed records."""
+    frame = encode_frame_prefix(header, optional_header, len(payload))
+    frame += payload
+    return frame
+
+
+def decode_frame_body(body):
+    """Parses the part of a frame after the length prefix. The payload is a view into body."""
+    if len(body) < FRAME_HEADERS_SIZE:
+        raise ValueError(f"Frame of {len(body)} bytes is shorter than its {FRAME_HEADERS_SIZE} bytes of headers")
+    view = memoryview(body)
+    return Frame(
+        parse_from(view, 0),
+        parse_optional_from(view, HEADER_SIZE),
+        view[FRAME_HEADERS_SIZE:]
+    )
+
+
+def decode_frame(data):
+    """Parses one complete frame, including its length prefix."""
+    if len(data) < LENGTH_SIZE:
+        raise ValueError("Frame is missing its length prefix")
+    (length,) = LENGTH_STRUCT.unpack_from(data, 0)
+    if length != len(data) - LENGTH_SIZE:
+        raise ValueError(f"Frame length prefix says {length} bytes but {len(data) - LENGTH_SIZE} were received")
+    return decode_frame_body(memoryview(data)[LENGTH_SIZE:])
+
+
+async def read_frame(reader, max_size=MAX_FRAME_SIZE):
+    """Reads one frame from an asyncio StreamReader. Returns None on a clean end of stream."""
+    prefix = await reader.read(LENGTH_SIZE)
+    if not prefix:
+        return None
+    if len(prefix) < LENGTH_SIZE:
+        prefix += await reader.readexactly(LENGTH_SIZE - len(prefix))
+    (length,) = LENGTH_STRUCT.unpack(prefix)
+    if not FRAME_HEADERS_SIZE <= length <= max_size:
+        raise ValueError(f"Frame length {length} is out of range")
+    return decode_frame_body(await reader.readexactly(length))
@@ -1,6 +1,73 @@
 import struct
 import socket
 import time
+from typing import NamedTuple
+
+# version_major, version_minor, message_type, dest_ipv6, dest_port,
+# source_ipv6, source_port, sequence_number, timestamp
+HEADER_STRUCT = struct.Struct("!BBB16sH16sHII")
+HEADER_SIZE = HEADER_STRUCT.size  # 47 bytes
+
+
+class BobbHeaderRecord(NamedTuple):
+    """Parsed BobbHeaders. IPv6 addresses are kept packed and only converted to text on access."""
+    version_major: int
+    version_minor: int
+    message_type: int
+    dest_ip: bytes
+    dest_port: int
+    source_ip: bytes
+    source_port: int
+    sequence_number: int
+    timestamp: int
+
+    @property
+    def dest_ipv6(self):
+        return socket.inet_ntop(socket.AF_INET6, self.dest_ip)
+
+    @property
+    def source_ipv6(self):
+        return socket.inet_ntop(socket.AF_INET6, self.source_ip)
+
+    def pack_into(self, buffer, offset=0):
+        HEADER_STRUCT.pack_into(buffer, offset, *self)
+
+    def to_dict(self):
+        return {
+            "version_major": self.version_major,
+            "version_minor": self.version_minor,
+            "message_type": self.message_type,
+            "dest_ipv6": self.dest_ipv6,
+            "dest_port": self.dest_port,
+            "source_ipv6": self.source_ipv6,
+            "source_port": self.source_port,
+            "sequence_number": self.sequence_number,
+            "timestamp": self.timestamp,
+        }
+
+
+def parse_from(buffer, offset=0):
+    """Parses a single header starting at offset without slicing the buffer."""
+    return BobbHeaderRecord._make(HEADER_STRUCT.unpack_from(buffer, offset))
+
+
+def parse_many(buffer):
+    """Parses a contiguous buffer of back-to-back headers in a single pass."""
+    if len(buffer) % HEADER_SIZE:
+        raise ValueError(f"Buffer length {len(buffer)} is not a multiple of {HEADER_SIZE}")
+    return [BobbHeaderRecord._make(fields) for fields in HEADER_STRUCT.iter_unpack(buffer)]
+
+
+def build_many(headers):
+    """Packs headers (BobbHeaders or BobbHeaderRecord) back-to-back into one buffer."""
+    headers = list(headers)
+    buffer = bytearray(HEADER_SIZE * len(headers))
+    offset = 0
+    for header in headers:
+        header.pack_into(buffer, offset)
+        offset += HEADER_SIZE
+    return buffer
+
 
 class BobbHeaders:
     def __init__(self, version_major=0, version_minor=0, message_type=0,
@@ -17,7 +84,7 @@ class BobbHeaders:
         self.timestamp = timestamp if timestamp is not None else int(
             time.time())
 
-    def build_header(self):
+    def to_record(self):
         try:
             dest_ip_bytes = socket.inet_pton(socket.AF_INET6, self.dest_ipv6)
             source_ip_bytes = socket.inet_pton(
@@ -25,33 +92,18 @@ class BobbHeaders:
         except socket.error:
             raise ValueError("Invalid IPv6 address")
 
-        header = struct.pack("!BBB", self.version_major,
-                             self.version_minor, self.message_type)
-        header += dest_ip_bytes + struct.pack("!H", self.dest_port)
-        header += source_ip_bytes + struct.pack("!H", self.source_port)
-        header += struct.pack("!I", self.sequence_number)
-        header += struct.pack("!I", self.timestamp)
+        return BobbHeaderRecord(
+            self.version_major, self.version_minor, self.message_type,
+            dest_ip_bytes, self.dest_port,
+            source_ip_bytes, self.source_port,
+            self.sequence_number, self.timestamp
+        )
 
-        return header
+    def pack_into(self, buffer, offset=0):
+        self.to_record().pack_into(buffer, offset)
 
-    def parse_header(self, raw_data):
-        version_major, version_minor, message_type = struct.unpack(
-            "!BBB", raw_data[:3])
-        dest_ipv6 = socket.inet_ntop(socket.AF_INET6, raw_data[3:19])
-        dest_port = struct.unpack("!H", raw_data[19:21])[0]
-        source_ipv6 = socket.inet_ntop(socket.AF_INET6, raw_data[21:37])
-        source_port = struct.unpack("!H", raw_data[37:39])[0]
-        sequence_number = struct.unpack("!I", raw_data[39:43])[0]
-        timestamp = struct.unpack("!I", raw_data[43:47])[0]
+    def build_header(self):
+        return HEADER_STRUCT.pack(*self.to_record())
 
-        return {
-            "version_major": version_major,
-            "version_minor": version_minor,
-            "message_type": message_type,
-            "dest_ipv6": dest_ipv6,
-            "dest_port": dest_port,
-            "source_ipv6": source_ipv6,
-            "source_port": source_port,
-            "sequence_number": sequence_number,
-            "timestamp": timestamp,
-        }
\ No newline at end of file
+    def parse_header(self, raw_data):
+        return parse_from(raw_data).to_dict()
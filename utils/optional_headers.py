@@ -1,5 +1,49 @@
 import struct
 import time
+from typing import NamedTuple
+
+# timestamp, hop_count, priority, encryption_algo
+OPTIONAL_HEADER_STRUCT = struct.Struct("!IBB16s")
+OPTIONAL_HEADER_SIZE = OPTIONAL_HEADER_STRUCT.size  # 22 bytes
+
+
+class BobbOptionalHeaderRecord(NamedTuple):
+    """Parsed BobbOptionalHeaders. encryption_algo is only decoded on access."""
+    timestamp: int
+    hop_count: int
+    priority: int
+    encryption_algo_bytes: bytes
+
+    @property
+    def encryption_algo(self):
+        return self.encryption_algo_bytes.decode('utf-8').rstrip('\0')
+
+    def pack_into(self, buffer, offset=0):
+        OPTIONAL_HEADER_STRUCT.pack_into(buffer, offset, *self)
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp,
+            "hop_count": self.hop_count,
+            "priority": self.priority,
+            "encryption_algo": self.encryption_algo
+        }
+
+
+def parse_optional_from(buffer, offset=0):
+    """Parses a single optional header starting at offset without slicing the buffer."""
+    return BobbOptionalHeaderRecord._make(OPTIONAL_HEADER_STRUCT.unpack_from(buffer, offset))
+
+
+def build_many_optional(optional_headers):
+    """Packs optional headers (BobbOptionalHeaders or records) back-to-back into one buffer."""
+    optional_headers = list(optional_headers)
+    buffer = bytearray(OPTIONAL_HEADER_SIZE * len(optional_headers))
+    offset = 0
+    for optional_header in optional_headers:
+        optional_header.pack_into(buffer, offset)
+        offset += OPTIONAL_HEADER_SIZE
+    return buffer
 
 
 class BobbOptionalHeaders:
@@ -9,22 +53,19 @@ class BobbOptionalHeaders:
         self.priority = priority
         self.encryption_algo = encryption_algo
 
+    def to_record(self):
+        return BobbOptionalHeaderRecord(
+            self.timestamp, self.hop_count, self.priority,
+            self.encryption_algo.encode('utf-8')
+        )
+
+    def pack_into(self, buffer, offset=0):
+        self.to_record().pack_into(buffer, offset)
+
     def build_optional_header(self):
-        header = struct.pack("!I", self.timestamp)  # 4 bytes for timestamp
-        header += struct.pack("!B", self.hop_count)  # 1 byte for hop count
-        header += struct.pack("!B", self.priority)  # 1 byte for priority
-        # 16 bytes for encryption_algo
-        header += self.encryption_algo.encode('utf-8').ljust(16, b'\0')
-        return header
+        # 4 bytes for timestamp, 1 byte for hop count, 1 byte for priority,
+        # 16 bytes for encryption_algo (struct pads it with null bytes)
+        return OPTIONAL_HEADER_STRUCT.pack(*self.to_record())
 
     def parse_optional_header(self, raw_data):
-        timestamp = struct.unpack("!I", raw_data[:4])[0]
-        hop_count = struct.unpack("!B", raw_data[4:5])[0]
-        priority = struct.unpack("!B", raw_data[5:6])[0]
-        encryption_algo = raw_data[6:22].decode('utf-8').rstrip('\0')
-        return {
-            "timestamp": timestamp,
-            "hop_count": hop_count,
-            "priority": priority,
-            "encryption_algo": encryption_algo
-        }
\ No newline at end of file
+        return parse_optional_from(raw_data).to_dict()
@@ -0,0 +1,122 @@
+import asyncio
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from asgi import AsgiAdapter, build_environ
+from controllers import capture_image
+from main import app
+
+IMAGE_URL = "/v1/satellites/2001:0:130f::9c0:876a:130b/images"
+
+def _request(adapter, method, path, query_string=b"", headers=(), body_parts=(b"",)):
+    """Runs one request through the adapter; returns (status, headers, body, body message count)."""
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query_string, "http_version": "1.1",
+        "headers": [(name.encode("latin1"), value.encode("latin1")) for name, value in headers],
+        "client": ("127.0.0.1", 40100), "server": ("localhost", 30001), "scheme": "http",
+    }
+    messages = [
+        {"type": "http.request", "body": part, "more_body": index < len(body_parts) - 1}
+        for index, part in enumerate(body_parts)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(adapter(scope, receive, send))
+    start, bodies = sent[0], sent[1:]
+    assert start["type"] == "http.response.start", "Response did not start with http.response.start!"
+    assert bodies[-1] == {"type": "http.response.body", "body": b"", "more_body": False}, "Body was not ended!"
+    response_headers = {name.decode("latin1"): value.decode("latin1") for name, value in start["headers"]}
+    return start["status"], response_headers, b"".join(message["body"] for message in bodies), len(bodies)
+
+def test_build_environ():
+    scope = {
+        "type": "http", "method": "POST", "path": "/v1/café", "root_path": "", "query_string": b"ranges=0-9&x=1",
+        "headers": [
+            (b"content-type", b"application/json"), (b"content-length", b"2"),
+            (b"x-bobb-header", b"ab"), (b"accept", b"text/plain"), (b"accept", b"application/json"),
+        ],
+        "client": ("10.0.0.7", 5555), "server": ("node", 30001), "http_version": "1.1",
+    }
+    environ = build_environ(scope, b"{}")
+
+    assert environ["REQUEST_METHOD"] == "POST", "Method was not copied!"
+    assert environ["PATH_INFO"] == "/v1/café".encode("utf8").decode("latin1"), "Path is not WSGI encoded!"
+    assert environ["QUERY_STRING"] == "ranges=0-9&x=1", "Query string was not copied!"
+    assert environ["CONTENT_TYPE"] == "application/json" and environ["CONTENT_LENGTH"] == "2", "Content headers are wrong!"
+    assert "HTTP_CONTENT_TYPE" not in environ, "Content-Type got an HTTP_ prefix!"
+    assert environ["HTTP_X_BOBB_HEADER"] == "ab", "Custom header was not copied!"
+    assert environ["HTTP_ACCEPT"] == "text/plain,application/json", "Repeated headers were not joined!"
+    assert environ["REMOTE_ADDR"] == "10.0.0.7" and environ["REMOTE_PORT"] == "5555", "Client address is wrong!"
+    assert environ["SERVER_NAME"] == "node" and environ["SERVER_PORT"] == "30001", "Server address is wrong!"
+    assert environ["wsgi.input"].read() == b"{}", "Body was not passed on!"
+
+    print("ASGI environ test passed successfully!")
+
+def test_asgi_requests():
+    adapter = AsgiAdapter(app, ThreadPoolExecutor(max_workers=2))
+    # A random stand-in for the satellite image
+    image_dir = tempfile.mkdtemp()
+    original_path = capture_image.IMAGE_FILE_PATH
+    capture_image.IMAGE_FILE_PATH = os.path.join(image_dir, "image.jpg")
+    image = os.urandom(300000)
+    with open(capture_image.IMAGE_FILE_PATH, "wb") as image_file:
+        image_file.write(image)
+    try:
+
+        # Range requests keep their 206 and Content-Range
+        status, headers, body, _ = _request(adapter, "GET", IMAGE_URL, headers=[("Range", "bytes=0-99")])
+        assert status == 206, f"Range request got {status}!"
+        assert headers["content-range"] == f"bytes 0-99/{len(image)}", "Content-Range is wrong!"
+        assert body == image[:100], "Range body is wrong!"
+
+        # Whole files are streamed in several body messages
+        status, headers, body, body_messages = _request(adapter, "GET", IMAGE_URL)
+        assert status == 200 and body == image, "Streamed image does not match!"
+        assert body_messages > 2, "Image was not streamed in batches!"
+
+        status, _, body, _ = _request(adapter, "POST", IMAGE_URL)
+        assert status == 200, f"Image capture got {status}!"
+        assert base64.b64decode(json.loads(body)["image"]) == image, "Base64 image does not match!"
+
+        # A request body split over several messages reaches the handler whole
+        spec = json.dumps({
+            "necessary_header": {
+                "version_major": 1, "version_minor": 0, "message_type": 1,
+                "dest_ipv6": "2001:0:130f::9c0:876a:130b", "dest_port": 12345,
+                "source_ipv6": "::1", "source_port": 40000,
+                "sequence_number": 1, "timestamp": 1700000000
+            },
+            "optional_header": {"hop_count": 10, "priority": 1, "encryption_algo": "AES256"}
+        }).encode()
+        status, _, body, _ = _request(
+            adapter, "POST", "/v1/create-header",
+            headers=[("Content-Type", "application/json"), ("Content-Length", str(len(spec)))],
+            body_parts=(spec[:10], spec[10:40], spec[40:])
+        )
+        assert status == 200, f"Split request body got {status}!"
+        assert "X-Bobb-Header" in json.loads(body)["data"], "Header was not created from the split body!"
+    finally:
+        adapter.executor.shutdown()
+        capture_image.IMAGE_FILE_PATH = original_path
+        shutil.rmtree(image_dir)
+
+    print("ASGI request test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_build_environ()
+    test_asgi_requests()
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from cryptography.exceptions import InvalidTag
+
+from utils.crypto_utils import (
+    available_codecs,
+    compress_chunk,
+    decrypt_chunk,
+    encrypt_file_to_array,
+    encrypt_large_file,
+    reassemble_file_from_chunks,
+    reconstruct_file_from_array
+)
+
+def test_compressed_chunk_pipeline():
+    shared_key = os.urandom(32)
+    work_dir = tempfile.mkdtemp()
+    try:
+        # Compressible telemetry followed by random bytes that are not worth compressing
+        test_file = os.path.join(work_dir, "telemetry.log")
+        with open(test_file, "wb") as f:
+            for i in range(20000):
+                f.write(json.dumps({"t": i, "temperature": 20 + i % 7, "status": "ok"}).encode() + b"\n")
+            f.write(os.urandom(300 * 1024))
+        with open(test_file, "rb") as f:
+            original = f.read()
+
+        for codec in available_codecs():
+            encrypted_chunks = encrypt_file_to_array(test_file, shared_key, chunk_size=256 * 1024, workers=2,
+                                                     compression=codec)
+            codecs = [chunk["codec"] for chunk in encrypted_chunks]
+            assert codecs[0] == codec and codecs[-1] == "none", f"Wrong {codec} codecs {codecs}!"
+            assert sum(len(chunk["data"]) for chunk in encrypted_chunks) < len(original) // 2, f"{codec} did not compress!"
+
+            output_file = os.path.join(work_dir, f"reconstructed.{codec}")
+            reconstruct_file_from_array(encrypted_chunks, output_file, shared_key)
+            with open(output_file, "rb") as f:
+                assert f.read() == original, f"{codec} reconstruction does not match!"
+
+        # A chunk relabelled with another codec fails to decrypt
+        chunk = encrypted_chunks[0]
+        try:
+            decrypt_chunk(chunk["iv"], chunk["data"], shared_key, "none")
+        except InvalidTag:
+            pass
+        else:
+            raise AssertionError("Relabelled chunk was accepted!")
+
+        # Chunk files record the codec in their names
+        chunk_dir = os.path.join(work_dir, "chunks")
+        encrypt_large_file(test_file, shared_key, chunk_dir, chunk_size=256 * 1024, compression="zlib")
+        assert "chunk_0.zlib.enc" in os.listdir(chunk_dir), "Compressed chunk file is not marked!"
+        output_file = os.path.join(work_dir, "reassembled.log")
+        reassemble_file_from_chunks(output_file, chunk_dir, shared_key)
+        with open(output_file, "rb") as f:
+            assert f.read() == original, "Reassembled file does not match!"
+    finally:
+        shutil.rmtree(work_dir)
+
+    # Images that are already compressed are left as they are; behind its
+    # markers JPEG data is as incompressible as random bytes
+    image = b"\xff\xd8\xff\xe0" + os.urandom(1024 * 1024 - 4)
+    assert compress_chunk(image) == ("none", image), "JPEG should not be compressed!"
+
+    print("Compressed chunk pipeline test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_compressed_chunk_pipeline()
@@ -0,0 +1,102 @@
+
+import os
+import sys
+
+# Add the src directory to the path so we can import crypto_utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from crypto_utils import (
+    ContainerReader,
+    ContainerWriter,
+    encrypt_file_to_container,
+    decrypt_container_to_file
+)
+
+def test_container_round_trip():
+    # Use a random AES key for testing
+    shared_key = os.urandom(32)
+
+    # Prepare a test file spanning several chunks
+    test_file = "test_container_file.txt"
+    with open(test_file, "wb") as f:
+        f.write(os.urandom(1024 * 1024 + 77))
+
+    # Encrypt into a single container file and decrypt it again
+    container_file = "test_container_file.bobbenc"
+    encrypt_file_to_container(test_file, container_file, shared_key, chunk_size=1024 * 64)
+    reconstructed_file = "reconstructed_container_file.txt"
+    decrypt_container_to_file(container_file, reconstructed_file, shared_key)
+
+    with open(test_file, "rb") as original, open(reconstructed_file, "rb") as reconstructed:
+        original_data = original.read()
+        assert original_data == reconstructed.read(), "Reconstructed file does not match the original file!"
+
+    # Any chunk can be read on its own
+    with ContainerReader(container_file, shared_key) as reader:
+        assert len(reader) == 17, "Container has the wrong number of chunks!"
+        assert reader.read_chunk(16) == original_data[16 * 1024 * 64:], "Random access returned the wrong chunk!"
+        assert reader.read_chunk(3) == original_data[3 * 1024 * 64:4 * 1024 * 64], "Random access returned the wrong chunk!"
+
+    # Clean up files
+    os.remove(test_file)
+    os.remove(container_file)
+    os.remove(reconstructed_file)
+
+    print("Container round trip test passed successfully!")
+
+def test_container_append():
+    # Use a random AES key for testing
+    shared_key = os.urandom(32)
+    container_file = "test_append.bobbenc"
+
+    # Write two chunks, close, then reopen and append a third
+    with ContainerWriter(container_file, shared_key, chunk_size=16) as writer:
+        writer.append(b"first chunk")
+        writer.append(b"second chunk")
+    with ContainerWriter(container_file, shared_key) as writer:
+        assert len(writer) == 2, "Appending writer did not load the existing index!"
+        writer.append(b"third chunk")
+
+    with ContainerReader(container_file, shared_key) as reader:
+        assert list(reader) == [b"first chunk", b"second chunk", b"third chunk"], "Appended container does not match!"
+
+    # A writer that dies before close leaves the committed chunks readable
+    writer = ContainerWriter(container_file, shared_key)
+    writer.append(b"lost chunk")
+    writer.file.close()
+    with ContainerReader(container_file, shared_key) as reader:
+        assert list(reader) == [b"first chunk", b"second chunk", b"third chunk"], "Interrupted append broke the container!"
+    with ContainerWriter(container_file, shared_key) as writer:
+        writer.append(b"fourth chunk")
+    with ContainerReader(container_file, shared_key) as reader:
+        assert list(reader)[-2:] == [b"third chunk", b"fourth chunk"], "Append after a crash does not match!"
+
+    # Encrypting a file into an existing container is refused unless asked for
+    try:
+        encrypt_file_to_container(__file__, container_file, shared_key)
+    except FileExistsError:
+        pass
+    else:
+        raise AssertionError("Existing container was silently appended to!")
+
+    # Containers of another version are refused, for reading and appending
+    with open(container_file, "r+b") as f:
+        f.seek(8)
+        f.write(b"\x00\x01")
+    for open_container in (ContainerReader, ContainerWriter):
+        try:
+            open_container(container_file, shared_key)
+        except ValueError as e:
+            assert "Unsupported container version 1" in str(e), "Unknown version error is unclear!"
+        else:
+            raise AssertionError(f"{open_container.__name__} accepted a version 1 container!")
+
+    # Clean up files
+    os.remove(container_file)
+
+    print("Container append test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_container_round_trip()
+    test_container_append()
@@ -0,0 +1,77 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import x25519
+
+from config.constants import X_BOBB_PUBLIC_KEY
+from controllers import capture_image, encrypted_image
+from main import app
+from utils.crypto_utils import create_shared_key, generate_keys, iter_decrypted_records
+
+IMAGE_URL = "/v1/satellites/2001:0:130f::9c0:876a:130b/images"
+
+def test_encrypted_image_delivery():
+    key_dir = tempfile.mkdtemp()
+    original_path = encrypted_image.node_private_key_path
+    original_image_path = capture_image.IMAGE_FILE_PATH
+    generate_keys("Node", key_dir)
+    encrypted_image.node_private_key_path = lambda: os.path.join(key_dir, "Node_private_key.pem")
+    # A random stand-in for the satellite image
+    image = os.urandom(300000)
+    capture_image.IMAGE_FILE_PATH = os.path.join(key_dir, "image.jpg")
+    with open(capture_image.IMAGE_FILE_PATH, "wb") as image_file:
+        image_file.write(image)
+    try:
+        requester_key = x25519.X25519PrivateKey.generate()
+        public_key_hex = requester_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        ).hex()
+
+        client = app.test_client()
+        for method in ("POST", "GET"):
+            response = client.open(IMAGE_URL, method=method, headers={X_BOBB_PUBLIC_KEY: public_key_hex})
+            body = response.get_data()
+            response.close()
+            assert response.status_code == 200, f"Encrypted {method} failed!"
+            assert len(body) == response.content_length, "Content-Length does not match the stream!"
+            assert image[:4096] not in body, "Image was sent in plaintext!"
+
+            # The requester derives the same key from the node's public key
+            node_public_key = x25519.X25519PublicKey.from_public_bytes(bytes.fromhex(response.headers[X_BOBB_PUBLIC_KEY]))
+            key = create_shared_key(requester_key, node_public_key)
+            image_size = int(response.headers["X-Bobb-Image-Size"])
+            chunk_size = int(response.headers["X-Bobb-Chunk-Size"])
+            decrypted = b"".join(iter_decrypted_records(io.BytesIO(body).read, key, image_size, chunk_size))
+            assert decrypted == image, "Decrypted image does not match!"
+
+        # Truncated and altered streams are rejected
+        for stream, error in ((body[:-1], ValueError), (body[:100] + bytes([body[100] ^ 1]) + body[101:], InvalidTag)):
+            try:
+                b"".join(iter_decrypted_records(io.BytesIO(stream).read, key, image_size, chunk_size))
+            except error:
+                pass
+            else:
+                raise AssertionError("Damaged stream was accepted!")
+
+        for invalid_key in ("zz" * 32, "00" * 32):
+            response = client.post(IMAGE_URL, headers={X_BOBB_PUBLIC_KEY: invalid_key})
+            assert response.status_code == 400, f"Invalid public key {invalid_key} got {response.status_code}!"
+    finally:
+        encrypted_image.node_private_key_path = original_path
+        capture_image.IMAGE_FILE_PATH = original_image_path
+        shutil.rmtree(key_dir)
+
+    print("Encrypted image delivery test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_encrypted_image_delivery()
@@ -1,6 +1,8 @@
 
 import os
+import shutil
 import sys
+import tempfile
 
 # Add the src directory to the path so we can import crypto_utils
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
@@ -15,17 +17,30 @@ from crypto_utils import (
     encrypt_chunk,
     decrypt_chunk,
     encrypt_file_to_array,
-    reconstruct_file_from_array
+    reconstruct_file_from_array,
+    iter_decrypted_chunks,
+    CipherSession
 )
 
+# Everything the tests write goes here instead of the working directory
+TEST_DIR = tempfile.mkdtemp(prefix="encryption-tests-")
+
+def _test_path(name):
+    return os.path.join(TEST_DIR, name)
+
+def teardown_module(module=None):
+    # Called by pytest after the last test here, and by the runner below
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
 def test_satellite_communication():
     # Generate keys for Satellite A and Satellite B using satellite names
-    generate_keys("SatelliteA")
-    generate_keys("SatelliteB")
+    key_dir = _test_path("keys")
+    generate_keys("SatelliteA", key_dir)
+    generate_keys("SatelliteB", key_dir)
     
     # Derive shared keys from Satellite A's private key and Satellite B's public key, and vice versa
-    shared_key_A_to_B = derive_shared_key("keys/SatelliteA_private_key.pem", "keys/SatelliteB_public_key.pem")
-    shared_key_B_to_A = derive_shared_key("keys/SatelliteB_private_key.pem", "keys/SatelliteA_public_key.pem")
+    shared_key_A_to_B = derive_shared_key(os.path.join(key_dir, "SatelliteA_private_key.pem"), os.path.join(key_dir, "SatelliteB_public_key.pem"))
+    shared_key_B_to_A = derive_shared_key(os.path.join(key_dir, "SatelliteB_private_key.pem"), os.path.join(key_dir, "SatelliteA_public_key.pem"))
     
     # Check that both derived keys are identical
     assert shared_key_A_to_B == shared_key_B_to_A, "Shared keys between satellites do not match!"
@@ -45,6 +60,9 @@ def test_satellite_communication():
     # Satellite A decrypts the message
     decrypted_message_at_A = decrypt_data(encrypted_message_from_B, shared_key_A_to_B)
     assert decrypted_message_at_A == message_from_B, "Decrypted message at Satellite A does not match the original message!"
+
+    # Clean up keys
+    shutil.rmtree(key_dir)
     
     print("Satellite communication test passed successfully!")
 
@@ -53,16 +71,16 @@ def test_large_file_encryption():
     shared_key = os.urandom(32)
 
     # Prepare a large test file
-    test_file = "test_large_file.txt"
+    test_file = _test_path("test_large_file.txt")
     with open(test_file, "wb") as f:
         f.write(os.urandom(5 * 1024 * 1024))  # 5 MB test file
 
     # Encrypt and split the large file
-    encrypted_chunks_dir = "encrypted_chunks"
+    encrypted_chunks_dir = _test_path("encrypted_chunks")
     encrypt_large_file(test_file, shared_key, encrypted_chunks_dir, chunk_size=1024 * 512)  # 512 KB chunks
 
     # Reassemble and decrypt the file
-    reassembled_file = "reassembled_test_large_file.txt"
+    reassembled_file = _test_path("reassembled_test_large_file.txt")
     reassemble_file_from_chunks(reassembled_file, encrypted_chunks_dir, shared_key)
 
     # Verify that the reassembled file matches the original
@@ -78,12 +96,44 @@ def test_large_file_encryption():
 
     print("Large file encryption test passed successfully!")
 
+def test_parallel_large_file_encryption():
+    # Use a random AES key for testing the parallel pipeline
+    shared_key = os.urandom(32)
+
+    # Prepare a test file that does not end on a chunk boundary
+    test_file = _test_path("test_parallel_file.txt")
+    with open(test_file, "wb") as f:
+        f.write(os.urandom(3 * 1024 * 1024 + 123))
+
+    # Encrypt with several workers and check the chunks come back in order
+    encrypted_chunks = encrypt_file_to_array(test_file, shared_key, chunk_size=1024 * 256, workers=4)
+    assert [chunk["chunk_id"] for chunk in encrypted_chunks] == list(range(13)), "Chunks are out of order!"
+
+    # Encrypt to chunk files and reassemble
+    encrypted_chunks_dir = _test_path("encrypted_parallel_chunks")
+    encrypt_large_file(test_file, shared_key, encrypted_chunks_dir, chunk_size=1024 * 256, workers=4)
+    reassembled_file = _test_path("reassembled_parallel_file.txt")
+    reassemble_file_from_chunks(reassembled_file, encrypted_chunks_dir, shared_key)
+
+    # Verify that the reassembled file matches the original
+    with open(test_file, "rb") as original, open(reassembled_file, "rb") as reassembled:
+        assert original.read() == reassembled.read(), "Reassembled file does not match the original file!"
+
+    # Clean up files
+    os.remove(test_file)
+    os.remove(reassembled_file)
+    for chunk_file in os.listdir(encrypted_chunks_dir):
+        os.remove(os.path.join(encrypted_chunks_dir, chunk_file))
+    os.rmdir(encrypted_chunks_dir)
+
+    print("Parallel large file encryption test passed successfully!")
+
 def test_non_chunked_encryption():
     # Use a random AES key for testing
     shared_key = os.urandom(32)
 
     # Prepare a test file
-    test_file = "test_file.txt"
+    test_file = _test_path("test_file.txt")
     with open(test_file, "wb") as f:
         f.write(b"This is a test file content for non-chunked encryption.")
 
@@ -130,7 +180,7 @@ def test_array_encryption_and_reconstruction():
     shared_key = os.urandom(32)
 
     # Prepare a test file
-    test_file = "test_array_file.txt"
+    test_file = _test_path("test_array_file.txt")
     with open(test_file, "wb") as f:
         f.write(b"This is a large test file for array encryption and reconstruction.")
 
@@ -138,7 +188,7 @@ def test_array_encryption_and_reconstruction():
     encrypted_chunks = encrypt_file_to_array(test_file, shared_key, chunk_size=16)  # Small chunk size for test
 
     # Reconstruct the file from the encrypted chunks
-    reconstructed_file = "reconstructed_array_file.txt"
+    reconstructed_file = _test_path("reconstructed_array_file.txt")
     reconstruct_file_from_array(encrypted_chunks, reconstructed_file, shared_key)
 
     # Verify that the reconstructed file matches the original
@@ -151,10 +201,62 @@ def test_array_encryption_and_reconstruction():
 
     print("Array encryption and reconstruction test passed successfully!")
 
+def test_out_of_order_stream_decryption():
+    # Use a random AES key for testing
+    shared_key = os.urandom(32)
+    chunks = [os.urandom(100) for _ in range(10)]
+    encrypted_chunks = []
+    for chunk_id, chunk in enumerate(chunks):
+        iv, encrypted_chunk = encrypt_chunk(chunk, shared_key)
+        encrypted_chunks.append({"chunk_id": chunk_id, "iv": iv, "data": encrypted_chunk})
+
+    # Swap neighbouring chunks so every other chunk arrives early
+    arrival_order = [encrypted_chunks[i ^ 1] for i in range(10)]
+    decrypted_chunks = list(iter_decrypted_chunks(iter(arrival_order), shared_key, window=2))
+    assert decrypted_chunks == chunks, "Streamed chunks are not in order!"
+
+    # A chunk too far ahead of the missing one is rejected instead of buffered
+    try:
+        list(iter_decrypted_chunks(iter(encrypted_chunks[1:]), shared_key, window=4))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Stream with a missing chunk was not rejected!")
+
+    print("Out of order stream decryption test passed successfully!")
+
+def test_cipher_session():
+    # Use a random AES key for testing
+    shared_key = os.urandom(32)
+    session = CipherSession(shared_key)
+
+    # Nonces never repeat within a session
+    nonces = {session.next_nonce() for _ in range(1000)}
+    assert len(nonces) == 1000, "Session reused a nonce!"
+
+    # Messages from a session decrypt with the module helpers and vice versa
+    message = b"Message through a cipher session"
+    assert decrypt_data(session.encrypt(message), shared_key) == message, "Session message did not decrypt!"
+    assert session.decrypt(encrypt_data(message, shared_key)) == message, "Module message did not decrypt in the session!"
+
+    # Encrypt into a preallocated buffer at an offset and decrypt from a memoryview slice
+    buffer = bytearray(4 + CipherSession.encrypted_size(len(message)))
+    written = session.encrypt_into(buffer, message, offset=4)
+    assert written == len(buffer) - 4, "encrypt_into reported the wrong size!"
+    assert session.decrypt(memoryview(buffer)[4:]) == message, "Buffer message did not decrypt!"
+
+    print("Cipher session test passed successfully!")
+
 # Run the tests
 if __name__ == "__main__":
-    test_satellite_communication()
-    test_large_file_encryption()
-    test_non_chunked_encryption()
-    test_individual_chunk_encryption()
-    test_array_encryption_and_reconstruction()
+    try:
+        test_satellite_communication()
+        test_large_file_encryption()
+        test_parallel_large_file_encryption()
+        test_non_chunked_encryption()
+        test_individual_chunk_encryption()
+        test_array_encryption_and_reconstruction()
+        test_out_of_order_stream_decryption()
+        test_cipher_session()
+    finally:
+        teardown_module()
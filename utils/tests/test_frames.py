@@ -0,0 +1,82 @@
+
+import asyncio
+import os
+import sys
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from config.constants import FRAME_CONTENT_TYPE, X_BOBB_HEADER
+from main import app
+from utils.frames import FRAME_HEADERS_SIZE, decode_frame, encode_frame, read_frame
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+def test_frame_round_trip():
+    header = BobbHeaders(message_type=1, dest_ipv6="2001:0:130f::9c0:876a:130b", sequence_number=7)
+    optional_header = BobbOptionalHeaders(hop_count=5, priority=2)
+    frame_data = encode_frame(header, optional_header, b"payload")
+
+    # The in-band headers are exactly the bytes of the HTTP header encodings
+    assert len(frame_data) == 4 + FRAME_HEADERS_SIZE + 7, "Frame has the wrong size!"
+    assert bytes(frame_data[4:51]) == header.build_header(), "BobbHeaders layout differs from the HTTP encoding!"
+    assert bytes(frame_data[51:73]) == optional_header.build_optional_header(), "Optional header layout differs from the HTTP encoding!"
+
+    frame = decode_frame(frame_data)
+    assert frame.header.dest_ipv6 == "2001:0:130f::9c0:876a:130b", "Destination did not survive the round trip!"
+    assert frame.optional_header.hop_count == 5, "Hop count did not survive the round trip!"
+    assert bytes(frame.payload) == b"payload", "Payload did not survive the round trip!"
+
+    # A truncated frame is rejected
+    try:
+        decode_frame(frame_data[:-1])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Truncated frame was not rejected!")
+
+    print("Frame round trip test passed successfully!")
+
+def test_frame_http_response():
+    client = app.test_client()
+    header = BobbHeaders(message_type=1, dest_ipv6="2001:0:130f::9c0:876a:130b", sequence_number=11)
+    response = client.post("/v1/frames", data=bytes(encode_frame(header, BobbOptionalHeaders())),
+                           content_type=FRAME_CONTENT_TYPE)
+    body = response.get_data()
+    response.close()
+
+    # Frames carry their headers in-band and get a media type of their own
+    assert response.mimetype == "application/vnd.bobb.frame", "Frame reply has the wrong media type!"
+    assert X_BOBB_HEADER not in response.headers, "Frame reply was stamped with HTTP headers!"
+    assert decode_frame(body).header.sequence_number == 11, "Reply frame does not answer the request!"
+
+    # Other responses are still stamped
+    assert X_BOBB_HEADER in client.get("/v1/scheduler").headers, "Non-frame response was not stamped!"
+
+    print("Frame HTTP response test passed successfully!")
+
+def test_read_frames_from_stream():
+    frames = [encode_frame(BobbHeaders(sequence_number=i), BobbOptionalHeaders(), bytes([i]) * i) for i in range(3)]
+
+    async def read_all():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"".join(frames))
+        reader.feed_eof()
+        received = []
+        while True:
+            frame = await read_frame(reader)
+            if frame is None:
+                return received
+            received.append(frame)
+
+    received = asyncio.run(read_all())
+    assert [frame.header.sequence_number for frame in received] == [0, 1, 2], "Frames were not read in order!"
+    assert [bytes(frame.payload) for frame in received] == [b"", b"\x01", b"\x02\x02"], "Frame payloads are wrong!"
+
+    print("Frame stream test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_frame_round_trip()
+    test_frame_http_response()
+    test_read_frames_from_stream()
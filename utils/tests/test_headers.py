@@ -0,0 +1,167 @@
+
+import json
+import os
+import sys
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from config.constants import ERROR_INVALID_BOBB_HEADER, X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from main import app
+from utils.headers import (
+    BobbHeaders,
+    HEADER_SIZE,
+    parse_from,
+    parse_many,
+    build_many
+)
+from utils.optional_headers import (
+    BobbOptionalHeaders,
+    OPTIONAL_HEADER_SIZE,
+    parse_optional_from
+)
+
+def test_header_round_trip():
+    header = BobbHeaders(
+        version_major=1,
+        version_minor=2,
+        message_type=3,
+        dest_ipv6="2001:0000:130F:0000:0000:09C0:876A:130B",
+        dest_port=30001,
+        source_ipv6="::1",
+        source_port=30002,
+        sequence_number=456,
+        timestamp=1700000000
+    )
+    raw = header.build_header()
+    assert len(raw) == HEADER_SIZE, "Header is not 47 bytes long!"
+
+    # parse_header keeps returning the legacy dict
+    parsed = BobbHeaders().parse_header(raw)
+    assert parsed["dest_ipv6"] == "2001:0:130f::9c0:876a:130b", "Destination address did not survive the round trip!"
+    assert parsed["sequence_number"] == 456, "Sequence number did not survive the round trip!"
+    assert parsed["timestamp"] == 1700000000, "Timestamp did not survive the round trip!"
+
+    # pack_into writes the same bytes into a caller-supplied buffer at an offset
+    buffer = bytearray(HEADER_SIZE + 5)
+    header.pack_into(buffer, 5)
+    assert bytes(buffer[5:]) == raw, "pack_into does not match build_header!"
+
+    record = parse_from(memoryview(buffer), 5)
+    assert record.source_port == 30002, "parse_from read the wrong offset!"
+    assert record.to_dict() == parsed, "Record does not match the legacy dict!"
+
+    print("Header round trip test passed successfully!")
+
+def test_header_batch_round_trip():
+    headers = [BobbHeaders(sequence_number=i, timestamp=1700000000 + i) for i in range(100)]
+
+    # Build a frame of back-to-back headers and parse it in one pass
+    frame = build_many(headers)
+    assert len(frame) == 100 * HEADER_SIZE, "Batch buffer has the wrong size!"
+
+    records = parse_many(frame)
+    assert [record.sequence_number for record in records] == list(range(100)), "Batch parse lost ordering!"
+    assert build_many(records) == frame, "Records do not re-pack to the same bytes!"
+
+    # A truncated frame is rejected
+    try:
+        parse_many(frame[:-1])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Truncated batch was not rejected!")
+
+    print("Header batch round trip test passed successfully!")
+
+def test_optional_header_round_trip():
+    optional_header = BobbOptionalHeaders(timestamp=1700000000, hop_count=10, priority=1, encryption_algo="AES256")
+    raw = optional_header.build_optional_header()
+    assert len(raw) == OPTIONAL_HEADER_SIZE, "Optional header is not 22 bytes long!"
+
+    record = parse_optional_from(memoryview(raw))
+    assert record.hop_count == 10, "Hop count did not survive the round trip!"
+    assert record.encryption_algo == "AES256", "Encryption algorithm did not survive the round trip!"
+    assert record.to_dict() == BobbOptionalHeaders().parse_optional_header(raw), "Record does not match the legacy dict!"
+
+    print("Optional header round trip test passed successfully!")
+
+def test_create_header_batch():
+    from main import app
+
+    client = app.test_client()
+    spec = {
+        "necessary_header": {
+            "version_major": 1, "version_minor": 0, "message_type": 1,
+            "dest_ipv6": "2001:0:130f::9c0:876a:130b", "dest_port": 12345,
+            "source_ipv6": "::1", "source_port": 40000,
+            "sequence_number": 1, "timestamp": 1700000000
+        },
+        "optional_header": {"hop_count": 10, "priority": 1, "encryption_algo": "AES256"}
+    }
+    single = client.post("/v1/create-header", json=spec).get_json()["data"]
+
+    out_of_range = json.loads(json.dumps(spec))
+    out_of_range["necessary_header"]["dest_port"] = 70000
+    specs = [spec, {"optional_header": {}}, out_of_range, spec]
+
+    # JSON array and NDJSON bodies give the same per-item results
+    array_response = client.post("/v1/create-header/batch", json=specs)
+    ndjson_response = client.post(
+        "/v1/create-header/batch",
+        data="\n".join(json.dumps(item) for item in specs),
+        content_type="application/x-ndjson"
+    )
+    assert array_response.data == ndjson_response.data, "JSON array and NDJSON results differ!"
+    # Results are streamed, so closing the responses frees their scheduler slots
+    array_response.close()
+    ndjson_response.close()
+
+    results = [json.loads(line) for line in array_response.data.splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2, 3], "Results are not in input order!"
+    assert results[0]["X-Bobb-Header"] == single["X-Bobb-Header"], "Batch header differs from the single endpoint!"
+    assert results[0]["X-Bobb-Optional-Header"] == single["X-Bobb-Optional-Header"], "Batch optional header differs!"
+    assert results[1]["error"] == "Missing required field: necessary_header", "Missing field was not reported!"
+    assert "out of range" in results[2]["error"], "Out of range field was not reported!"
+    assert results[3]["X-Bobb-Header"] == single["X-Bobb-Header"], "Valid item after an error was not built!"
+
+    # The single endpoint rejects the same specs with a 400
+    invalid_address = json.loads(json.dumps(spec))
+    invalid_address["necessary_header"]["source_ipv6"] = "not an address"
+    for invalid_spec in (out_of_range, invalid_address):
+        response = client.post("/v1/create-header", json=invalid_spec)
+        assert response.status_code == 400, f"Invalid spec got {response.status_code}!"
+        assert response.get_json()["data"]["error"] == ERROR_INVALID_BOBB_HEADER, "Invalid spec got the wrong error!"
+    assert "out of range" in client.post("/v1/create-header", json=out_of_range).get_json()["data"]["details"], \
+        "Out of range field was not reported!"
+
+    print("Header batch endpoint test passed successfully!")
+
+def test_malformed_request_headers_are_rejected():
+    client = app.test_client()
+    header_hex = BobbHeaders(version_major=1, source_port=40003, sequence_number=1).build_header().hex()
+    optional_hex = BobbOptionalHeaders().build_optional_header().hex()
+    # Right number of characters, but fromhex skips the spaces and decodes fewer bytes
+    short_header = header_hex[:-4] + "    "
+    short_optional = optional_hex[:-4] + "    "
+    # encryption_algo is the last 16 bytes and 0xff never appears in utf-8
+    invalid_algo_optional = optional_hex[:-32] + "ff" * 16
+
+    for headers in (
+        {X_BOBB_HEADER: short_header},
+        {X_BOBB_HEADER: header_hex, X_BOBB_OPTIONAL_HEADER: short_optional},
+        {X_BOBB_HEADER: header_hex, X_BOBB_OPTIONAL_HEADER: invalid_algo_optional},
+    ):
+        response = client.get("/v1/satellites", headers=headers)
+        assert response.status_code == 400, f"Malformed header got {response.status_code}!"
+        assert response.is_json, "Malformed header did not get a JSON error!"
+
+    print("Malformed request header test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_header_round_trip()
+    test_header_batch_round_trip()
+    test_optional_header_round_trip()
+    test_create_header_batch()
+    test_malformed_request_headers_are_rejected()
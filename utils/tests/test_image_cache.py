@@ -0,0 +1,105 @@
+import base64
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from controllers import capture_image
+from helpers.image_cache import ImageCache, encoded_size, image_cache
+from main import app
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+def _write(path, data):
+    with open(path, "wb") as image_file:
+        image_file.write(data)
+
+def test_cache_is_keyed_by_file_identity_and_evicts_lru():
+    image_dir = tempfile.mkdtemp()
+    try:
+        first, second = os.path.join(image_dir, "first.jpg"), os.path.join(image_dir, "second.jpg")
+        _write(first, os.urandom(3000))
+        _write(second, os.urandom(3000))
+        entry_size = 3000 + encoded_size(3000)
+        cache = ImageCache(max_bytes=entry_size * 3 // 2)
+
+        image = cache.get(first)
+        assert base64.b64decode(image.encoded) == image.raw, "Cached encoding is wrong!"
+        assert cache.get(first) is image and cache.stats()["hits"] == 1, "Repeat lookup was not a hit!"
+
+        # A changed file is loaded again and replaces its old version
+        _write(first, os.urandom(3001))
+        assert len(cache.get(first).raw) == 3001, "Changed file was served from the cache!"
+        assert cache.stats()["entries"] == 1, "Stale version was kept!"
+
+        # Only one image fits, so loading the second evicts the first
+        cache.get(second)
+        stats = cache.stats()
+        assert stats["entries"] == 1 and stats["evictions"] == 1, "Least recently used image was not evicted!"
+        assert stats["bytes"] <= cache.max_bytes, "Cache is over its budget!"
+        assert ImageCache(max_bytes=entry_size - 1).get(second) is None, "Image over the budget was cached!"
+    finally:
+        shutil.rmtree(image_dir)
+
+    print("Image cache test passed successfully!")
+
+def test_spilled_images_are_shared():
+    image_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(image_dir, "image.jpg")
+        _write(path, os.urandom(5000))
+        spill_dir = os.path.join(image_dir, "spill")
+
+        # A second cache, as in another worker, maps the file the first one wrote
+        encoded = bytes(ImageCache(spill_dir=spill_dir).get(path).encoded)
+        other_worker = ImageCache(spill_dir=spill_dir)
+        image = other_worker.get(path)
+        assert isinstance(image.encoded, memoryview), "Spilled image was not mapped!"
+        assert bytes(image.encoded) == encoded and other_worker.stats()["spill_loads"] == 1, "Spilled image was not reused!"
+
+        # A new version replaces the old spill file
+        _write(path, os.urandom(5001))
+        ImageCache(spill_dir=spill_dir).get(path)
+        assert len(os.listdir(spill_dir)) == 1, "Old spill file was left behind!"
+        del image
+    finally:
+        shutil.rmtree(image_dir)
+
+    print("Image cache spill test passed successfully!")
+
+def test_capture_image_uses_cache():
+    image_dir = tempfile.mkdtemp()
+    path = os.path.join(image_dir, "image.jpg")
+    _write(path, os.urandom(5000))
+    original_path = capture_image.IMAGE_FILE_PATH
+    capture_image.IMAGE_FILE_PATH = path
+    try:
+        client = app.test_client()
+        bodies = []
+        for sequence_number in (1, 2):
+            headers = {
+                "X-Bobb-Header": BobbHeaders(message_type=1, source_port=4242, sequence_number=sequence_number).build_header().hex(),
+                "X-Bobb-Optional-Header": BobbOptionalHeaders().build_optional_header().hex()
+            }
+            hits = image_cache.stats()["hits"]
+            response = client.post("/v1/satellites/2001:0:130f::9c0:876a:130b/images", headers=headers)
+            bodies.append(response.get_data())
+            response.close()
+            assert response.status_code == 200, "Capture failed!"
+    finally:
+        capture_image.IMAGE_FILE_PATH = original_path
+        shutil.rmtree(image_dir)
+    assert image_cache.stats()["hits"] > hits, "Second capture was not served from the cache!"
+    assert bodies[0] == bodies[1] and response.json["status"] == "success", "Cached capture body is wrong!"
+    assert int(response.headers["Content-Length"]) == len(bodies[1]), "Content-Length is wrong!"
+
+    print("Capture image cache test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_cache_is_keyed_by_file_identity_and_evicts_lru()
+    test_spilled_images_are_shared()
+    test_capture_image_uses_cache()
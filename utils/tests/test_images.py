@@ -0,0 +1,80 @@
+import base64
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from controllers import capture_image
+from controllers.capture_image import iter_base64_json
+from helpers.image_cache import image_cache
+from main import app
+
+IMAGE_URL = "/v1/satellites/2001:0:130f::9c0:876a:130b/images"
+
+@contextmanager
+def generated_image(size=300000):
+    """Points the image routes at a random image in a scratch directory and yields its bytes."""
+    image_dir = tempfile.mkdtemp()
+    path = os.path.join(image_dir, "image.jpg")
+    image = os.urandom(size)
+    with open(path, "wb") as image_file:
+        image_file.write(image)
+    original_path = capture_image.IMAGE_FILE_PATH
+    capture_image.IMAGE_FILE_PATH = path
+    try:
+        yield image
+    finally:
+        capture_image.IMAGE_FILE_PATH = original_path
+        shutil.rmtree(image_dir)
+
+def test_download_image_ranges():
+    client = app.test_client()
+    with generated_image() as image:
+        # Closing a streamed response frees its scheduler slot
+        with client.get(IMAGE_URL) as response:
+            assert response.status_code == 200 and response.data == image, "Full download does not match!"
+
+        for range_header, first, last in (("bytes=100-199", 100, 199), ("bytes=-10", len(image) - 10, len(image) - 1)):
+            with client.get(IMAGE_URL, headers={"Range": range_header}) as response:
+                assert response.status_code == 206, f"{range_header} got {response.status_code}!"
+                assert response.headers["Content-Range"] == f"bytes {first}-{last}/{len(image)}", f"{range_header} Content-Range is wrong!"
+                assert response.data == image[first:last + 1], f"{range_header} body is wrong!"
+
+        with client.get(IMAGE_URL, headers={"Range": f"bytes={len(image)}-"}) as response:
+            assert response.status_code == 416, "Unsatisfiable range was served!"
+
+    print("Image range download test passed successfully!")
+
+def test_streamed_base64_json():
+    client = app.test_client()
+    with generated_image() as image:
+        # Chunk boundaries never need padding, whatever the file size
+        for size in (0, 1, 2, 3, 100, 101):
+            body = b"".join(iter_base64_json(io.BytesIO(image[:size]), read_size=3 * 7))
+            assert base64.b64decode(json.loads(body)["image"]) == image[:size], f"{size} byte image did not decode!"
+
+        # An image too large for the cache is streamed from the file
+        max_bytes = image_cache.max_bytes
+        image_cache.max_bytes = 0
+        try:
+            response = client.post(IMAGE_URL)
+            assert response.is_streamed, "Image was not streamed!"
+            data = json.loads(response.get_data())
+            response.close()
+        finally:
+            image_cache.max_bytes = max_bytes
+    assert response.status_code == 200 and data["status"] == "success", "Streamed capture failed!"
+    assert base64.b64decode(data["image"]) == image, "Streamed base64 does not decode to the image!"
+
+    print("Streamed base64 image test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_download_image_ranges()
+    test_streamed_base64_json()
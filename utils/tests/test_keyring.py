@@ -0,0 +1,69 @@
+
+import os
+import shutil
+import sys
+
+# Add the src directory to the path so we can import crypto_utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from cryptography.hazmat.primitives.asymmetric import x25519
+from crypto_utils import SharedKeyCache, create_shared_key, generate_keys
+
+def test_shared_key_cache_hits_and_eviction():
+    cache = SharedKeyCache(create_shared_key, maxsize=2)
+    own_key = x25519.X25519PrivateKey.generate()
+    peers = [x25519.X25519PrivateKey.generate().public_key() for _ in range(3)]
+
+    # The second lookup for the same peer is a hit and returns the same key
+    first = cache.get(own_key, peers[0])
+    assert cache.get(own_key, peers[0]) == first, "Cached key does not match!"
+    assert first == create_shared_key(own_key, peers[0]), "Cached key is not the derived key!"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1, "Hit/miss counters are wrong!"
+
+    # A third peer evicts the least recently used entry
+    cache.get(own_key, peers[1])
+    cache.get(own_key, peers[2])
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2, "LRU eviction did not happen!"
+
+    print("Shared key cache hit and eviction test passed successfully!")
+
+def test_shared_key_cache_ttl():
+    now = [0.0]
+    cache = SharedKeyCache(create_shared_key, ttl=60, clock=lambda: now[0])
+    own_key = x25519.X25519PrivateKey.generate()
+    peer = x25519.X25519PrivateKey.generate().public_key()
+
+    cache.get(own_key, peer)
+    now[0] = 61.0
+    cache.get(own_key, peer)
+    assert cache.stats()["expirations"] == 1 and cache.stats()["misses"] == 2, "Expired key was not re-derived!"
+
+    print("Shared key cache ttl test passed successfully!")
+
+def test_shared_key_cache_file_change():
+    key_dir = "test_keyring_keys"
+    cache = SharedKeyCache(create_shared_key)
+    generate_keys("SatelliteA", key_dir)
+    generate_keys("SatelliteB", key_dir)
+    private_key_file = os.path.join(key_dir, "SatelliteA_private_key.pem")
+    public_key_file = os.path.join(key_dir, "SatelliteB_public_key.pem")
+
+    first = cache.get_from_files(private_key_file, public_key_file)
+    assert cache.get_from_files(private_key_file, public_key_file) == first, "Cached key does not match!"
+    assert cache.stats()["hits"] == 1, "Unchanged key files were not served from the cache!"
+
+    # Regenerating the peer's keys changes the file, so the cached key is dropped
+    generate_keys("SatelliteB", key_dir)
+    assert cache.get_from_files(private_key_file, public_key_file) != first, "Changed key file was not re-read!"
+    assert cache.stats()["misses"] == 2, "Changed key file did not count as a miss!"
+
+    # Clean up files
+    shutil.rmtree(key_dir)
+
+    print("Shared key cache file change test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_shared_key_cache_hits_and_eviction()
+    test_shared_key_cache_ttl()
+    test_shared_key_cache_file_change()
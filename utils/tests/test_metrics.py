@@ -0,0 +1,43 @@
+import os
+import sys
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from helpers.metrics import HistogramFamily
+from main import app
+
+def test_histogram_rendering():
+    family = HistogramFamily("test_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        family.observe(value, "/a")
+
+    lines = family.render()
+    assert lines[:2] == ["# HELP test_seconds Test histogram.", "# TYPE test_seconds histogram"], "Metadata is wrong!"
+    # Buckets are cumulative and end with +Inf
+    assert lines[2:5] == [
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+    ], "Buckets are wrong!"
+    assert lines[5] == 'test_seconds_sum{route="/a"} 6.05' and lines[6] == 'test_seconds_count{route="/a"} 4', "Sum or count is wrong!"
+
+    print("Histogram rendering test passed successfully!")
+
+def test_metrics_endpoint():
+    client = app.test_client()
+    response = client.get("/v1/satellites")
+    response.close()  # the request is recorded once its body is done
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'bobb_request_duration_seconds_count{method="GET",route="/v1/satellites",status="400"}' in body, "Request was not recorded!"
+    for stage in ("headers", "replay"):
+        assert f'bobb_stage_duration_seconds_count{{route="/v1/satellites",stage="{stage}"}}' in body, f"Stage {stage} was not recorded!"
+    assert "bobb_scheduler_queue_depth" in body and "bobb_replay_duplicates_total" in body, "Collectors are missing!"
+
+    print("Metrics endpoint test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_histogram_rendering()
+    test_metrics_endpoint()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+from functools import partial
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from config.constants import MESSAGE_TYPE_ERROR, MESSAGE_TYPE_RESPONSE
+from controllers.relay import Relay, RoutingTable
+from frame_server import handle_connection
+from utils.frames import encode_frame, read_frame
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+SATELLITES = [
+    {"location": "Valencia", "ip": "2001:0:130f::9c0:876a:130b", "function": "disaster-imaging"},
+    {"location": "Madrid", "ip": "2001:0:130f::9c0:876a:130c", "function": "disaster-imaging"},
+    {"location": "Barcelona", "ip": "2001:0:130f::9c0:876a:130d", "function": "disaster-imaging"},
+]
+
+async def _relay_through_chain(hop_count):
+    # Three nodes in a line, every frame for Barcelona enters at Valencia
+    relays = [Relay(satellite["ip"], RoutingTable(satellites=[])) for satellite in SATELLITES]
+    servers = [await asyncio.start_server(partial(handle_connection, relay=relay), "127.0.0.1", 0) for relay in relays]
+    ports = [server.sockets[0].getsockname()[1] for server in servers]
+    for position in range(2):
+        relays[position].routing_table = RoutingTable(
+            satellites=[], default_route=f"127.0.0.1:{ports[position + 1]}"
+        )
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", ports[0])
+    replies = []
+    for sequence_number in range(3):
+        # Message type 2 is not served locally, so only Barcelona answers it (with an error frame)
+        header = BobbHeaders(message_type=MESSAGE_TYPE_RESPONSE, dest_ipv6=SATELLITES[2]["ip"], sequence_number=sequence_number)
+        writer.write(encode_frame(header, BobbOptionalHeaders(hop_count=hop_count)))
+        await writer.drain()
+        replies.append(await read_frame(reader))
+    writer.close()
+    # The next hop connection is opened once and reused afterwards
+    pooled = [relay.pool.idle_count() for relay in relays]
+    for server in servers:
+        server.close()
+    for relay in relays:
+        relay.pool.close()
+    return replies, relays, pooled
+
+def test_multi_hop_relay():
+    replies, relays, pooled = asyncio.run(_relay_through_chain(hop_count=5))
+
+    assert [reply.header.sequence_number for reply in replies] == [0, 1, 2], "Replies are out of order!"
+    for reply in replies:
+        assert reply.header.message_type == MESSAGE_TYPE_ERROR, "Reply should be an error frame!"
+        assert json.loads(bytes(reply.payload))["error"] == "Unsupported message type 2", "Reply did not come from the destination!"
+    assert relays[0].stats["forwarded"] == 3 and relays[1].stats["forwarded"] == 3, "Frames were not relayed twice!"
+    assert pooled == [1, 1, 0], "Next hop connections were not pooled and reused!"
+
+    print("Multi-hop relay test passed successfully!")
+
+def test_hop_limit_drops_frames():
+    replies, relays, _ = asyncio.run(_relay_through_chain(hop_count=2))
+
+    # Valencia decrements 2 -> 1, Madrid would reach zero and drops the frame
+    for reply in replies:
+        assert json.loads(bytes(reply.payload))["error"] == "Hop limit exceeded", "Frame was not dropped!"
+    assert relays[1].stats["dropped"] == 3, "Madrid did not drop the frames!"
+    assert relays[2].stats["forwarded"] == 0, "Dropped frames reached the destination!"
+
+    print("Hop limit test passed successfully!")
+
+async def _relay_to_closed_port():
+    # A port that was just released has nothing listening on it
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+    relay = Relay(SATELLITES[0]["ip"], RoutingTable(satellites=[], default_route=f"127.0.0.1:{closed_port}"))
+    server = await asyncio.start_server(partial(handle_connection, relay=relay), "127.0.0.1", 0)
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+    replies = []
+    for sequence_number in range(2):
+        header = BobbHeaders(message_type=MESSAGE_TYPE_RESPONSE, dest_ipv6=SATELLITES[2]["ip"], sequence_number=sequence_number)
+        writer.write(encode_frame(header, BobbOptionalHeaders(hop_count=5)))
+        await writer.drain()
+        replies.append(await read_frame(reader))
+    writer.close()
+    server.close()
+    relay.pool.close()
+    return replies, relay
+
+def test_unreachable_next_hop():
+    replies, relay = asyncio.run(_relay_to_closed_port())
+
+    # The refused connection is answered on the sender's connection, which stays usable
+    assert [reply.header.sequence_number for reply in replies] == [0, 1], "Replies are out of order!"
+    for reply in replies:
+        assert reply.header.message_type == MESSAGE_TYPE_ERROR, "Reply should be an error frame!"
+        assert json.loads(bytes(reply.payload))["error"] == "Next hop unreachable", "Refused connection was not reported!"
+    assert relay.stats["failed"] == 2 and relay.stats["forwarded"] == 0, "Failed relays were not counted!"
+
+    print("Unreachable next hop test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_multi_hop_relay()
+    test_hop_limit_drops_frames()
+    test_unreachable_next_hop()
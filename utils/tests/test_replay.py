@@ -0,0 +1,101 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from config.constants import X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from controllers import capture_image
+from main import app
+from middleware.replay import ReplayCache, replay_cache
+from middleware.scheduler import scheduler
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+def test_sequence_window():
+    now = [0.0]
+    cache = ReplayCache(window_size=8, max_sources=2, expiry=60, clock=lambda: now[0])
+    source = ("10.0.0.1", b"\0" * 16, 1)
+
+    # New, reordered and duplicate sequence numbers
+    assert [cache.seen(source, n, 100) for n in (5, 7, 6, 6, 5)] == [False, False, False, True, True], "Window is wrong!"
+    # Sliding past the window forgets old numbers, which are then treated as replays
+    assert not cache.seen(source, 20, 100), "New sequence number was flagged!"
+    assert cache.seen(source, 12, 100), "Number behind the window was accepted!"
+    # A newer timestamp means the sender restarted its count
+    assert not cache.seen(source, 0, 101), "Restarted sender was flagged!"
+    # The 32-bit sequence number wraps around
+    assert not any(cache.seen(source, n, 101) for n in (0xFFFFFFFE, 0xFFFFFFFF, 1)), "Wrap around was flagged!"
+    assert cache.seen(source, 0xFFFFFFFF, 101), "Duplicate across the wrap was accepted!"
+
+    # Memory is bounded by max_sources and quiet sources expire
+    cache.seen(("10.0.0.2", b"\0" * 16, 1), 0, 100)
+    cache.seen(("10.0.0.3", b"\0" * 16, 1), 0, 100)
+    assert cache.stats()["sources"] == 2, "Sources are not bounded!"
+    now[0] = 61.0
+    assert not cache.seen(("10.0.0.3", b"\0" * 16, 1), 0, 100), "Expired source was remembered!"
+    assert cache.stats()["sources"] == 1, "Quiet sources were not expired!"
+
+    print("Sequence window test passed successfully!")
+
+def test_retransmit_is_answered_from_cache():
+    client = app.test_client()
+    headers = {
+        X_BOBB_HEADER: BobbHeaders(version_major=1, source_port=40001, sequence_number=9).build_header().hex(),
+        X_BOBB_OPTIONAL_HEADER: BobbOptionalHeaders().build_optional_header().hex(),
+    }
+    replayed = replay_cache.replayed
+
+    first = client.get("/v1/satellites", headers=headers)
+    retransmit = client.get("/v1/satellites", headers=headers)
+    assert first.status_code == retransmit.status_code == 200, "Requests failed!"
+    assert retransmit.data == first.data, "Retransmit got a different body!"
+    assert replay_cache.replayed == replayed + 1, "Retransmit was processed again!"
+    assert X_BOBB_HEADER in retransmit.headers, "Replayed response was not stamped!"
+
+    # A duplicate that is not idempotent is rejected
+    duplicate = client.post("/v1/satellites/2001:0:130f::9c0:876a:130b/images", headers=headers)
+    assert duplicate.status_code == 409, "Duplicate POST was not rejected!"
+
+    print("Replay cache test passed successfully!")
+
+def test_shed_request_can_be_retried():
+    client = app.test_client()
+    headers = {
+        X_BOBB_HEADER: BobbHeaders(version_major=1, source_port=40002, sequence_number=3).build_header().hex(),
+        X_BOBB_OPTIONAL_HEADER: BobbOptionalHeaders().build_optional_header().hex(),
+    }
+    url = "/v1/satellites/2001:0:130f::9c0:876a:130b/images"
+
+    # A random stand-in for the satellite image
+    image_dir = tempfile.mkdtemp()
+    original_path = capture_image.IMAGE_FILE_PATH
+    capture_image.IMAGE_FILE_PATH = os.path.join(image_dir, "image.jpg")
+    with open(capture_image.IMAGE_FILE_PATH, "wb") as image_file:
+        image_file.write(os.urandom(5000))
+    try:
+        # No slots and no queue: the request is shed before it is processed
+        max_concurrency, max_queue = scheduler.max_concurrency, scheduler.max_queue
+        scheduler.max_concurrency = scheduler.max_queue = 0
+        try:
+            shed = client.post(url, headers=headers)
+        finally:
+            scheduler.max_concurrency, scheduler.max_queue = max_concurrency, max_queue
+        assert shed.status_code == 503 and shed.headers["Retry-After"] == "1", "Request was not shed!"
+
+        retry = client.post(url, headers=headers)
+        assert retry.status_code == 200, f"Retry of a shed request got {retry.status_code}!"
+        assert client.post(url, headers=headers).status_code == 409, "Duplicate of a processed POST was accepted!"
+    finally:
+        capture_image.IMAGE_FILE_PATH = original_path
+        shutil.rmtree(image_dir)
+
+    print("Shed request retry test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_sequence_window()
+    test_retransmit_is_answered_from_cache()
+    test_shed_request_can_be_retried()
@@ -0,0 +1,80 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from flask import Response
+
+from config.constants import X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from middleware import response_header
+from middleware.response_header import ResponseHeaderStamper
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+FIRST, SECOND, THIRD = ("10.0.0.1", 40001), ("10.0.0.1", 40002), ("10.0.0.2", 40001)
+
+def test_sequence_numbers_per_connection():
+    stamper = ResponseHeaderStamper()
+    assert [stamper.next_sequence_number(FIRST) for _ in range(3)] == [0, 1, 2], "Sequence numbers do not increase!"
+    assert stamper.next_sequence_number(SECOND) == 0, "A new connection should start at 0!"
+    assert stamper.next_sequence_number(FIRST) == 3, "Another connection changed the sequence!"
+
+    # The counter is 32 bits on the wire and wraps around to 0
+    stamper._sequences[THIRD] = 0xFFFFFFFE
+    assert stamper.next_sequence_number(THIRD) == 0xFFFFFFFF, "Last sequence number was skipped!"
+    assert stamper.next_sequence_number(THIRD) == 0, "Sequence number did not wrap!"
+
+    print("Response sequence number test passed successfully!")
+
+def test_idle_connections_are_evicted():
+    stamper = ResponseHeaderStamper(max_connections=2)
+    stamper.next_sequence_number(FIRST)
+    stamper.next_sequence_number(SECOND)
+    stamper.next_sequence_number(FIRST)
+
+    # SECOND is now the least recently used connection and is forgotten
+    stamper.next_sequence_number(THIRD)
+    assert stamper.next_sequence_number(FIRST) == 2, "Recently used connection was evicted!"
+    assert stamper.next_sequence_number(SECOND) == 0, "Idle connection was not evicted!"
+
+    print("Response sequence eviction test passed successfully!")
+
+def test_stamped_headers_parse_back():
+    clock = [1700000000.25]
+    original_time = response_header.time
+    response_header.time = SimpleNamespace(time=lambda: clock[0])
+    try:
+        stamper = ResponseHeaderStamper(version_major=1, version_minor=0, message_type=2,
+                                        hop_count=10, priority=1, encryption_algo="AES256")
+        response = stamper.stamp(Response(), FIRST)
+        header = BobbHeaders().parse_header(bytes.fromhex(response.headers[X_BOBB_HEADER]))
+        optional_header = BobbOptionalHeaders().parse_optional_header(bytes.fromhex(response.headers[X_BOBB_OPTIONAL_HEADER]))
+        expected = BobbHeaders(version_major=1, message_type=2, sequence_number=0, timestamp=1700000000)
+        assert header == expected.parse_header(expected.build_header()), "Stamped header does not parse back!"
+        assert optional_header == {
+            "timestamp": 1700000000, "hop_count": 10, "priority": 1, "encryption_algo": "AES256"
+        }, "Stamped optional header does not parse back!"
+
+        # Within the same second the timestamp parts are reused
+        cached_optional_header = stamper.build(FIRST)[1]
+        assert cached_optional_header is stamper.build(SECOND)[1], "Optional header was rebuilt within the second!"
+
+        # The next second refreshes both timestamps
+        clock[0] += 1
+        bobb_header, optional_hex = stamper.build(FIRST)
+        assert BobbHeaders().parse_header(bytes.fromhex(bobb_header))["timestamp"] == 1700000001, "Header timestamp is stale!"
+        assert BobbOptionalHeaders().parse_optional_header(bytes.fromhex(optional_hex))["timestamp"] == 1700000001, \
+            "Optional header timestamp is stale!"
+        assert BobbHeaders().parse_header(bytes.fromhex(bobb_header))["sequence_number"] == 2, "Sequence was reset!"
+    finally:
+        response_header.time = original_time
+
+    print("Stamped response header test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_sequence_numbers_per_connection()
+    test_idle_connections_are_evicted()
+    test_stamped_headers_parse_back()
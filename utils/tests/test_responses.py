@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from flask import jsonify
+
+from helpers.response_helper import _prepared_error, create_response, error_response
+from main import app
+
+def test_responses_match_jsonify():
+    items = [{"id": i, "location": "Valencia", "tags": [None, True, 1.5]} for i in range(50)]
+    with app.app_context():
+        def legacy(data, status_code):
+            status = "success" if 200 <= status_code < 400 else "error"
+            return jsonify({"status": status, "data": data, "status_code": status_code}).get_data()
+
+        assert create_response(items[0], 200)[0].get_data() == legacy(items[0], 200), "create_response body changed!"
+        assert error_response("Invalid Bobb header", 400)[0].get_data() == legacy({"error": "Invalid Bobb header"}, 400), "Error body changed!"
+        assert error_response("Invalid Bobb header", 400)[0] is not error_response("Invalid Bobb header", 400)[0], "Cached errors must be new responses!"
+
+        # Per-request details are serialized as before but do not fill the cache
+        cached = _prepared_error.cache_info().currsize
+        for position in range(20):
+            body = error_response("Invalid Bobb header", 400, f"offset {position}")[0].get_data()
+            assert body == legacy({"error": "Invalid Bobb header", "details": f"offset {position}"}, 400), "Error details body changed!"
+        assert _prepared_error.cache_info().currsize == cached, "Errors with details were cached!"
+
+
+    print("Response helper test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_responses_match_jsonify()
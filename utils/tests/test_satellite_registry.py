@@ -0,0 +1,30 @@
+
+import os
+import sys
+
+# Add the repository root to the path so we can import helpers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from helpers.satellite_registry import SatelliteRegistry
+
+def test_registry_lookup():
+    registry = SatelliteRegistry([
+        {"location": "Valencia", "ip": "2001:0000:130F:0000:0000:09C0:876A:130B", "function": "disaster-imaging"},
+        {"location": "Bilbao", "ip": "2001:0000:130F:0000:0000:09C0:876A:1314", "function": "whale-tracking"}
+    ])
+
+    # Expanded, compressed and lowercase spellings all find the same satellite
+    assert registry.get("2001:0000:130F:0000:0000:09C0:876A:130B")["location"] == "Valencia", "Expanded address not found!"
+    assert registry.get("2001:0:130f::9c0:876a:130b")["location"] == "Valencia", "Compressed address not found!"
+    assert registry.get("2001:0:130f::9c0:876a:1399") is None, "Unknown address was found!"
+    assert registry.get("not-an-ip") is None, "Invalid address was found!"
+
+    assert [satellite["location"] for satellite in registry.by_function("whale-tracking")] == ["Bilbao"], "Function index is wrong!"
+    assert registry.by_function("windfarm-monitoring") == (), "Unknown function should be empty!"
+    assert registry.json_body.startswith(b'{"satellites":[{"function":"disaster-imaging"'), "List body is not pre-serialized!"
+
+    print("Satellite registry lookup test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_registry_lookup()
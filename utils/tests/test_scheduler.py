@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+import time
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main import app
+from middleware.scheduler import PriorityScheduler, scheduler
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the scheduler!"
+        time.sleep(0.001)
+
+def test_priority_scheduling_and_shedding():
+    scheduler = PriorityScheduler(max_concurrency=1, max_queue=2, queue_timeout=5)
+    assert scheduler.acquire(0), "An idle scheduler should admit immediately!"
+
+    results = {}
+    order = []
+
+    def request(name, priority):
+        results[name] = scheduler.acquire(priority)
+        if results[name]:
+            order.append(name)
+            scheduler.release()
+
+    threads = []
+    for name, priority in (("low-1", 0), ("low-2", 0), ("high", 3)):
+        thread = threading.Thread(target=request, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        if name != "high":
+            _wait_until(lambda: scheduler.stats()["queued"] == len(threads))
+
+    # The full queue made room for the high priority request by shedding the newest low one
+    _wait_until(lambda: "low-2" in results)
+    assert results["low-2"] is False, "The newest low priority request was not shed!"
+
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == ["high", "low-1"], "The high priority request was not served first!"
+    stats = scheduler.stats()
+    assert stats["classes"][0]["shed"] == 1 and stats["classes"][3]["admitted"] == 1, "Stats are wrong!"
+    assert stats["active"] == 0 and stats["queued"] == 0, "Scheduler did not drain!"
+
+    print("Priority scheduling test passed successfully!")
+
+def test_weighted_fair_dequeue():
+    scheduler = PriorityScheduler(max_concurrency=1, max_queue=100, queue_timeout=5, weights=(1, 3))
+    scheduler.acquire(0)
+
+    order = []
+    lock = threading.Lock()
+
+    def request(priority):
+        if scheduler.acquire(priority):
+            with lock:
+                order.append(priority)
+            scheduler.release()
+
+    # Hold releases back until both classes have eight waiters
+    threads = [threading.Thread(target=request, args=(priority,)) for priority in (0, 1) * 8]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: scheduler.stats()["queued"] == 16)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+
+    # While both classes wait, class 1 gets three slots for every one of class 0
+    assert order[:8].count(1) == 6, f"Dequeue is not weighted: {order}"
+    assert sorted(order) == [0] * 8 + [1] * 8, "Some requests were never served!"
+
+    print("Weighted fair dequeue test passed successfully!")
+
+def test_monitoring_is_not_shed():
+    client = app.test_client()
+    # No slots and no queue: every admitted request would be shed
+    max_concurrency, max_queue = scheduler.max_concurrency, scheduler.max_queue
+    scheduler.max_concurrency = scheduler.max_queue = 0
+    try:
+        for path in ("/metrics", "/metrics/profiler", "/v1/scheduler"):
+            assert client.get(path).status_code == 200, f"{path} was shed!"
+        assert client.get("/v1/satellites/2001:0:130f::9c0:876a:130b/images").status_code == 503, "Traffic was not shed!"
+    finally:
+        scheduler.max_concurrency, scheduler.max_queue = max_concurrency, max_queue
+
+    print("Monitoring admission test passed successfully!")
+
+def test_streamed_response_holds_its_slot():
+    client = app.test_client()
+    active = scheduler.stats()["active"]
+
+    # Batch results are produced while the body is sent, after the request was torn down
+    response = client.post("/v1/create-header/batch", json=[{"optional_header": {}}] * 3)
+    assert scheduler.stats()["active"] == active + 1, "Slot was freed before the body was produced!"
+    assert len(response.get_data().splitlines()) == 3, "Batch body is wrong!"
+    response.close()
+    assert scheduler.stats()["active"] == active, "Slot was not freed when the response was closed!"
+
+    # A body built by the handler frees its slot right away
+    response = client.post("/v1/create-header", json={"optional_header": {}})
+    assert scheduler.stats()["active"] == active, "Slot of a built body was kept!"
+    response.close()
+
+    print("Streamed response slot test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_priority_scheduling_and_shedding()
+    test_weighted_fair_dequeue()
+    test_monitoring_is_not_shed()
+    test_streamed_response_holds_its_slot()
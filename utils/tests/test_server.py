@@ -0,0 +1,72 @@
+import http.client
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from config.constants import X_BOBB_HEADER, X_BOBB_OPTIONAL_HEADER
+from main import app
+from server import PreforkServer
+from utils.headers import BobbHeaders
+from utils.optional_headers import BobbOptionalHeaders
+
+sequence_numbers = itertools.count(1)
+
+def _request(port, method, path, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {
+        X_BOBB_HEADER: BobbHeaders(version_major=1, message_type=1, sequence_number=next(sequence_numbers)).build_header().hex(),
+        X_BOBB_OPTIONAL_HEADER: BobbOptionalHeaders().build_optional_header().hex(),
+        "Content-Type": "application/json"
+    }
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def _wait_for(condition, server, timeout=15):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        server.reap()
+        time.sleep(0.05)
+    return condition()
+
+def test_prefork_workers_serve_restart_and_stop():
+    server = PreforkServer(app, "127.0.0.1", 0, workers=2, drain_timeout=5)
+    server.start()
+    try:
+        assert len(server.workers) == 2, "Workers were not started!"
+        for _ in range(4):
+            status, body = _request(server.port, "GET", "/v1/satellites")
+            assert status == 200 and b"Valencia" in body, "Worker did not serve the satellite list!"
+
+        # A restart replaces every worker without closing the port
+        old_workers = set(server.workers)
+        server.restart_workers()
+        assert set(server.workers).isdisjoint(old_workers), "Old workers were kept!"
+        status, _ = _request(server.port, "GET", "/v1/scheduler")
+        assert status == 200, "New workers do not serve requests!"
+        assert _wait_for(lambda: not server.retiring, server), "Old workers did not stop!"
+
+        # A worker that dies is replaced
+        killed = next(iter(server.workers))
+        os.kill(killed, signal.SIGKILL)
+        assert _wait_for(lambda: killed not in server.workers and len(server.workers) == 2, server), "Dead worker was not replaced!"
+        status, _ = _request(server.port, "GET", "/v1/satellites")
+        assert status == 200, "Replacement worker does not serve requests!"
+    finally:
+        server.stop()
+    assert not server.workers and not server.retiring, "Workers are still running after stop!"
+
+    print("Prefork server test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_prefork_workers_serve_restart_and_stop()
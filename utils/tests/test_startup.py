@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import config.config as node_config
+from helpers import name_generator
+from utils.crypto_utils import ensure_keys, generate_keys
+
+def test_keys_are_reused():
+    key_dir = tempfile.mkdtemp()
+    try:
+        assert ensure_keys("SatelliteA", key_dir), "Missing keys were not generated!"
+        private_key_file = os.path.join(key_dir, "SatelliteA_private_key.pem")
+        with open(private_key_file, "rb") as private_file:
+            private_key = private_file.read()
+
+        assert not ensure_keys("SatelliteA", key_dir), "Existing keys were regenerated!"
+        with open(private_key_file, "rb") as private_file:
+            assert private_file.read() == private_key, "Existing private key was rewritten!"
+
+        # A public key that does not belong to the private key is replaced together with it
+        generate_keys("SatelliteB", key_dir)
+        shutil.copy(os.path.join(key_dir, "SatelliteB_public_key.pem"), os.path.join(key_dir, "SatelliteA_public_key.pem"))
+        assert ensure_keys("SatelliteA", key_dir), "Mismatched key pair was reused!"
+    finally:
+        shutil.rmtree(key_dir)
+
+    print("Key reuse test passed successfully!")
+
+def test_config_is_cached_and_works_offline():
+    config_dir = tempfile.mkdtemp()
+    original_path = node_config.CONFIG_FILE_PATH
+    original_probe = name_generator._route_probe_address
+    node_config.CONFIG_FILE_PATH = os.path.join(config_dir, "config.json")
+    # Simulate a node without a route to the internet
+    name_generator._route_probe_address = lambda: None
+    node_config.reload_config()
+    try:
+        config = node_config.get_config()
+        assert os.path.exists(node_config.CONFIG_FILE_PATH), "Config file was not created!"
+        assert config["name"].rsplit("-", 1)[1] == name_generator.get_ip_addresses(), "Offline name has no IP!"
+
+        os.remove(node_config.CONFIG_FILE_PATH)
+        assert node_config.get_config() is config, "Config was not cached!"
+    finally:
+        name_generator._route_probe_address = original_probe
+        node_config.CONFIG_FILE_PATH = original_path
+        node_config.reload_config()
+        shutil.rmtree(config_dir)
+
+    print("Config cache test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_keys_are_reused()
+    test_config_is_cached_and_works_offline()
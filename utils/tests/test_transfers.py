@@ -0,0 +1,121 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the repository root to the path so we can import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import x25519
+
+from config.constants import X_BOBB_PUBLIC_KEY
+from controllers import encrypted_image, transfers
+from main import app
+from utils.crypto_utils import (
+    ChunkBitmap, TransferManifest, TransferReceiver, create_shared_key, format_ranges, generate_keys, parse_ranges
+)
+
+TRANSFER_URL = "/v1/satellites/2001:0:130f::9c0:876a:130b/transfers"
+
+def test_chunk_bitmap():
+    bitmap = ChunkBitmap(20)
+    assert bitmap.missing_ranges() == [(0, 19)], "Empty bitmap should miss everything!"
+    for chunk_id in list(range(0, 9)) + [12, 19]:
+        bitmap.add(chunk_id)
+    assert bitmap.missing_ranges() == [(9, 11), (13, 18)], "Wrong missing ranges!"
+    assert 12 in bitmap and 13 not in bitmap, "Wrong membership!"
+    assert bitmap.count() == 11, "Wrong chunk count!"
+    assert ChunkBitmap(20, bytes(bitmap)).missing_ranges() == bitmap.missing_ranges(), "Bitmap did not round trip!"
+
+    assert format_ranges([(9, 11), (15, 15)]) == "9-11,15", "Wrong formatted ranges!"
+    assert parse_ranges("9-11,15,10", 20) == [9, 10, 11, 15], "Wrong parsed ranges!"
+    for text in ("5-30", "x", "3-1", "-1"):
+        try:
+            parse_ranges(text, 20)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Invalid ranges {text!r} were accepted!")
+
+    print("Chunk bitmap test passed successfully!")
+
+def test_resumable_transfer():
+    work_dir = tempfile.mkdtemp()
+    state_dir = os.path.join(work_dir, "transfers")
+    original_path = encrypted_image.node_private_key_path
+    original_image_path, original_registry = transfers.IMAGE_FILE_PATH, transfers.transfers
+    generate_keys("Node", work_dir)
+    encrypted_image.node_private_key_path = lambda: os.path.join(work_dir, "Node_private_key.pem")
+    # A random stand-in for the satellite image
+    image = os.urandom(300000)
+    transfers.IMAGE_FILE_PATH = os.path.join(work_dir, "offered.jpg")
+    with open(transfers.IMAGE_FILE_PATH, "wb") as image_file:
+        image_file.write(image)
+    try:
+        requester_key = x25519.X25519PrivateKey.generate()
+        public_key_hex = requester_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        ).hex()
+
+        client = app.test_client()
+        response = client.post(TRANSFER_URL)
+        assert response.status_code == 200, "Creating the transfer failed!"
+        manifest = TransferManifest.from_dict(response.get_json()["data"])
+        assert manifest.file_size == len(image) and manifest.chunk_count > 4, "Wrong manifest!"
+
+        def fetch(ranges, cut=None):
+            url = f"/v1/transfers/{manifest.transfer_id}/chunks"
+            response = client.get(url, query_string={"ranges": ranges} if ranges else None,
+                                  headers={X_BOBB_PUBLIC_KEY: public_key_hex})
+            body = response.get_data()
+            response.close()
+            assert response.status_code == 200, f"Fetching chunks {ranges} failed!"
+            assert len(body) == response.content_length, "Content-Length does not match the stream!"
+            node_public_key = x25519.X25519PublicKey.from_public_bytes(bytes.fromhex(response.headers[X_BOBB_PUBLIC_KEY]))
+            return io.BytesIO(body[:cut]).read, create_shared_key(requester_key, node_public_key)
+
+        # The connection drops halfway through the first download
+        read, key = fetch(None, cut=manifest.file_size // 2)
+        with TransferReceiver(manifest, key, state_dir) as receiver:
+            stored = receiver.receive(read)
+            assert 0 < stored < manifest.chunk_count, "Truncated stream should store some chunks!"
+            assert not receiver.complete, "Truncated transfer should not be complete!"
+
+        # After a restart of both sides only the missing chunks are requested
+        transfers.transfers = transfers.TransferRegistry(offered_paths=(transfers.IMAGE_FILE_PATH,))
+        with TransferReceiver.resume(manifest.transfer_id, key, state_dir) as receiver:
+            missing = receiver.missing_ranges()
+            assert missing == [(stored, manifest.chunk_count - 1)], "Progress did not survive the restart!"
+            read, _ = fetch(format_ranges(missing))
+            assert receiver.receive(read) == manifest.chunk_count - stored, "Resume fetched the wrong chunks!"
+            assert receiver.complete, "Transfer should be complete!"
+            output_path = os.path.join(work_dir, "image.jpg")
+            receiver.finish(output_path)
+        with open(output_path, "rb") as output_file:
+            assert output_file.read() == image, "Transferred image does not match!"
+        assert os.listdir(state_dir) == [], "Transfer state was not removed!"
+
+        # Chunks that do not decrypt with the receiver's key are not stored
+        with TransferReceiver(manifest, os.urandom(32), state_dir) as receiver:
+            read, _ = fetch("0-1")
+            assert receiver.receive(read) == 0, "Chunk with the wrong key was stored!"
+
+        response = client.get(f"/v1/transfers/{manifest.transfer_id}/chunks", query_string={"ranges": "0-100000"},
+                              headers={X_BOBB_PUBLIC_KEY: public_key_hex})
+        assert response.status_code == 400, "Out of range chunks were accepted!"
+        response = client.get("/v1/transfers/00/chunks", headers={X_BOBB_PUBLIC_KEY: public_key_hex})
+        assert response.status_code == 404, "Unknown transfer was accepted!"
+    finally:
+        encrypted_image.node_private_key_path = original_path
+        transfers.IMAGE_FILE_PATH, transfers.transfers = original_image_path, original_registry
+        shutil.rmtree(work_dir)
+
+    print("Resumable transfer test passed successfully!")
+
+# Run the tests
+if __name__ == "__main__":
+    test_chunk_bitmap()
+    test_resumable_transfer()